@@ -0,0 +1,222 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+"""Códigos de acreditación y su asignación.
+
+Los códigos impresos en las acreditaciones son un número de al menos
+`CIFRAS_NUMERO` cifras seguido de un dígito de control (algoritmo de Damm), que
+detecta cualquier cifra mal tecleada y cualquier par de cifras contiguas
+intercambiadas. Un código incorrecto se rechaza sin consultar la base de datos.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from gestion.models import CodigoAcreditacion, Persona
+from gestion.sqlite import escritura_con_reintentos
+
+# Lecturas repetidas de la misma acreditación (doble escaneo, varios puestos) que
+# no deben crear registros nuevos
+VENTANA_DUPLICADOS = timedelta(seconds=5)
+
+CIFRAS_NUMERO = 5
+LONGITUD_MAXIMA = Persona._meta.get_field("acreditacion").max_length
+NUMERO_MAXIMO = 10 ** (LONGITUD_MAXIMA - 1) - 1
+
+# Cuasigrupo de orden 10 totalmente antisimétrico con diagonal nula
+TABLA_DAMM = (
+    (0, 3, 1, 7, 5, 9, 8, 6, 4, 2),
+    (7, 0, 9, 2, 1, 5, 4, 8, 6, 3),
+    (4, 2, 0, 6, 8, 7, 1, 3, 5, 9),
+    (1, 7, 5, 0, 9, 8, 3, 4, 2, 6),
+    (6, 1, 2, 3, 0, 4, 5, 9, 7, 8),
+    (3, 6, 7, 4, 2, 0, 9, 5, 8, 1),
+    (5, 8, 6, 9, 7, 2, 0, 1, 3, 4),
+    (8, 9, 4, 5, 3, 6, 2, 0, 1, 7),
+    (9, 4, 3, 8, 6, 1, 7, 2, 0, 5),
+    (2, 5, 8, 1, 4, 3, 6, 7, 9, 0),
+)
+
+
+def _damm(cifras: str) -> int:
+    interino = 0
+    for cifra in cifras:
+        interino = TABLA_DAMM[interino][ord(cifra) - 48]
+    return interino
+
+
+def codigo_acreditacion(numero: int) -> str:
+    """Código impreso para el número de acreditación: el número con al menos
+    `CIFRAS_NUMERO` cifras y su dígito de control"""
+    if not 0 <= numero <= NUMERO_MAXIMO:
+        raise ValueError(
+            f"El número de acreditación debe estar entre 0 y {NUMERO_MAXIMO}"
+        )
+    cifras = f"{numero:0{CIFRAS_NUMERO}d}"
+    return f"{cifras}{_damm(cifras)}"
+
+
+def codigo_valido(codigo: str) -> bool:
+    """Comprueba el formato y el dígito de control sin consultar la base de datos.
+    Con `ACREDITACIONES_DIGITO_CONTROL` desactivado acepta cualquier texto que
+    quepa en el campo, para eventos con acreditaciones impresas sin él"""
+    if not codigo or len(codigo) > LONGITUD_MAXIMA:
+        return False
+    if not settings.ACREDITACIONES_DIGITO_CONTROL:
+        return True
+    return (
+        len(codigo) > CIFRAS_NUMERO
+        and codigo.isascii()
+        and codigo.isdigit()
+        and _damm(codigo) == 0
+    )
+
+
+def validar_codigo(codigo: str):
+    """Validador para los formularios de los puestos"""
+    if not codigo_valido(codigo):
+        raise ValidationError(
+            "Acreditación incorrecta: revisa que esté bien tecleada",
+            code="acreditacion_incorrecta",
+        )
+
+
+@dataclass(frozen=True)
+class PersonaAcreditada:
+    correo: str
+    nombre: str
+    acreditacion: str
+    # PARTICIPANTE, MENTOR o PERSONA
+    tipo: str
+
+
+# Caché de cada worker de acreditación → persona para los escaneos de pases y
+# presencias. Solo guarda acreditaciones existentes: una recién asignada no está y
+# se lee de la base de datos. Al guardar o borrar una persona (gestion.signals) se
+# vacía la del worker y se incrementa la generación compartida, que el resto de
+# workers comprueban como mucho cada `INTERVALO_GENERACION` segundos
+TAMANO_CACHE = 10000
+INTERVALO_GENERACION = 1
+CLAVE_GENERACION = "acreditaciones:generacion"
+
+_cache_personas: OrderedDict[str, PersonaAcreditada] = OrderedDict()
+_bloqueo_cache = threading.Lock()
+_generacion = {"valor": None, "comprobada": 0.0}
+
+
+def invalidar_cache_personas():
+    """Vacía la caché de este worker y obliga a los demás a vaciar la suya"""
+    with _bloqueo_cache:
+        _cache_personas.clear()
+    cache.add(CLAVE_GENERACION, 0, timeout=None)
+    try:
+        _generacion["valor"] = cache.incr(CLAVE_GENERACION)
+    except ValueError:
+        _generacion["valor"] = None
+
+
+def _comprobar_generacion():
+    ahora = time.monotonic()
+    if ahora - _generacion["comprobada"] < INTERVALO_GENERACION:
+        return
+    generacion = cache.get(CLAVE_GENERACION)
+    with _bloqueo_cache:
+        if generacion != _generacion["valor"]:
+            _cache_personas.clear()
+            _generacion["valor"] = generacion
+        _generacion["comprobada"] = ahora
+
+
+def buscar_persona(acreditacion: str) -> PersonaAcreditada | None:
+    """Persona con esa acreditación. Si el código no es válido no hay consulta, y
+    si ya se escaneó en este worker tampoco"""
+    if not codigo_valido(acreditacion):
+        return None
+
+    _comprobar_generacion()
+    with _bloqueo_cache:
+        persona = _cache_personas.get(acreditacion)
+        if persona is not None:
+            _cache_personas.move_to_end(acreditacion)
+            return persona
+
+    fila = (
+        Persona.objects.filter(acreditacion=acreditacion)
+        .values_list("correo", "nombre", "participante", "mentor")
+        .first()
+    )
+    if fila is None:
+        return None
+
+    correo, nombre, participante, mentor = fila
+    persona = PersonaAcreditada(
+        correo=correo,
+        nombre=nombre,
+        acreditacion=acreditacion,
+        tipo="PARTICIPANTE" if participante else "MENTOR" if mentor else "PERSONA",
+    )
+    with _bloqueo_cache:
+        _cache_personas[acreditacion] = persona
+        if len(_cache_personas) > TAMANO_CACHE:
+            _cache_personas.popitem(last=False)
+    return persona
+
+
+def asignar_acreditacion(correo: str, acreditacion: str) -> str:
+    """Asigna la acreditación con un único UPDATE condicional de esa columna.
+
+    Devuelve ASIGNADA, REPETIDA (ya tenía esa misma acreditación), YA_TIENE (tiene
+    otra), EN_USO (la tiene otra persona), NO_ACEPTADO, INEXISTENTE, INCORRECTA
+    (el código no es válido, sin llegar a consultar la base de datos) o
+    NO_REGISTRADA. Si hay códigos impresos registrados (`CodigoAcreditacion`) solo
+    se asignan esos, y el asignado se marca como entregado"""
+    if not codigo_valido(acreditacion):
+        return "INCORRECTA"
+    return _asignar(correo, acreditacion)
+
+
+@escritura_con_reintentos
+def _asignar(correo: str, acreditacion: str) -> str:
+    if (
+        not CodigoAcreditacion.objects.filter(pk=acreditacion).exists()
+        and CodigoAcreditacion.objects.exists()
+    ):
+        return "NO_REGISTRADA"
+
+    ahora = timezone.now()
+    try:
+        with transaction.atomic():
+            asignadas = Persona.objects.filter(
+                pk=correo, acreditacion__isnull=True, fecha_aceptacion__isnull=False
+            ).update(acreditacion=acreditacion, modificado=ahora)
+            if asignadas:
+                CodigoAcreditacion.objects.filter(
+                    pk=acreditacion, fecha_asignacion__isnull=True
+                ).update(fecha_asignacion=ahora)
+    except IntegrityError:
+        return "EN_USO"
+    if asignadas:
+        # La acreditación no estaba asignada, así que no puede estar en la caché
+        return "ASIGNADA"
+
+    # No se asignó: solo queda averiguar por qué
+    persona = (
+        Persona.objects.filter(pk=correo)
+        .values("acreditacion", "fecha_aceptacion")
+        .first()
+    )
+    if persona is None:
+        return "INEXISTENTE"
+    if persona["acreditacion"] == acreditacion:
+        return "REPETIDA"
+    if persona["acreditacion"]:
+        return "YA_TIENE"
+    return "NO_ACEPTADO"
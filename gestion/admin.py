@@ -2,11 +2,17 @@
 
 import logging
 
+from django import forms
 from django.contrib import admin, messages
 from django.utils import timezone
 from django.utils.translation import ngettext
 
+from gestion.acreditaciones import validar_codigo
 from gestion.models import (
+    Campana,
+    CodigoAcreditacion,
+    Correo,
+    EnvioCampana,
     Mentor,
     Participante,
     Pase,
@@ -28,12 +34,13 @@ def aceptar_participante(modeladmin, request, queryset):
         )
         return
 
-    verificados = queryset.filter(fecha_verificacion_correo__isnull=False)
-    no_verificados = queryset.filter(fecha_verificacion_correo__isnull=True)
-
-    ya_aceptados = verificados.filter(fecha_aceptacion__isnull=False).count()
-    actualizados = verificados.filter(fecha_aceptacion__isnull=True).update(
-        fecha_aceptacion=timezone.now()
+    no_verificados = queryset.filter(estado__in=["REGISTRADO", "ERROR_VERIFICACION"])
+    ya_aceptados = queryset.filter(
+        estado__in=["ACEPTADO", "CONFIRMADO", "RECHAZO"]
+    ).count()
+    ahora = timezone.now()
+    actualizados = queryset.filter(estado="VERIFICADO").update(
+        fecha_aceptacion=ahora, estado="ACEPTADO", modificado=ahora
     )
 
     logger.info(
@@ -76,73 +83,6 @@ def aceptar_participante(modeladmin, request, queryset):
         modeladmin.message_user(request, "No se ha aceptado a ningún participante.")
 
 
-class EstadoParticipanteListFilter(admin.SimpleListFilter):
-    title = "Estado"
-    parameter_name = "estado"
-
-    def lookups(self, request, model_admin):
-        return [
-            ("registrado", "Registrado (sin verificar correo)"),
-            ("error_verificacion", "Error de verificación del correo"),
-            ("verificado", "Correo verificado"),
-            ("aceptado", "Aceptado"),
-            ("confirmado", "Plaza confirmada"),
-            ("rechazo", "Plaza rechazada"),
-        ]
-
-    def queryset(self, request, queryset):
-        match self.value():
-            case "registrado":
-                return queryset.filter(
-                    fecha_registro__isnull=False,
-                    motivo_error_correo_verificacion__isnull=True,
-                    fecha_verificacion_correo__isnull=True,
-                    fecha_aceptacion__isnull=True,
-                    fecha_confirmacion_plaza__isnull=True,
-                    fecha_rechazo_plaza__isnull=True,
-                )
-            case "error_verificacion":
-                return queryset.filter(
-                    fecha_registro__isnull=False,
-                    motivo_error_correo_verificacion__isnull=False,
-                    fecha_verificacion_correo__isnull=True,
-                    fecha_aceptacion__isnull=True,
-                    fecha_confirmacion_plaza__isnull=True,
-                    fecha_rechazo_plaza__isnull=True,
-                )
-            case "verificado":
-                return queryset.filter(
-                    fecha_registro__isnull=False,
-                    fecha_verificacion_correo__isnull=False,
-                    fecha_aceptacion__isnull=True,
-                    fecha_confirmacion_plaza__isnull=True,
-                    fecha_rechazo_plaza__isnull=True,
-                )
-            case "aceptado":
-                return queryset.filter(
-                    fecha_registro__isnull=False,
-                    fecha_verificacion_correo__isnull=False,
-                    fecha_aceptacion__isnull=False,
-                    fecha_confirmacion_plaza__isnull=True,
-                    fecha_rechazo_plaza__isnull=True,
-                )
-            case "confirmado":
-                return queryset.filter(
-                    fecha_registro__isnull=False,
-                    fecha_verificacion_correo__isnull=False,
-                    fecha_aceptacion__isnull=False,
-                    fecha_confirmacion_plaza__isnull=False,
-                    fecha_rechazo_plaza__isnull=True,
-                )
-            case "rechazo":
-                return queryset.filter(
-                    fecha_registro__isnull=False,
-                    fecha_verificacion_correo__isnull=False,
-                    fecha_aceptacion__isnull=False,
-                    fecha_rechazo_plaza__isnull=False,
-                )
-
-
 class TokenValidoListFilter(admin.SimpleListFilter):
     title = "Validez"
     parameter_name = "validez"
@@ -161,7 +101,19 @@ class TokenValidoListFilter(admin.SimpleListFilter):
                 return queryset.filter(fecha_expiracion__lt=timezone.now())
 
 
+class AcreditacionAdminForm(forms.ModelForm):
+    """Las acreditaciones guardadas desde el panel tienen que pasar la misma
+    comprobación que en los puestos, o los escáneres no las encontrarán"""
+
+    def clean_acreditacion(self):
+        acreditacion = self.cleaned_data.get("acreditacion")
+        if acreditacion:
+            validar_codigo(acreditacion)
+        return acreditacion
+
+
 class ParticipanteAdmin(admin.ModelAdmin):
+    form = AcreditacionAdminForm
     fieldsets = [
         (
             "Personal",
@@ -199,6 +151,7 @@ class ParticipanteAdmin(admin.ModelAdmin):
                     "restricciones_alimentarias",
                     "detalle_restricciones_alimentarias",
                     "talla_camiseta",
+                    "estado",
                     "fecha_registro",
                     "fecha_verificacion_correo",
                     "fecha_aceptacion",
@@ -214,6 +167,7 @@ class ParticipanteAdmin(admin.ModelAdmin):
 
     readonly_fields = [
         "cv",
+        "estado",
         "fecha_registro",
         "fecha_verificacion_correo",
         "fecha_aceptacion",
@@ -230,6 +184,7 @@ class ParticipanteAdmin(admin.ModelAdmin):
         "ciudad",
         "quiere_creditos",
         "fecha_registro",
+        "estado",
         "verificado",
         "aceptado",
         "confirmado",
@@ -237,7 +192,7 @@ class ParticipanteAdmin(admin.ModelAdmin):
         "error_verificacion",
     ]
     list_filter = [
-        EstadoParticipanteListFilter,
+        "estado",
         "centro_estudio",
         "nivel_estudio",
         "ciudad",
@@ -301,12 +256,98 @@ class TokenAdmin(admin.ModelAdmin):
     ]
 
 
+class CorreoAdmin(admin.ModelAdmin):
+    fields = [
+        "tipo",
+        "persona",
+        "destinatario",
+        "asunto",
+        "cuerpo_texto",
+        "estado",
+        "intentos",
+        "fecha_creacion",
+        "fecha_proximo_intento",
+        "fecha_envio",
+        "ultimo_error",
+    ]
+    readonly_fields = [
+        "tipo",
+        "persona",
+        "destinatario",
+        "asunto",
+        "cuerpo_texto",
+        "intentos",
+        "fecha_creacion",
+        "fecha_envio",
+        "ultimo_error",
+    ]
+
+    list_display = [
+        "destinatario",
+        "tipo",
+        "estado",
+        "intentos",
+        "fecha_creacion",
+        "fecha_envio",
+    ]
+    list_filter = [
+        "estado",
+        "tipo",
+    ]
+
+    search_fields = [
+        "destinatario",
+        "persona__nombre",
+    ]
+
+
+class EnvioCampanaInline(admin.TabularInline):
+    model = EnvioCampana
+    fields = ["persona", "estado", "intentos", "fecha_envio", "ultimo_error"]
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+class CampanaAdmin(admin.ModelAdmin):
+    list_display = [
+        "nombre",
+        "tipo",
+        "fecha_creacion",
+        "fecha_expiracion",
+        "fecha_fin",
+    ]
+    readonly_fields = [
+        "fecha_creacion",
+        "fecha_fin",
+    ]
+    inlines = [EnvioCampanaInline]
+
+
+class CodigoAcreditacionAdmin(admin.ModelAdmin):
+    list_display = ["codigo", "lote", "fecha_creacion", "fecha_asignacion"]
+    list_filter = ["lote", ("fecha_asignacion", admin.EmptyFieldListFilter)]
+    search_fields = ["codigo"]
+    readonly_fields = ["fecha_creacion"]
+
+
+class MentorAdmin(admin.ModelAdmin):
+    form = AcreditacionAdminForm
+
+
+class PatrocinadorAdmin(admin.ModelAdmin):
+    form = AcreditacionAdminForm
+
+
 # Register your models here.
-admin.site.register(Patrocinador)
-admin.site.register(Mentor)
+admin.site.register(Patrocinador, PatrocinadorAdmin)
+admin.site.register(Mentor, MentorAdmin)
 admin.site.register(Participante, ParticipanteAdmin)
 admin.site.register(RestriccionAlimentaria)
 admin.site.register(Presencia)
 admin.site.register(TipoPase)
 admin.site.register(Pase)
 admin.site.register(Token, TokenAdmin)
+admin.site.register(Correo, CorreoAdmin)
+admin.site.register(Campana, CampanaAdmin)
+admin.site.register(CodigoAcreditacion, CodigoAcreditacionAdmin)
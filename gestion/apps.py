@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GestionConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "gestion"
+
+    def ready(self):
+        from gestion import checks, signals  # noqa: F401
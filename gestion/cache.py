@@ -0,0 +1,185 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import pickle
+import sqlite3
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Precisión con la que se actualiza la fecha del último acceso (LRU). Evita
+# escribir en la base de datos en cada lectura
+RESOLUCION_ACCESO = 60
+
+
+class SQLiteCache(BaseCache):
+    """Caché compartida entre los procesos de una misma máquina, en un archivo
+    SQLite en modo WAL. No necesita ningún servicio externo.
+
+    Las entradas caducan según su `timeout` y, al superar `MAX_ENTRIES`, se
+    descartan primero las caducadas y después las menos usadas recientemente
+    (1 de cada `CULL_FREQUENCY`).
+
+        CACHES = {
+            "default": {
+                "BACKEND": "gestion.cache.SQLiteCache",
+                "LOCATION": BASE_DIR / "cache.sqlite3",
+            }
+        }
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.ruta = location
+        self._conexion = None
+
+    @property
+    def conexion(self) -> sqlite3.Connection:
+        # Django crea una instancia de la caché por hilo
+        if self._conexion is None:
+            conexion = sqlite3.connect(
+                self.ruta, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "clave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL, acceso REAL NOT NULL)"
+            )
+            conexion.execute(
+                "CREATE INDEX IF NOT EXISTS cache_acceso ON cache (acceso)"
+            )
+            self._conexion = conexion
+        return self._conexion
+
+    def _expira(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        ahora = time.time()
+        cursor = self.conexion.execute(
+            "INSERT INTO cache VALUES (?, ?, ?, ?) ON CONFLICT (clave) DO UPDATE SET "
+            "valor = excluded.valor, expira = excluded.expira, acceso = excluded.acceso "
+            "WHERE cache.expira IS NOT NULL AND cache.expira <= ?",
+            (
+                key,
+                pickle.dumps(value, self.pickle_protocol),
+                self._expira(timeout),
+                ahora,
+                ahora,
+            ),
+        )
+        if cursor.rowcount:
+            self._cull()
+        return bool(cursor.rowcount)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        fila = self.conexion.execute(
+            "SELECT valor, expira, acceso FROM cache WHERE clave = ?", (key,)
+        ).fetchone()
+        if fila is None:
+            return default
+
+        valor, expira, acceso = fila
+        ahora = time.time()
+        if expira is not None and expira <= ahora:
+            self.conexion.execute(
+                "DELETE FROM cache WHERE clave = ? AND expira <= ?", (key, ahora)
+            )
+            return default
+
+        if ahora - acceso > RESOLUCION_ACCESO:
+            self.conexion.execute(
+                "UPDATE cache SET acceso = ? WHERE clave = ?", (ahora, key)
+            )
+        return pickle.loads(valor)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+            (
+                key,
+                pickle.dumps(value, self.pickle_protocol),
+                self._expira(timeout),
+                time.time(),
+            ),
+        )
+        self._cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.conexion.execute(
+            "UPDATE cache SET expira = ? WHERE clave = ? AND (expira IS NULL OR expira > ?)",
+            (self._expira(timeout), key, time.time()),
+        )
+        return bool(cursor.rowcount)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.conexion.execute("DELETE FROM cache WHERE clave = ?", (key,))
+        return bool(cursor.rowcount)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return (
+            self.conexion.execute(
+                "SELECT 1 FROM cache WHERE clave = ? AND (expira IS NULL OR expira > ?)",
+                (key, time.time()),
+            ).fetchone()
+            is not None
+        )
+
+    def incr(self, key, delta=1, version=None):
+        """Incremento atómico entre procesos"""
+        key = self.make_and_validate_key(key, version=version)
+        conexion = self.conexion
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conexion.execute(
+                "SELECT valor FROM cache WHERE clave = ? AND (expira IS NULL OR expira > ?)",
+                (key, time.time()),
+            ).fetchone()
+            if fila is None:
+                raise ValueError(f"Key '{key}' not found")
+
+            valor = pickle.loads(fila[0]) + delta
+            conexion.execute(
+                "UPDATE cache SET valor = ? WHERE clave = ?",
+                (pickle.dumps(valor, self.pickle_protocol), key),
+            )
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        conexion.execute("COMMIT")
+        return valor
+
+    def clear(self):
+        self.conexion.execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        # Se mantiene la conexión abierta entre peticiones
+        pass
+
+    def _cull(self):
+        (total,) = self.conexion.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if total <= self._max_entries:
+            return
+
+        self.conexion.execute("DELETE FROM cache WHERE expira <= ?", (time.time(),))
+        (total,) = self.conexion.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if total <= self._max_entries:
+            return
+
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+
+        self.conexion.execute(
+            "DELETE FROM cache WHERE clave IN "
+            "(SELECT clave FROM cache ORDER BY acceso LIMIT ?)",
+            (total // self._cull_frequency,),
+        )
@@ -0,0 +1,43 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.db import DatabaseError
+
+
+@register(Tags.database)
+def comprobar_acreditaciones(app_configs, **kwargs):
+    """Con el dígito de control activado, las acreditaciones guardadas sin él dejan
+    de encontrarse en los puestos"""
+    if not settings.ACREDITACIONES_DIGITO_CONTROL:
+        return []
+
+    from gestion.acreditaciones import codigo_valido
+    from gestion.models import Patrocinador, Persona
+
+    incorrectas = []
+    try:
+        for modelo in (Persona, Patrocinador):
+            incorrectas += [
+                acreditacion
+                for acreditacion in modelo.objects.exclude(acreditacion=None)
+                .values_list("acreditacion", flat=True)
+                .iterator()
+                if not codigo_valido(acreditacion)
+            ]
+    except DatabaseError:
+        # Base de datos sin migrar
+        return []
+
+    if not incorrectas:
+        return []
+    return [
+        Warning(
+            f"{len(incorrectas)} acreditaciones guardadas no tienen un dígito de "
+            f"control válido: {', '.join(incorrectas[:10])}"
+            f"{'...' if len(incorrectas) > 10 else ''}",
+            hint="Los puestos no las encontrarán. Cámbialas o desactiva "
+            "ACREDITACIONES_DIGITO_CONTROL.",
+            id="gestion.W001",
+        )
+    ]
@@ -0,0 +1,31 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import time
+
+from django.core.cache import cache
+
+# Claves de las páginas públicas cacheadas (gestion.views). Ver gestion.signals
+# para la invalidación
+CACHE_FORMULARIO_REGISTRO = "registro:formulario"
+CACHE_REGISTRO_CERRADO = "registro:cerrado"
+
+# Las que vacía `limpiarcache` al desplegar. El resto de la caché no se toca
+PAGINAS_CACHEADAS = (CACHE_FORMULARIO_REGISTRO, CACHE_REGISTRO_CERRADO)
+
+CLAVE_VERSION_PAGINAS = "paginas:version"
+
+TIEMPO_CACHE_REGISTRO = None  # Sin caducidad, se vacía al desplegar
+
+
+def version_paginas() -> int:
+    """Versión de caché (`version=`) de las páginas. `limpiarcache` la sube al
+    desplegar, y así se descartan también las páginas guardadas con claves que ya no
+    están en `PAGINAS_CACHEADAS`"""
+    return cache.get_or_set(CLAVE_VERSION_PAGINAS, 1, timeout=None)
+
+
+def subir_version_paginas() -> int:
+    # Con la hora no hace falta leer la anterior, que la caché puede haber expulsado
+    version = time.time_ns()
+    cache.set(CLAVE_VERSION_PAGINAS, version, timeout=None)
+    return version
@@ -0,0 +1,225 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from gestion.models import Correo, Persona
+from gestion.plantillas_correo import plantilla_compilada
+
+logger = logging.getLogger(__name__)
+
+RESPONDER_A = ("hackudc@gpul.org",)
+
+# Espera máxima entre reintentos de un mismo correo
+ESPERA_MAXIMA = timedelta(hours=1)
+
+
+def renderizar_plantilla(plantilla: str, params: dict) -> tuple[str, str]:
+    """Devuelve las versiones txt y html de una plantilla de correo, a partir de la
+    versión compilada (ver gestion.plantillas_correo)"""
+    texto, html = plantilla_compilada(plantilla)
+    return texto.render(params), html.render(params)
+
+
+def crear_mensaje(
+    asunto: str,
+    plantilla: str,
+    params: dict,
+    destinatario: str,
+    cabeceras: dict | None = None,
+) -> EmailMultiAlternatives:
+    texto, html = renderizar_plantilla(plantilla, params)
+    email = EmailMultiAlternatives(
+        asunto,
+        texto,
+        to=(destinatario,),
+        reply_to=RESPONDER_A,
+        headers=cabeceras,
+    )
+    email.attach_alternative(html, "text/html")
+    return email
+
+
+def encolar_correo(
+    tipo: str,
+    asunto: str,
+    plantilla: str,
+    params: dict,
+    destinatario: str,
+    persona: Persona | None = None,
+    cabeceras: dict | None = None,
+) -> Correo:
+    """Renderiza las versiones txt y html de `plantilla` y guarda el correo en la cola de envío"""
+    texto, html = renderizar_plantilla(plantilla, params)
+    return Correo.objects.create(
+        tipo=tipo,
+        persona=persona,
+        destinatario=destinatario,
+        asunto=asunto,
+        cuerpo_texto=texto,
+        cuerpo_html=html,
+        cabeceras=cabeceras or {},
+    )
+
+
+def construir_mensaje(correo: Correo, connection=None) -> EmailMultiAlternatives:
+    email = EmailMultiAlternatives(
+        correo.asunto,
+        correo.cuerpo_texto,
+        to=(correo.destinatario,),
+        reply_to=RESPONDER_A,
+        headers=correo.cabeceras,
+        connection=connection,
+    )
+    if correo.cuerpo_html:
+        email.attach_alternative(correo.cuerpo_html, "text/html")
+    return email
+
+
+def marcar_enviado(correo: Correo):
+    correo.estado = "ENVIADO"
+    correo.fecha_envio = timezone.now()
+    correo.intentos += 1
+    correo.ultimo_error = None
+    correo.save(update_fields=["estado", "fecha_envio", "intentos", "ultimo_error"])
+
+
+def marcar_fallo(
+    correo: Correo, error: Exception, max_intentos: int, espera_base: timedelta
+):
+    """Registra un intento fallido. Reprograma el correo con espera exponencial o,
+    si se agotaron los intentos, lo marca como erróneo"""
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:4096]
+
+    if correo.intentos >= max_intentos:
+        correo.estado = "ERROR"
+        logger.error(
+            f"Correo {correo.id_correo} a {correo.destinatario} descartado tras {correo.intentos} intentos: {error}"
+        )
+
+        # El participante no recibió el enlace de verificación
+        if correo.tipo == "VERIFICACION" and correo.persona_id:
+            Persona.objects.filter(pk=correo.persona_id).update(
+                motivo_error_correo_verificacion=correo.ultimo_error,
+                modificado=timezone.now(),
+                estado=Case(
+                    When(estado="REGISTRADO", then=Value("ERROR_VERIFICACION")),
+                    default=F("estado"),
+                ),
+            )
+    else:
+        espera = min(espera_base * 2 ** (correo.intentos - 1), ESPERA_MAXIMA)
+        espera += espera * random.uniform(0, 0.1)
+        correo.fecha_proximo_intento = timezone.now() + espera
+        logger.warning(
+            f"Fallo al enviar el correo {correo.id_correo} a {correo.destinatario} (intento {correo.intentos}): {error}"
+        )
+
+    correo.save(
+        update_fields=["estado", "intentos", "ultimo_error", "fecha_proximo_intento"]
+    )
+
+
+class LimitadorTasa:
+    """Reparte los envíos de varios hilos para no superar `por_segundo` mensajes por segundo"""
+
+    def __init__(self, por_segundo: float | None):
+        self.intervalo = 1 / por_segundo if por_segundo else 0
+        self.siguiente = time.monotonic()
+        self.lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+
+        with self.lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self.siguiente)
+            self.siguiente = turno + self.intervalo
+
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+@dataclass
+class ResumenEnvio:
+    enviados: int = 0
+    fallidos: int = 0
+    segundos: float = 0
+    errores: dict = field(default_factory=dict)
+
+    @property
+    def por_segundo(self) -> float:
+        return self.enviados / self.segundos if self.segundos else 0
+
+
+def _enviar_lote(lote, limitador: LimitadorTasa):
+    """Envía un lote de `(indice, mensaje)` reutilizando una única conexión SMTP.
+    Si la conexión falla se reabre para el siguiente mensaje"""
+    connection = get_connection(fail_silently=False)
+    abierta = False
+    resultados = []
+    try:
+        for indice, mensaje in lote:
+            limitador.esperar()
+            try:
+                if not abierta:
+                    connection.open()
+                    abierta = True
+                connection.send_messages([mensaje])
+            except Exception as e:
+                resultados.append((indice, e))
+                connection.close()
+                abierta = False
+                continue
+            resultados.append((indice, None))
+    finally:
+        connection.close()
+
+    return resultados
+
+
+def enviar_en_paralelo(
+    mensajes: list[EmailMultiAlternatives],
+    hilos: int = 4,
+    tamano_lote: int = 50,
+    por_segundo: float | None = None,
+    al_enviar=None,
+) -> ResumenEnvio:
+    """Envía los mensajes en lotes repartidos entre `hilos` conexiones SMTP simultáneas.
+
+    `al_enviar(indice, error)` se llama desde el hilo principal para cada mensaje
+    según terminan los lotes, con `error=None` si se envió correctamente.
+    """
+    limitador = LimitadorTasa(por_segundo)
+    resumen = ResumenEnvio()
+    inicio = time.monotonic()
+
+    indexados = list(enumerate(mensajes))
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        futuros = [
+            executor.submit(_enviar_lote, indexados[i : i + tamano_lote], limitador)
+            for i in range(0, len(indexados), tamano_lote)
+        ]
+        for futuro in as_completed(futuros):
+            for indice, error in futuro.result():
+                if error is None:
+                    resumen.enviados += 1
+                else:
+                    resumen.fallidos += 1
+                    resumen.errores[indice] = error
+                if al_enviar:
+                    al_enviar(indice, error)
+
+    resumen.segundos = time.monotonic() - inicio
+    return resumen
@@ -3,15 +3,21 @@
 from django import forms
 from django.utils import timezone
 
+from gestion.acreditaciones import LONGITUD_MAXIMA, validar_codigo
 from gestion.models import (
     Participante,
     Presencia,
     RestriccionAlimentaria,
     TipoPase,
+    normalizar_dni,
 )
 
 
 class ParticipanteForm(forms.ModelForm):
+    # Admite puntos, guiones y espacios; el modelo comprueba la longitud después de
+    # normalizarlo en clean_dni
+    dni = forms.CharField(label="DNI", max_length=16)
+
     class Meta:
         model = Participante
         fields = [
@@ -64,13 +70,21 @@ class ParticipanteForm(forms.ModelForm):
             "cv": forms.ClearableFileInput(attrs={"accept": ".pdf"}),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, errores_subida=None, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.fields["restricciones_alimentarias"].queryset = (
             RestriccionAlimentaria.objects.all().order_by("id_restriccion")
         )
 
+        # Archivos descartados durante la subida (ver gestion.subidas)
+        for campo, error in (errores_subida or {}).items():
+            self.fields[campo].error_messages["required"] = error
+
+    def clean_dni(self):
+        # Igual que en las búsquedas de los puestos de acreditación
+        return normalizar_dni(self.cleaned_data["dni"])
+
     class Media:
         css = {"all": ["css/registro.css"]}
 
@@ -97,7 +111,10 @@ class RevisarParticipanteForm(ParticipanteForm):
 class Registro(forms.Form):
     persona = forms.CharField(label="Correo a registrar", max_length=100)
     acreditacion = forms.CharField(
-        label="Acreditación a asignar", max_length=6, required=False
+        label="Acreditación a asignar",
+        max_length=LONGITUD_MAXIMA,
+        required=False,
+        validators=[validar_codigo],
     )
 
 
@@ -106,7 +123,9 @@ class PaseForm(forms.Form):
     tipo_pase = forms.ModelChoiceField(
         queryset=TipoPase.objects.all().order_by("inicio_validez")
     )
-    acreditacion = forms.CharField(label="Acreditación", max_length=6)
+    acreditacion = forms.CharField(
+        label="Acreditación", max_length=LONGITUD_MAXIMA, validators=[validar_codigo]
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
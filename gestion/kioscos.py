@@ -0,0 +1,304 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+"""Funcionamiento sin conexión de los puestos del evento.
+
+Los puestos descargan una instantánea de las personas acreditables para validar las
+altas, los pases y las presencias en local, guardan lo que registran y lo envían en
+lote cuando vuelve la conexión. Cada evento lleva la fecha en que ocurrió y un `id`
+del puesto, y aplicarlo dos veces no duplica nada.
+"""
+
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from gestion.acreditaciones import (
+    VENTANA_DUPLICADOS,
+    asignar_acreditacion,
+    codigo_valido,
+)
+from gestion.models import (
+    Pase,
+    Persona,
+    Presencia,
+    RestriccionAlimentaria,
+    TipoPase,
+    normalizar_dni,
+)
+from gestion.sqlite import escritura_con_reintentos
+
+logger = logging.getLogger(__name__)
+
+# Cambia si cambia el formato de la instantánea
+VERSION_INSTANTANEA = 1
+
+CAMPOS_PERSONA = (
+    "correo",
+    "dni",
+    "nombre",
+    "acreditacion",
+    "talla_camiseta",
+    "estado",
+    "restricciones",
+    "pases",
+)
+
+TIPOS_EVENTO = ("alta", "pase", "entrada", "salida")
+
+EVENTOS_POR_TRANSACCION = 200
+
+
+def personas_acreditables():
+    """Aceptados con la plaza sin rechazar y cualquiera que ya tenga acreditación"""
+    return Persona.objects.filter(
+        Q(estado__in=["ACEPTADO", "CONFIRMADO"]) | Q(acreditacion__isnull=False)
+    )
+
+
+def version_instantanea() -> str:
+    """Identificador del contenido de la instantánea. Las personas y los pases se
+    resumen con agregados sin leer las filas; los tipos de pase y las restricciones
+    alimentarias, que son pocos y no tienen fecha de modificación, se leen enteros.
+    Cambia con cualquier modificación de cualquiera de ellos"""
+    personas = personas_acreditables().aggregate(
+        total=Count("pk"), modificado=Max("modificado")
+    )
+    pases = Pase.objects.aggregate(total=Count("pk"), ultimo=Max("pk"))
+    tipos = list(
+        TipoPase.objects.order_by("pk").values_list("pk", "nombre", "inicio_validez")
+    )
+    restricciones = list(
+        RestriccionAlimentaria.objects.order_by("pk").values_list("pk", "nombre")
+    )
+    clave = repr((VERSION_INSTANTANEA, personas, pases, tipos, restricciones))
+    return hashlib.sha256(clave.encode()).hexdigest()[:20]
+
+
+def construir_instantanea(incluir_dni: bool = True, version: str | None = None) -> dict:
+    """Personas acreditables como listas de `CAMPOS_PERSONA`, con sus restricciones
+    alimentarias (ids) y su historial de pases [(tipo, fecha)]. Cinco consultas sea
+    cual sea el número de personas, más las cuatro de `version_instantanea` si no se
+    pasa la `version` ya calculada"""
+    if version is None:
+        version = version_instantanea()
+    acreditables = personas_acreditables()
+
+    restricciones = defaultdict(list)
+    PersonaRestriccion = Persona.restricciones_alimentarias.through
+    for persona, restriccion in PersonaRestriccion.objects.filter(
+        persona__in=acreditables
+    ).values_list("persona_id", "restriccionalimentaria_id"):
+        restricciones[persona].append(restriccion)
+
+    pases = defaultdict(list)
+    for persona, tipo, fecha in (
+        Pase.objects.filter(persona__in=acreditables)
+        .order_by("fecha")
+        .values_list("persona_id", "tipo_pase_id", "fecha")
+    ):
+        pases[persona].append([tipo, fecha.isoformat()])
+
+    personas = [
+        [
+            correo,
+            normalizar_dni(dni) if incluir_dni else None,
+            nombre,
+            acreditacion,
+            talla_camiseta,
+            estado,
+            restricciones.get(correo, []),
+            pases.get(correo, []),
+        ]
+        for correo, dni, nombre, acreditacion, talla_camiseta, estado in (
+            acreditables.order_by("pk").values_list(
+                "correo", "dni", "nombre", "acreditacion", "talla_camiseta", "estado"
+            )
+        )
+    ]
+
+    return {
+        "version": VERSION_INSTANTANEA,
+        "etag": version,
+        "generada": timezone.now().isoformat(),
+        "tipos_pase": [
+            [tipo, nombre, inicio.isoformat()]
+            for tipo, nombre, inicio in TipoPase.objects.values_list(
+                "pk", "nombre", "inicio_validez"
+            )
+        ],
+        "restricciones": dict(
+            RestriccionAlimentaria.objects.values_list("pk", "nombre")
+        ),
+        "campos": CAMPOS_PERSONA,
+        "personas": personas,
+    }
+
+
+class EventoInvalido(Exception):
+    pass
+
+
+def _leer_evento(evento) -> dict:
+    if not isinstance(evento, dict):
+        raise EventoInvalido("El evento no es un objeto")
+    if evento.get("tipo") not in TIPOS_EVENTO:
+        raise EventoInvalido(f"Tipo de evento desconocido: {evento.get('tipo')}")
+    if not evento.get("acreditacion"):
+        raise EventoInvalido("Falta la acreditación")
+    if not codigo_valido(str(evento["acreditacion"])):
+        raise EventoInvalido("Acreditación incorrecta")
+    if evento["tipo"] == "alta" and not evento.get("correo"):
+        raise EventoInvalido("Falta el correo")
+    tipo_pase = None
+    if evento["tipo"] == "pase":
+        try:
+            tipo_pase = int(evento.get("tipo_pase"))
+        except (TypeError, ValueError):
+            raise EventoInvalido("Falta el tipo de pase") from None
+
+    try:
+        fecha = datetime.fromisoformat(str(evento.get("fecha")))
+    except ValueError:
+        raise EventoInvalido("Fecha incorrecta") from None
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    if fecha > timezone.now() + VENTANA_DUPLICADOS:
+        raise EventoInvalido("Fecha en el futuro")
+
+    return {
+        **evento,
+        "acreditacion": str(evento["acreditacion"]),
+        "tipo_pase": tipo_pase,
+        "fecha": fecha,
+    }
+
+
+def sincronizar(eventos: list, puesto: str = "") -> list[dict]:
+    """Aplica en orden cronológico los eventos registrados sin conexión.
+
+    Devuelve, en el orden recibido, `{"id", "resultado", "detalle"}` por evento con
+    resultado APLICADO, DUPLICADO (ya estaba aplicado), CONFLICTO (no se aplicó por
+    el estado del servidor) o ERROR (evento mal formado). APLICADO puede llevar un
+    aviso en `detalle`, p. ej. un pase que ya se había usado en otro puesto"""
+    resultados = [None] * len(eventos)
+    validos = []
+    for i, evento in enumerate(eventos):
+        try:
+            validos.append((i, _leer_evento(evento)))
+        except EventoInvalido as e:
+            resultados[i] = ("ERROR", str(e))
+
+    validos.sort(key=lambda par: par[1]["fecha"])
+    # Una transacción por bloque: no se retiene el bloqueo de escritura de SQLite
+    # durante todo el lote y un reintento solo repite su bloque
+    for inicio in range(0, len(validos), EVENTOS_POR_TRANSACCION):
+        bloque = validos[inicio : inicio + EVENTOS_POR_TRANSACCION]
+        for i, resultado in _aplicar(bloque).items():
+            resultados[i] = resultado
+
+    resumen = defaultdict(int)
+    for resultado, _ in resultados:
+        resumen[resultado] += 1
+    logger.info(f"Sincronización del puesto '{puesto}': {dict(resumen)}")
+
+    return [
+        {
+            "id": evento.get("id") if isinstance(evento, dict) else None,
+            "resultado": resultado,
+            "detalle": detalle,
+        }
+        for evento, (resultado, detalle) in zip(eventos, resultados)
+    ]
+
+
+@escritura_con_reintentos
+def _aplicar(validos: list[tuple[int, dict]]) -> dict:
+    # Si la transacción se reintenta se vuelve a empezar: nada se guarda fuera
+    acreditaciones = dict(
+        Persona.objects.filter(
+            acreditacion__in={evento["acreditacion"] for _, evento in validos}
+        ).values_list("acreditacion", "pk")
+    )
+    tipos_pase = set(TipoPase.objects.values_list("pk", flat=True))
+
+    resultados = {}
+    for i, evento in validos:
+        if evento["tipo"] == "alta":
+            resultados[i] = _aplicar_alta(evento, acreditaciones)
+            continue
+
+        persona = acreditaciones.get(evento["acreditacion"])
+        if persona is None:
+            resultados[i] = ("CONFLICTO", "No existe la acreditación")
+        elif evento["tipo"] == "pase":
+            if evento["tipo_pase"] not in tipos_pase:
+                resultados[i] = ("CONFLICTO", "No existe el tipo de pase")
+            else:
+                resultados[i] = _aplicar_pase(evento, persona)
+        elif evento["tipo"] == "entrada":
+            resultados[i] = _aplicar_entrada(evento, persona)
+        else:
+            resultados[i] = _aplicar_salida(evento, persona)
+
+    return resultados
+
+
+def _aplicar_alta(evento: dict, acreditaciones: dict) -> tuple[str, str | None]:
+    resultado = asignar_acreditacion(evento["correo"], evento["acreditacion"])
+    if resultado == "ASIGNADA":
+        acreditaciones[evento["acreditacion"]] = evento["correo"]
+        return "APLICADO", None
+    if resultado == "REPETIDA":
+        return "DUPLICADO", None
+    return "CONFLICTO", resultado
+
+
+def _alrededor(fecha: datetime) -> tuple[datetime, datetime]:
+    return fecha - VENTANA_DUPLICADOS, fecha + VENTANA_DUPLICADOS
+
+
+def _aplicar_pase(evento: dict, persona: str) -> tuple[str, str | None]:
+    previos = Pase.objects.filter(persona_id=persona, tipo_pase_id=evento["tipo_pase"])
+    if previos.filter(fecha__range=_alrededor(evento["fecha"])).exists():
+        return "DUPLICADO", None
+
+    total = previos.count()
+    Pase.objects.create(
+        persona_id=persona, tipo_pase_id=evento["tipo_pase"], fecha=evento["fecha"]
+    )
+    return "APLICADO", f"Es la {total + 1}ª vez que lo usa" if total else None
+
+
+def _aplicar_entrada(evento: dict, persona: str) -> tuple[str, str | None]:
+    presencias = Presencia.objects.filter(persona_id=persona)
+    if presencias.filter(entrada__range=_alrededor(evento["fecha"])).exists():
+        return "DUPLICADO", None
+
+    try:
+        with transaction.atomic():
+            Presencia.objects.create(persona_id=persona, entrada=evento["fecha"])
+    except IntegrityError:
+        return "DUPLICADO", None
+    return "APLICADO", None
+
+
+def _aplicar_salida(evento: dict, persona: str) -> tuple[str, str | None]:
+    presencias = Presencia.objects.filter(persona_id=persona)
+    if presencias.filter(salida__range=_alrededor(evento["fecha"])).exists():
+        return "DUPLICADO", None
+
+    # Cierra la última entrada anterior a la salida si sigue abierta
+    ultima = (
+        presencias.filter(entrada__lte=evento["fecha"]).order_by("-entrada").first()
+    )
+    if ultima and not ultima.salida:
+        Presencia.objects.filter(pk=ultima.pk).update(salida=evento["fecha"])
+        return "APLICADO", None
+
+    Presencia.objects.create(persona_id=persona, salida=evento["fecha"])
+    return "APLICADO", "Salida sin entrada"
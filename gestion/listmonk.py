@@ -0,0 +1,163 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+"""Cliente mínimo de la API de listmonk para sincronizar la lista de correo por lotes.
+Solo usa la librería estándar; `LISTMONK_URL` puede apuntar a un servidor de pruebas"""
+
+import csv
+import io
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorListmonk(Exception):
+    pass
+
+
+def consulta_correos(correos) -> str:
+    """Expresión SQL de listmonk que selecciona a los suscriptores con esos correos"""
+    literales = ", ".join(
+        "'{}'".format(correo.replace("'", "''")) for correo in correos
+    )
+    return f"subscribers.email IN ({literales})"
+
+
+class ClienteListmonk:
+    def __init__(
+        self,
+        url: str,
+        usuario: str | None,
+        token: str | None,
+        lista: int,
+        timeout: float = 30,
+        espera_importacion: float = 300,
+    ):
+        self.url = url.rstrip("/")
+        self.usuario = usuario
+        self.token = token
+        self.lista = lista
+        self.timeout = timeout
+        self.espera_importacion = espera_importacion
+
+    @classmethod
+    def desde_settings(cls, **cambios) -> "ClienteListmonk":
+        """Cliente con `LISTMONK_*` y los valores de `cambios` que no sean None"""
+        opciones = {
+            "url": settings.LISTMONK_URL,
+            "usuario": settings.LISTMONK_USUARIO,
+            "token": settings.LISTMONK_TOKEN,
+            "lista": settings.LISTMONK_LISTA,
+        }
+        opciones.update((k, v) for k, v in cambios.items() if v is not None)
+        if not opciones["url"] or not opciones["lista"]:
+            raise ErrorListmonk("Falta LISTMONK_URL o LISTMONK_LISTA")
+        return cls(**opciones)
+
+    def peticion(
+        self,
+        metodo: str,
+        ruta: str,
+        datos: bytes | dict | None = None,
+        tipo: str = "application/json",
+    ) -> dict:
+        if isinstance(datos, dict):
+            datos = json.dumps(datos).encode()
+        peticion = urllib.request.Request(
+            f"{self.url}{ruta}", data=datos, method=metodo
+        )
+        if datos is not None:
+            peticion.add_header("Content-Type", tipo)
+        if self.usuario and self.token:
+            peticion.add_header("Authorization", f"token {self.usuario}:{self.token}")
+
+        try:
+            with urllib.request.urlopen(peticion, timeout=self.timeout) as respuesta:
+                cuerpo = respuesta.read()
+        except urllib.error.HTTPError as e:
+            raise ErrorListmonk(
+                f"{metodo} {ruta}: {e.code} {e.read()[:200].decode(errors='replace')}"
+            ) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise ErrorListmonk(f"{metodo} {ruta}: {e}") from e
+
+        return json.loads(cuerpo) if cuerpo else {}
+
+    def importar(self, filas: list[tuple[str, str, str]]):
+        """Da de alta o actualiza (email, nombre, atributos JSON) en la lista con el
+        importador CSV de listmonk y espera a que termine"""
+        csvfile = io.StringIO()
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL, quotechar='"')
+        writer.writerow(("email", "name", "attributes"))
+        writer.writerows(filas)
+
+        parametros = {
+            "mode": "subscribe",
+            "subscription_status": "confirmed",
+            "delim": ",",
+            "lists": [self.lista],
+            "overwrite": True,
+        }
+        limite = uuid.uuid4().hex
+        cuerpo = (
+            f"--{limite}\r\n"
+            'Content-Disposition: form-data; name="params"\r\n\r\n'
+            f"{json.dumps(parametros)}\r\n"
+            f"--{limite}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="lista_correo.csv"\r\n'
+            "Content-Type: text/csv\r\n\r\n"
+            f"{csvfile.getvalue()}\r\n"
+            f"--{limite}--\r\n"
+        ).encode()
+
+        self.peticion(
+            "POST",
+            "/api/import/subscribers",
+            cuerpo,
+            f"multipart/form-data; boundary={limite}",
+        )
+
+        # listmonk importa en segundo plano y solo admite una importación a la vez
+        fin = time.monotonic() + self.espera_importacion
+        while True:
+            estado = (
+                self.peticion("GET", "/api/import/subscribers")
+                .get("data", {})
+                .get("status")
+            )
+            if estado != "importing":
+                break
+            if time.monotonic() > fin:
+                raise ErrorListmonk("La importación no terminó a tiempo")
+            time.sleep(1)
+
+        if estado not in ("finished", "none", None):
+            raise ErrorListmonk(f"La importación terminó con estado {estado}")
+        logger.info(f"{len(filas)} suscriptores importados en listmonk")
+
+    def dar_de_baja(self, correos: list[str]):
+        """Da de baja de la lista a los suscriptores, sin borrarlos"""
+        self.peticion(
+            "PUT",
+            "/api/subscribers/query/lists",
+            {
+                "query": consulta_correos(correos),
+                "action": "unsubscribe",
+                "target_list_ids": [self.lista],
+            },
+        )
+        logger.info(f"{len(correos)} suscriptores dados de baja en listmonk")
+
+    def borrar(self, correos: list[str]):
+        self.peticion(
+            "POST",
+            "/api/subscribers/query/delete",
+            {"query": consulta_correos(correos)},
+        )
+        logger.info(f"{len(correos)} suscriptores borrados de listmonk")
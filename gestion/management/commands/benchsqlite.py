@@ -0,0 +1,169 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gestion.sqlite import aplicar_pragmas
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de escritura y las esperas por bloqueo de SQLite con varios "
+        "escritores simultáneos, con y sin el perfil de SQLITE_PRAGMAS. Usa una base "
+        "de datos temporal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hilos",
+            help="Escritores simultáneos, cada uno con su conexión. (default=8)",
+            type=int,
+            default=8,
+        )
+        parser.add_argument(
+            "--escrituras",
+            help="Transacciones por hilo. (default=200)",
+            type=int,
+            default=200,
+        )
+        parser.add_argument(
+            "--transaccion",
+            help="Tipo de transacción. DEFERRED lee y luego escribe, como las vistas en autocommit. (default=DEFERRED)",
+            choices=["DEFERRED", "IMMEDIATE"],
+            default="DEFERRED",
+        )
+        parser.add_argument(
+            "--espera-base",
+            help="busy_timeout en ms sin el perfil. Las conexiones se abren con timeout=0 "
+            "para que no se aplique la espera de 5 s por defecto de sqlite3.connect (la que "
+            "usa Django si no se indica otra). (default=0)",
+            type=int,
+            default=0,
+        )
+
+    def handle(self, *args, **options):
+        perfiles = (
+            (
+                "Sin perfil",
+                {"journal_mode": "WAL", "busy_timeout": options["espera_base"]},
+            ),
+            ("Con perfil", settings.SQLITE_PRAGMAS),
+        )
+        with tempfile.TemporaryDirectory() as directorio:
+            valores = {}
+            for nombre, pragmas in perfiles:
+                ruta = os.path.join(directorio, f"{nombre}.sqlite3")
+                self.preparar(ruta)
+                valores[nombre] = self.leer_pragmas(ruta, pragmas)
+                self.informe(nombre, *self.medir(ruta, pragmas, options))
+
+        diferencias = [
+            f"{pragma}={valores['Con perfil'][pragma]} (sin perfil {valores['Sin perfil'][pragma]})"
+            for pragma in settings.SQLITE_PRAGMAS
+            if valores["Con perfil"][pragma] != valores["Sin perfil"][pragma]
+        ]
+        self.stdout.write(
+            f"Diferencias del perfil: {', '.join(diferencias) or 'ninguna'}"
+        )
+
+    def conectar(self, ruta, pragmas):
+        # timeout=0: la única espera por bloqueo es el busy_timeout de los PRAGMA
+        conexion = sqlite3.connect(ruta, isolation_level=None, timeout=0)
+        aplicar_pragmas(conexion, pragmas)
+        return conexion
+
+    def leer_pragmas(self, ruta, pragmas) -> dict:
+        """Valores efectivos en una conexión del perfil, incluidos los que deja por
+        defecto"""
+        conexion = self.conectar(ruta, pragmas)
+        valores = {
+            pragma: conexion.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in settings.SQLITE_PRAGMAS
+        }
+        conexion.close()
+        return valores
+
+    def preparar(self, ruta):
+        conexion = sqlite3.connect(ruta)
+        conexion.execute(
+            "CREATE TABLE presencia (id INTEGER PRIMARY KEY, persona TEXT, entrada REAL)"
+        )
+        conexion.execute("CREATE INDEX presencia_persona ON presencia (persona)")
+        conexion.commit()
+        conexion.close()
+
+    def medir(self, ruta, pragmas, options):
+        latencias = []
+        bloqueos = []
+        lock = threading.Lock()
+
+        def escritor(n):
+            conexion = self.conectar(ruta, pragmas)
+            persona = f"persona-{n}"
+            propias, errores = [], 0
+
+            for _ in range(options["escrituras"]):
+                inicio = time.perf_counter()
+                try:
+                    # Lectura seguida de escritura, como presencia_entrada
+                    conexion.execute(f"BEGIN {options['transaccion']}")
+                    conexion.execute(
+                        "SELECT MAX(entrada) FROM presencia WHERE persona = ?",
+                        (persona,),
+                    ).fetchone()
+                    conexion.execute(
+                        "INSERT INTO presencia (persona, entrada) VALUES (?, ?)",
+                        (persona, time.time()),
+                    )
+                    conexion.execute("COMMIT")
+                except sqlite3.OperationalError as e:
+                    if conexion.in_transaction:
+                        conexion.execute("ROLLBACK")
+                    if "locked" not in str(e) and "busy" not in str(e):
+                        raise
+                    errores += 1
+                    continue
+                propias.append(time.perf_counter() - inicio)
+
+            conexion.close()
+            with lock:
+                latencias.extend(propias)
+                bloqueos.append(errores)
+
+        hilos = [
+            threading.Thread(target=escritor, args=(n,))
+            for n in range(options["hilos"])
+        ]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        return latencias, sum(bloqueos), time.perf_counter() - inicio
+
+    def informe(self, nombre, latencias, bloqueos, duracion):
+        if len(latencias) < 2:
+            self.stdout.write(self.style.ERROR(f"{nombre}: {bloqueos} bloqueos"))
+            return
+
+        tiempos = [segundos * 1000 for segundos in latencias]
+        percentiles = statistics.quantiles(tiempos, n=100, method="inclusive")
+        estilo = self.style.ERROR if bloqueos else self.style.SUCCESS
+
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"{nombre}: {len(latencias)} escrituras en {duracion:.2f} s "
+                f"({len(latencias) / duracion:.0f}/s). p50={percentiles[49]:.2f} ms "
+                f"p95={percentiles[94]:.2f} ms p99={percentiles[98]:.2f} ms "
+                f"max={max(tiempos):.2f} ms"
+            )
+        )
+        self.stdout.write(estilo(f"{nombre}: {bloqueos} 'database is locked'"))
@@ -0,0 +1,191 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Length
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from gestion.acreditaciones import (
+    NUMERO_MAXIMO,
+    codigo_acreditacion,
+    codigo_valido,
+)
+from gestion.models import CodigoAcreditacion
+
+
+def leer_rango(rango: str) -> range:
+    try:
+        inicio, fin = (int(n) for n in rango.split("-", 1))
+    except ValueError:
+        raise CommandError(f"Rango incorrecto '{rango}': se esperaba INICIO-FIN")
+    if not 0 <= inicio <= fin <= NUMERO_MAXIMO:
+        raise CommandError(f"El rango debe estar entre 0 y {NUMERO_MAXIMO}")
+    return range(inicio, fin + 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Registra los códigos de acreditación impresos (con dígito de control) y "
+        "exporta hojas para imprimirlos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-n",
+            "--cantidad",
+            help="Generar tantos códigos nuevos a continuación del último registrado.",
+            type=int,
+        )
+        parser.add_argument(
+            "-r",
+            "--rango",
+            help="Registrar los números de un rango impreso, p. ej. 1-500. Se puede repetir.",
+            action="append",
+            default=[],
+        )
+        parser.add_argument(
+            "-a",
+            "--archivo",
+            help="Registrar los códigos (con dígito de control) de un archivo, uno por línea.",
+        )
+        parser.add_argument(
+            "-l",
+            "--lote",
+            help="Nombre del lote de los códigos registrados. (default=fecha y hora actuales)",
+        )
+        parser.add_argument(
+            "-o",
+            "--hoja",
+            help="Exportar los códigos a una hoja HTML para imprimir, o CSV si termina en .csv.",
+        )
+        parser.add_argument(
+            "--todos",
+            help="Incluir en la hoja los códigos ya entregados.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--no-overwrite",
+            help="Evitar sobreescribir la hoja.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--bloque",
+            help="Códigos insertados en cada consulta. (default=5000)",
+            type=int,
+            default=5000,
+        )
+
+    def handle(self, *args, **options):
+        hoja = options["hoja"]
+        if hoja and os.path.exists(hoja) and options["no_overwrite"]:
+            raise CommandError("La hoja existe y se indicó --no-overwrite.")
+
+        codigos = self.codigos_pedidos(options)
+        lote = options["lote"]
+        if codigos:
+            lote = lote or f"{timezone.localtime():%Y-%m-%d %H:%M}"
+            self.registrar(codigos, lote, options["bloque"])
+
+        if hoja:
+            self.exportar(hoja, lote, options["todos"])
+        elif not codigos:
+            raise CommandError(
+                "Indica --cantidad, --rango o --archivo para registrar códigos, o --hoja para exportarlos."
+            )
+
+    def codigos_pedidos(self, options) -> list[str]:
+        codigos = []
+        for rango in options["rango"]:
+            codigos += [codigo_acreditacion(n) for n in leer_rango(rango)]
+
+        if options["archivo"]:
+            with open(options["archivo"]) as entrada:
+                leidos = [linea.strip() for linea in entrada if linea.strip()]
+            incorrectos = [codigo for codigo in leidos if not codigo_valido(codigo)]
+            if incorrectos:
+                raise CommandError(
+                    f"{len(incorrectos)} códigos incorrectos en {options['archivo']}: "
+                    f"{', '.join(incorrectos[:10])}{'...' if len(incorrectos) > 10 else ''}"
+                )
+            codigos += leidos
+
+        if options["cantidad"]:
+            # Los códigos se ordenan como números si se compara primero la longitud
+            ultimo = (
+                CodigoAcreditacion.objects.order_by(Length("codigo").desc(), "-codigo")
+                .values_list("codigo", flat=True)
+                .first()
+            )
+            siguiente = int(ultimo[:-1]) + 1 if ultimo and ultimo.isdigit() else 1
+            if siguiente + options["cantidad"] - 1 > NUMERO_MAXIMO:
+                raise CommandError(f"No hay números libres hasta {NUMERO_MAXIMO}")
+            codigos += [
+                codigo_acreditacion(n)
+                for n in range(siguiente, siguiente + options["cantidad"])
+            ]
+
+        return list(dict.fromkeys(codigos))
+
+    def registrar(self, codigos: list[str], lote: str, bloque: int):
+        antes = CodigoAcreditacion.objects.count()
+        with transaction.atomic():
+            CodigoAcreditacion.objects.bulk_create(
+                [CodigoAcreditacion(codigo=codigo, lote=lote) for codigo in codigos],
+                batch_size=bloque,
+                ignore_conflicts=True,
+            )
+        nuevos = CodigoAcreditacion.objects.count() - antes
+
+        if nuevos < len(codigos):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(codigos) - nuevos} códigos ya estaban registrados y no se cambiaron"
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"{nuevos} códigos registrados en el lote '{lote}'")
+        )
+
+    def exportar(self, hoja: str, lote: str | None, todos: bool):
+        codigos = CodigoAcreditacion.objects.all()
+        if lote:
+            codigos = codigos.filter(lote=lote)
+        if not todos:
+            codigos = codigos.filter(fecha_asignacion__isnull=True)
+        codigos = list(
+            codigos.order_by(Length("codigo"), "codigo").values_list(
+                "codigo", "lote", "fecha_asignacion"
+            )
+        )
+
+        temporal = f"{hoja}.tmp"
+        try:
+            with open(temporal, "w", newline="", encoding="utf-8") as salida:
+                if hoja.endswith(".csv"):
+                    writer = csv.writer(salida)
+                    writer.writerow(("codigo", "lote", "entregado"))
+                    writer.writerows(
+                        (codigo, lote, "si" if entregado else "no")
+                        for codigo, lote, entregado in codigos
+                    )
+                else:
+                    salida.write(
+                        render_to_string(
+                            "gestion/hoja_acreditaciones.html",
+                            {"codigos": codigos, "lote": lote},
+                        )
+                    )
+            os.replace(temporal, hoja)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(codigos)} códigos exportados en {hoja}")
+        )
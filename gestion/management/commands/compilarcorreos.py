@@ -0,0 +1,42 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from gestion.plantillas_correo import aplanar, compilar, plantillas
+
+
+class Command(BaseCommand):
+    help = (
+        "Compila las plantillas de correo (CSS incrustado y HTML minimizado) para "
+        "comprobar que son válidas antes de desplegar. Muestra el ahorro de tamaño."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-s",
+            "--salida",
+            help="Guardar las plantillas compiladas en este directorio para revisarlas.",
+        )
+
+    def handle(self, *args, **options):
+        for plantilla in plantillas():
+            original = len(aplanar(f"{plantilla}.html").encode())
+            texto, html = compilar(plantilla)
+            compilado = len(html.encode())
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{plantilla}: {original / 1024:.1f} KiB -> {compilado / 1024:.1f} KiB "
+                    f"({1 - compilado / original:.0%} menos)"
+                )
+            )
+
+            if options["salida"]:
+                ruta = os.path.join(options["salida"], plantilla)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                with open(f"{ruta}.html", "w") as archivo:
+                    archivo.write(html)
+                with open(f"{ruta}.txt", "w") as archivo:
+                    archivo.write(texto)
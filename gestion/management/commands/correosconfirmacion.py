@@ -3,102 +3,244 @@
 from datetime import datetime, timedelta
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
 from django.core.management import BaseCommand, CommandError
-from django.template.loader import render_to_string
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from gestion.models import Participante, Token
+from gestion.correo import crear_mensaje
+from gestion.models import Campana, EnvioCampana, Participante, Token
+from gestion.smtp_async import LimitesProveedor, enviar_asincrono
+from gestion.tokens import firmar_token
 
 
 class Command(BaseCommand):
     help = (
-        "Envía un correo de confirmación a los participantes aceptados no confirmados"
+        "Envía un correo de confirmación a los participantes aceptados no confirmados. "
+        "Si se repite con la misma campaña, solo envía a quien aún no lo haya recibido."
     )
 
     def add_arguments(self, parser):
+        parser.add_argument(
+            "-c",
+            "--campana",
+            help="Nombre de la campaña a crear o reanudar. (default=confirmacion-plaza)",
+            default="confirmacion-plaza",
+        )
         grupo_fecha_expiracion = parser.add_mutually_exclusive_group()
         grupo_fecha_expiracion.add_argument(
             "-d",
             "--dias",
-            help="Días de duración del token. (default=14)",
+            help="Días de duración del token en una campaña nueva. (default=14)",
             type=int,
             default=14,
         )
         grupo_fecha_expiracion.add_argument(
             "-e",
             "--expiracion",
-            help="Fecha de expiración para todos los tokens. Formato ISO 8601.",
+            help="Fecha de expiración para todos los tokens de una campaña nueva. Formato ISO 8601.",
+        )
+        parser.add_argument(
+            "--conexiones",
+            help="Conexiones SMTP simultáneas. (default=3)",
+            type=int,
+            default=3,
+        )
+        parser.add_argument(
+            "--reintentos",
+            help="Reintentos de los errores temporales (4xx y de conexión). (default=3)",
+            type=int,
+            default=3,
+        )
+        parser.add_argument(
+            "--por-minuto",
+            help="Máximo de mensajes por minuto. 0 para no limitar. (default=EMAIL_LIMITES_PROVEEDOR)",
+            type=float,
+        )
+        parser.add_argument(
+            "--por-conexion",
+            help="Mensajes antes de abrir una conexión nueva. 0 para no limitar. (default=EMAIL_LIMITES_PROVEEDOR)",
+            type=int,
+        )
+        parser.add_argument(
+            "--por-dia",
+            help="Máximo de mensajes al día, entre todos los comandos. 0 para no limitar. (default=EMAIL_LIMITES_PROVEEDOR)",
+            type=int,
         )
 
     def handle(self, *args, **options):
-        dias = options.get("dias")
-        expiracion = options.get("expiracion")
-        if expiracion:
-            fecha_expiracion = datetime.fromisoformat(expiracion).astimezone(
-                timezone.get_current_timezone()
+        campana = Campana.objects.filter(nombre=options["campana"]).first()
+        if campana:
+            self.stdout.write(
+                self.style.HTTP_INFO(
+                    f"Reanudando la campaña '{campana.nombre}'. Los tokens expiran el {campana.fecha_expiracion}"
+                )
             )
         else:
-            fecha_expiracion = timezone.now() + timedelta(days=dias)
-
-        if fecha_expiracion < timezone.now():
-            raise ValueError("La fecha de expiración es anterior a este instante")
+            campana = Campana.objects.create(
+                nombre=options["campana"],
+                tipo="CONFIRMACION",
+                fecha_expiracion=self.calcular_expiracion(options),
+            )
 
         # Participantes aceptados pero sin confirmar la plaza
-        participantes = Participante.objects.filter(
-            fecha_aceptacion__isnull=False,
-            fecha_confirmacion_plaza__isnull=True,
-            fecha_rechazo_plaza__isnull=True,
-        )
+        participantes = Participante.objects.filter(estado="ACEPTADO")
+
+        self.preparar_envios(campana, participantes)
 
-        participantes_con_token = Token.objects.filter(
-            tipo="CONFIRMACION", persona__in=participantes
+        envios = list(
+            campana.envios.exclude(estado="ENVIADO")
+            .filter(persona__in=participantes)
+            .select_related("persona", "token")
         )
-        if participantes_con_token.exists():
+        ya_enviados = campana.envios.filter(estado="ENVIADO").count()
+        if ya_enviados:
             self.stdout.write(
-                self.style.ERROR(
-                    f"{participantes_con_token.count()} participantes ya tenían un token de confirmación"
-                )
+                self.style.WARNING(f"{ya_enviados} participantes ya tenían el correo")
             )
 
-        for participante in participantes:
-            token = Token(
-                tipo="CONFIRMACION",
-                persona=participante,
-                fecha_expiracion=fecha_expiracion.replace(
-                    hour=23, minute=59, second=59
-                ),
+        mensajes = [
+            crear_mensaje(
+                settings.EMAIL_CONFIRMACION_ASUNTO,
+                "correo/confirmacion_plaza",
+                {
+                    "nombre": envio.persona.nombre,
+                    "token": firmar_token(envio.token),
+                    "expiracion": envio.token.fecha_expiracion,
+                    "host": settings.HOST_REGISTRO,
+                },
+                envio.persona.correo,
+                cabeceras={"Message-ID": f"hackudc-{envio.token.token}"},
             )
-            token.save()
+            for envio in envios
+        ]
 
-            try:
-                params = {
-                    "nombre": participante.nombre,
-                    "token": token.token,
-                    "expiracion": fecha_expiracion,
-                    "host": settings.HOST_REGISTRO,
-                }
-                email = EmailMultiAlternatives(
-                    settings.EMAIL_CONFIRMACION_ASUNTO,
-                    render_to_string("correo/confirmacion_plaza.txt", params),
-                    to=(participante.correo,),
-                    reply_to=("hackudc@gpul.org",),
-                    headers={
-                        "Message-ID": f"hackudc-{token.fecha_creacion.timestamp()}"
-                    },
-                )
-                email.attach_alternative(
-                    render_to_string("correo/confirmacion_plaza.html", params),
-                    "text/html",
+        def al_enviar(indice, error):
+            envio = envios[indice]
+            envio.intentos += 1
+            if error is None:
+                envio.estado = "ENVIADO"
+                envio.fecha_envio = timezone.now()
+                envio.ultimo_error = None
+                self.stdout.write(
+                    self.style.SUCCESS(f"Mensaje enviado a {envio.persona.correo}")
                 )
-                email.send(fail_silently=False)
-            except ConnectionRefusedError:
+            else:
+                envio.estado = "ERROR"
+                envio.ultimo_error = str(error)[:4096]
                 self.stdout.write(
                     self.style.ERROR(
-                        f"Error al mandar el correo a {participante.correo}"
+                        f"Error al mandar el correo a {envio.persona.correo}: {error}"
                     )
                 )
-                break
+            envio.save(
+                update_fields=["estado", "intentos", "fecha_envio", "ultimo_error"]
+            )
+
+        resumen = enviar_asincrono(
+            mensajes,
+            conexiones=options["conexiones"],
+            limites=LimitesProveedor.desde_settings(
+                por_minuto=options["por_minuto"],
+                por_conexion=options["por_conexion"],
+                por_dia=options["por_dia"],
+            ),
+            reintentos=options["reintentos"],
+            al_enviar=al_enviar,
+        )
+
+        if not resumen.fallidos and not campana.fecha_fin:
+            campana.fecha_fin = timezone.now()
+            campana.save(update_fields=["fecha_fin"])
+
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"Enviados: {resumen.enviados}. Fallidos: {resumen.fallidos}. "
+                f"{resumen.segundos:.1f} s ({resumen.por_segundo:.2f} mensajes/s)"
+            )
+        )
+        if resumen.fallidos:
             self.stdout.write(
-                self.style.SUCCESS(f"Mensaje enviado a {participante.correo}")
+                self.style.WARNING(
+                    f"Vuelve a ejecutar el comando con --campana {campana.nombre} para reintentar los fallidos"
+                )
+            )
+
+    def calcular_expiracion(self, options):
+        expiracion = options.get("expiracion")
+        if expiracion:
+            fecha_expiracion = datetime.fromisoformat(expiracion).astimezone(
+                timezone.get_current_timezone()
+            )
+        else:
+            fecha_expiracion = timezone.now() + timedelta(days=options.get("dias"))
+
+        if fecha_expiracion < timezone.now():
+            raise CommandError("La fecha de expiración es anterior a este instante")
+
+        return fecha_expiracion.replace(hour=23, minute=59, second=59, microsecond=0)
+
+    @transaction.atomic
+    def preparar_envios(self, campana, participantes):
+        """Crea los envíos de la campaña para los participantes que aún no tienen uno.
+        Reutiliza sus tokens de confirmación sin usar ni expirar y crea el resto de golpe
+        """
+        ahora = timezone.now()
+
+        sin_token = list(
+            campana.envios.exclude(estado="ENVIADO")
+            .filter(persona__in=participantes)
+            .filter(
+                Q(token__isnull=True)
+                | Q(token__fecha_expiracion__lte=ahora)
+                | Q(token__fecha_uso__isnull=False)
+            )
+        )
+        nuevos = list(participantes.exclude(envios_campana__campana=campana))
+
+        personas = [envio.persona_id for envio in sin_token] + [
+            participante.pk for participante in nuevos
+        ]
+        if not personas:
+            return
+
+        tokens = {
+            token.persona_id: token
+            for token in Token.objects.filter(
+                tipo="CONFIRMACION",
+                persona__in=personas,
+                fecha_uso__isnull=True,
+                fecha_expiracion__gt=ahora,
+            ).order_by("fecha_expiracion")
+        }
+        reutilizados = len(tokens)
+
+        creados = Token.objects.bulk_create(
+            Token(
+                tipo="CONFIRMACION",
+                persona_id=persona,
+                fecha_expiracion=campana.fecha_expiracion,
             )
+            for persona in personas
+            if persona not in tokens
+        )
+        tokens.update((token.persona_id, token) for token in creados)
+
+        for envio in sin_token:
+            envio.token = tokens[envio.persona_id]
+        EnvioCampana.objects.bulk_update(sin_token, ["token"])
+
+        EnvioCampana.objects.bulk_create(
+            EnvioCampana(
+                campana=campana,
+                persona_id=participante.pk,
+                token=tokens[participante.pk],
+            )
+            for participante in nuevos
+        )
+
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"{len(nuevos)} destinatarios nuevos. {reutilizados} tokens reutilizados, {len(creados)} creados"
+            )
+        )
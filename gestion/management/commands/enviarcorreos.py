@@ -0,0 +1,110 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import logging
+import time
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gestion.correo import construir_mensaje, marcar_enviado, marcar_fallo
+from gestion.models import Correo
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes de la cola, con reintentos y espera exponencial. "
+        "Debe ejecutarse una única instancia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--una-vez",
+            help="Vaciar la cola una vez y terminar, en lugar de quedarse esperando.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "-i",
+            "--intervalo",
+            help="Segundos de espera cuando la cola está vacía. (default=5)",
+            type=float,
+            default=5,
+        )
+        parser.add_argument(
+            "-l",
+            "--lote",
+            help="Correos enviados por cada conexión SMTP. (default=50)",
+            type=int,
+            default=50,
+        )
+        parser.add_argument(
+            "--max-intentos",
+            help="Intentos antes de descartar un correo. (default=5)",
+            type=int,
+            default=5,
+        )
+        parser.add_argument(
+            "--espera-base",
+            help="Segundos de espera tras el primer fallo, se duplica en cada intento. (default=60)",
+            type=int,
+            default=60,
+        )
+
+    def handle(self, *args, **options):
+        max_intentos = options["max_intentos"]
+        espera_base = timedelta(seconds=options["espera_base"])
+
+        while True:
+            lote = list(
+                Correo.objects.filter(
+                    estado="PENDIENTE", fecha_proximo_intento__lte=timezone.now()
+                ).order_by("fecha_proximo_intento")[: options["lote"]]
+            )
+
+            if not lote:
+                if options["una_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+                continue
+
+            enviados = self.enviar_lote(lote, max_intentos, espera_base)
+            self.stdout.write(
+                self.style.SUCCESS(f"{enviados} de {len(lote)} correos enviados")
+            )
+
+    def enviar_lote(self, lote, max_intentos, espera_base):
+        """Envía el lote por una conexión SMTP. Tras un fallo la conexión puede haber
+        quedado rota, así que se cierra y se abre otra para el siguiente correo"""
+        connection = get_connection(fail_silently=False)
+        abierta = False
+        enviados = 0
+        try:
+            for posicion, correo in enumerate(lote):
+                if not abierta:
+                    try:
+                        connection.open()
+                    except Exception as e:
+                        logger.warning(f"No se pudo abrir la conexión SMTP: {e}")
+                        for pendiente in lote[posicion:]:
+                            marcar_fallo(pendiente, e, max_intentos, espera_base)
+                        break
+                    abierta = True
+
+                try:
+                    construir_mensaje(correo, connection).send(fail_silently=False)
+                except Exception as e:
+                    marcar_fallo(correo, e, max_intentos, espera_base)
+                    connection.close()
+                    abierta = False
+                    continue
+
+                marcar_enviado(correo)
+                enviados += 1
+        finally:
+            connection.close()
+
+        return enviados
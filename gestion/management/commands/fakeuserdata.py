@@ -1,45 +1,445 @@
 # Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
 
-from datetime import date
-from random import choice, randint
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from uuid import UUID
 
-from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.text import slugify
 from faker import Faker
 
-from gestion.models import Participante
+from gestion.acreditaciones import codigo_acreditacion
+from gestion.models import (
+    CABECERA_PDF,
+    GENEROS,
+    NIVELES_ESTUDIO,
+    TALLAS_CAMISETA,
+    Mentor,
+    Participante,
+    Pase,
+    Patrocinador,
+    Persona,
+    Presencia,
+    RestriccionAlimentaria,
+    TipoPase,
+    Token,
+    ruta_cv,
+)
+
+# Reparto de los participantes por estado, parecido al de una edición real
+PESOS_ESTADO = {
+    "REGISTRADO": 10,
+    "ERROR_VERIFICACION": 2,
+    "VERIFICADO": 38,
+    "ACEPTADO": 15,
+    "CONFIRMADO": 30,
+    "RECHAZO": 5,
+}
+
+# (nombre, hora de inicio de validez) para cada día del evento
+COMIDAS = (("Desayuno", 8), ("Comida", 14), ("Cena", 21))
+
+LETRAS_DNI = "TRWAGMYFPDXBNJZSQVHLCKE"
+
+CV_FALSO = CABECERA_PDF + b"1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+def insertar(modelo, filas: list[dict]):
+    """Inserta las filas en la tabla propia del modelo con un solo executemany.
+
+    `bulk_create` no admite modelos con herencia multitabla y sobrescribe los campos
+    `auto_now_add`, así que se inserta tabla a tabla. Los campos que faltan en las
+    filas toman su valor por defecto y los AutoField los asigna la base de datos"""
+    if not filas:
+        return
+
+    campos = [
+        campo
+        for campo in modelo._meta.local_concrete_fields
+        if not (isinstance(campo, models.AutoField) and campo.attname not in filas[0])
+    ]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(modelo._meta.db_table),
+        ", ".join(connection.ops.quote_name(campo.column) for campo in campos),
+        ", ".join(["%s"] * len(campos)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            sql,
+            [
+                [
+                    campo.get_db_prep_save(
+                        (
+                            fila[campo.attname]
+                            if campo.attname in fila
+                            else campo.get_default()
+                        ),
+                        connection,
+                    )
+                    for campo in campos
+                ]
+                for fila in filas
+            ],
+        )
 
 
 class Command(BaseCommand):
-    help = "Crea datos falsos de participantes de prueba"
+    help = (
+        "Crea un evento de prueba: participantes en todos los estados, mentores, "
+        "patrocinadores, tokens, acreditaciones, pases, presencias, restricciones "
+        "alimentarias y CVs. Inserta por lotes, tabla a tabla. Pensado para una base "
+        "de datos vacía."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             "cantidad", help="Cantidad de participantes a crear", type=int, default=100
         )
+        parser.add_argument(
+            "-m",
+            "--mentores",
+            help="Mentores a crear. (default=cantidad/50)",
+            type=int,
+        )
+        parser.add_argument(
+            "-p",
+            "--patrocinadores",
+            help="Patrocinadores a crear. (default=cantidad/100)",
+            type=int,
+        )
+        parser.add_argument(
+            "-s",
+            "--semilla",
+            help="Semilla para repetir el mismo conjunto de datos. (default=aleatoria)",
+            type=int,
+        )
+        parser.add_argument(
+            "--ahora",
+            help="Instante de referencia para la caducidad de los tokens, en ISO 8601. Con --semilla, fija todos los datos. (default=ahora)",
+        )
+        parser.add_argument(
+            "-l",
+            "--lote",
+            help="Personas por transacción. (default=5000)",
+            type=int,
+            default=5000,
+        )
+        parser.add_argument(
+            "-d",
+            "--dominio",
+            help="Dominio de los correos. (default=example.com)",
+            default="example.com",
+        )
+        parser.add_argument(
+            "--sin-cv",
+            help="No crear los archivos de CV en MEDIA_ROOT.",
+            action="store_true",
+            default=False,
+        )
 
     def handle(self, *args, **options):
+        cantidad = options["cantidad"]
+        mentores = options["mentores"]
+        if mentores is None:
+            mentores = cantidad // 50
+        patrocinadores = options["patrocinadores"]
+        if patrocinadores is None:
+            patrocinadores = cantidad // 100
+
+        self.rng = random.Random(options["semilla"])
+        self.fake = Faker("es_ES")
+        self.fake.seed_instance(self.rng.getrandbits(64))
+        self.options = options
+        self.ahora = timezone.now()
+        if options["ahora"]:
+            self.ahora = datetime.fromisoformat(options["ahora"])
+            if timezone.is_naive(self.ahora):
+                self.ahora = timezone.make_aware(self.ahora)
+
         self.stdout.write(
-            self.style.SUCCESS(f"Se crearán {options['cantidad']} participantes")
-        )
-        fake = Faker("es_ES")
-
-        for _ in range(options["cantidad"]):
-            Participante(
-                correo=fake.email(),
-                nombre=fake.name(),
-                dni=fake.cif(),  # Lo más parecido a un DNI que hay en faker...
-                genero=choice(
-                    ["H", "M", "O", "-"],
-                ),
-                telefono=fake.phone_number(),
-                fecha_nacimiento=fake.date_between(
-                    date(1990, 1, 1), date(2008, 12, 31)
-                ),
-                nombre_estudio=choice(["GCED", "GEI", "MUEI", "MUNICS"]),
-                centro_estudio=choice(["FIC", "USC", "UVigo", "Otro"]),
-                curso=randint(1, 4),
-                ciudad=fake.city(),
-                quiere_creditos=choice([True, False]),
-                talla_camiseta=choice(["S", "M", "L", "XL"]),
-                compartir_cv=choice([True, False]),
-            ).save()
+            self.style.SUCCESS(
+                f"Se crearán {cantidad} participantes, {mentores} mentores y "
+                f"{patrocinadores} patrocinadores"
+            )
+        )
+        inicio = time.perf_counter()
+
+        if not RestriccionAlimentaria.objects.exists():
+            call_command("loaddata", "restriccion_alimentaria", verbosity=0)
+        self.restricciones = list(
+            RestriccionAlimentaria.objects.values_list("pk", flat=True)
+        )
+        self.tipos_pase = self.crear_tipos_pase()
+        # Continúa la numeración para no repetir correos, DNIs ni acreditaciones
+        self.siguiente = Persona.objects.count() + Patrocinador.objects.count()
+
+        tablas = {}
+        for tipo, plural, total in (
+            ("participante", "participantes", cantidad),
+            ("mentor", "mentores", mentores),
+            ("patrocinador", "patrocinadores", patrocinadores),
+        ):
+            for hecho in range(0, total, options["lote"]):
+                en_lote = min(options["lote"], total - hecho)
+                filas = self.lote(tipo, en_lote)
+                with transaction.atomic():
+                    for modelo, filas_modelo in filas.items():
+                        insertar(modelo, filas_modelo)
+                for modelo, filas_modelo in filas.items():
+                    tablas[modelo] = tablas.get(modelo, 0) + len(filas_modelo)
+                self.stdout.write(
+                    self.style.HTTP_INFO(f"{hecho + en_lote}/{total} {plural}")
+                )
+
+        duracion = time.perf_counter() - inicio
+        for modelo, filas in tablas.items():
+            self.stdout.write(f"  {modelo._meta.db_table}: {filas} filas")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{sum(tablas.values())} filas creadas en {duracion:.1f} s"
+            )
+        )
+
+    def crear_tipos_pase(self) -> list[tuple[int, datetime]]:
+        tipos = []
+        dia = timezone.localtime(settings.FECHA_INICIO_EVENTO).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        numero = 1
+        while dia < settings.FECHA_FIN_EVENTO:
+            for comida, hora in COMIDAS:
+                inicio = dia + timedelta(hours=hora)
+                if settings.FECHA_INICIO_EVENTO <= inicio < settings.FECHA_FIN_EVENTO:
+                    tipo, _ = TipoPase.objects.get_or_create(
+                        nombre=f"{comida} día {numero}",
+                        defaults={"inicio_validez": inicio},
+                    )
+                    tipos.append((tipo.pk, tipo.inicio_validez))
+            dia += timedelta(days=1)
+            numero += 1
+        return tipos
+
+    def instante(self, desde: datetime, hasta: datetime) -> datetime:
+        return desde + (hasta - desde) * self.rng.random()
+
+    def lote(self, tipo: str, cantidad: int) -> dict:
+        filas = {
+            Persona: [],
+            Participante: [],
+            Mentor: [],
+            Patrocinador: [],
+            Persona.restricciones_alimentarias.through: [],
+            Patrocinador.restricciones_alimentarias.through: [],
+            Token: [],
+            Presencia: [],
+            Pase: [],
+        }
+
+        for _ in range(cantidad):
+            n = self.siguiente
+            self.siguiente += 1
+            nombre = self.fake.name()
+            comun = {
+                "correo": f"{slugify(nombre).replace('-', '.')[:40]}.{n}@{self.options['dominio']}",
+                "nombre": nombre,
+            }
+
+            restricciones = []
+            if self.rng.random() < 0.15:
+                restricciones = self.rng.sample(
+                    self.restricciones, self.rng.choice((1, 1, 2))
+                )
+                if self.rng.random() < 0.3:
+                    comun["detalle_restricciones_alimentarias"] = "Alergia al marisco"
+
+            if tipo == "patrocinador":
+                filas[Patrocinador].append(
+                    {
+                        **comun,
+                        "acreditacion": codigo_acreditacion(n),
+                        "empresa": self.fake.company(),
+                    }
+                )
+                filas[Patrocinador.restricciones_alimentarias.through] += [
+                    {"patrocinador_id": comun["correo"], "restriccionalimentaria_id": r}
+                    for r in restricciones
+                ]
+                continue
+
+            persona = {
+                **comun,
+                "dni": f"{n % 10**8:08d}{LETRAS_DNI[n % 10**8 % 23]}",
+                "genero": self.rng.choice(GENEROS[1:])[0],
+                "talla_camiseta": self.rng.choice(TALLAS_CAMISETA[1:])[0],
+                "compartir_cv": self.rng.random() < 0.6,
+            }
+            if tipo == "participante":
+                persona.update(self.fechas_participante())
+                self.tokens(persona, filas[Token])
+            else:
+                persona["fecha_registro"] = persona["modificado"] = self.instante(
+                    settings.FECHA_FIN_REGISTRO - timedelta(days=30),
+                    settings.FECHA_INICIO_EVENTO,
+                )
+                persona["estado"] = "REGISTRADO"
+
+            # Acreditación: los mentores y casi todos los confirmados hicieron el check-in
+            if tipo == "mentor" or (
+                persona["estado"] == "CONFIRMADO" and self.rng.random() < 0.9
+            ):
+                persona["acreditacion"] = codigo_acreditacion(n)
+                self.escaneos(comun["correo"], filas[Presencia], filas[Pase])
+
+            if tipo == "participante" and not self.options["sin_cv"]:
+                persona["cv"] = self.cv(persona)
+
+            filas[Persona].append(persona)
+            filas[Persona.restricciones_alimentarias.through] += [
+                {"persona_id": comun["correo"], "restriccionalimentaria_id": r}
+                for r in restricciones
+            ]
+            if tipo == "mentor":
+                filas[Mentor].append({"persona_ptr_id": comun["correo"]})
+            else:
+                filas[Participante].append(
+                    {
+                        "persona_ptr_id": comun["correo"],
+                        "telefono": self.fake.phone_number(),
+                        "fecha_nacimiento": self.fake.date_between(
+                            date(1990, 1, 1), date(2008, 12, 31)
+                        ),
+                        "nivel_estudio": self.rng.choice(NIVELES_ESTUDIO[1:])[0],
+                        "nombre_estudio": self.rng.choice(
+                            ["GCED", "GEI", "MUEI", "MUNICS"]
+                        ),
+                        "centro_estudio": self.rng.choice(
+                            ["FIC", "USC", "UVigo", "Otro"]
+                        ),
+                        "curso": str(self.rng.randint(1, 4)),
+                        "ciudad": self.fake.city(),
+                        "quiere_creditos": self.rng.random() < 0.5,
+                        "motivacion": self.fake.paragraph(),
+                    }
+                )
+
+        return {modelo: lista for modelo, lista in filas.items() if lista}
+
+    def fechas_participante(self) -> dict:
+        fin_registro = settings.FECHA_FIN_REGISTRO
+        estado = self.rng.choices(list(PESOS_ESTADO), list(PESOS_ESTADO.values()))[0]
+        fechas = {
+            "estado": estado,
+            "fecha_registro": self.instante(
+                fin_registro - timedelta(days=60), fin_registro
+            ),
+        }
+        ultima = fechas["fecha_registro"]
+
+        if estado == "ERROR_VERIFICACION":
+            fechas["motivo_error_correo_verificacion"] = (
+                "550 5.1.1 The email account that you tried to reach does not exist"
+            )
+        elif estado != "REGISTRADO":
+            ultima = fechas["fecha_verificacion_correo"] = self.instante(
+                ultima, ultima + timedelta(days=2)
+            )
+        if estado in ("ACEPTADO", "CONFIRMADO", "RECHAZO"):
+            ultima = fechas["fecha_aceptacion"] = self.instante(
+                fin_registro, fin_registro + timedelta(days=5)
+            )
+        if estado == "CONFIRMADO":
+            ultima = fechas["fecha_confirmacion_plaza"] = self.instante(
+                ultima, ultima + timedelta(days=7)
+            )
+        if estado == "RECHAZO":
+            ultima = fechas["fecha_rechazo_plaza"] = self.instante(
+                ultima, ultima + timedelta(days=7)
+            )
+
+        fechas["modificado"] = ultima
+        return fechas
+
+    def tokens(self, persona: dict, tokens: list):
+        """Token de verificación y, a los aceptados, de confirmación. Usados, caducados
+        o válidos según el estado del participante"""
+        for tipo, creado, usado, pendiente in (
+            (
+                "VERIFICACION",
+                persona["fecha_registro"],
+                persona.get("fecha_verificacion_correo"),
+                True,
+            ),
+            (
+                "CONFIRMACION",
+                persona.get("fecha_aceptacion"),
+                persona.get("fecha_confirmacion_plaza")
+                or persona.get("fecha_rechazo_plaza"),
+                persona["estado"] == "ACEPTADO",
+            ),
+        ):
+            if creado is None or (usado is None and not pendiente):
+                continue
+
+            if usado is not None:
+                expiracion = creado + timedelta(days=7)
+            elif self.rng.random() < 0.5:
+                expiracion = self.ahora - timedelta(days=self.rng.randint(1, 30))
+            else:
+                expiracion = self.ahora + timedelta(days=self.rng.randint(1, 14))
+
+            tokens.append(
+                {
+                    "token": UUID(int=self.rng.getrandbits(128), version=4),
+                    "tipo": tipo,
+                    "persona_id": persona["correo"],
+                    "fecha_creacion": creado,
+                    "fecha_expiracion": max(expiracion, creado),
+                    "fecha_uso": usado,
+                }
+            )
+
+    def escaneos(self, correo: str, presencias: list, pases: list):
+        """Historial de entradas y salidas y pases de comida durante el evento"""
+        inicio, fin = settings.FECHA_INICIO_EVENTO, settings.FECHA_FIN_EVENTO
+        entrada = self.instante(inicio, inicio + timedelta(hours=2))
+        while entrada < fin:
+            salida = entrada + timedelta(minutes=self.rng.randint(30, 16 * 60))
+            if salida >= fin:
+                # Sigue dentro: presencia abierta
+                presencias.append({"persona_id": correo, "entrada": entrada})
+                break
+            presencias.append(
+                {"persona_id": correo, "entrada": entrada, "salida": salida}
+            )
+            entrada = salida + timedelta(minutes=self.rng.randint(10, 10 * 60))
+
+        for tipo, validez in self.tipos_pase:
+            if self.rng.random() < 0.85:
+                fecha = self.instante(validez, validez + timedelta(hours=2))
+                pases.append(
+                    {"persona_id": correo, "tipo_pase_id": tipo, "fecha": fecha}
+                )
+                # Escaneo repetido en la cola
+                if self.rng.random() < 0.02:
+                    pases.append(
+                        {
+                            "persona_id": correo,
+                            "tipo_pase_id": tipo,
+                            "fecha": fecha + timedelta(seconds=self.rng.randint(1, 30)),
+                        }
+                    )
+
+    def cv(self, persona: dict) -> str:
+        ruta = ruta_cv(SimpleNamespace(**persona), "cv.pdf")
+        destino = os.path.join(settings.MEDIA_ROOT, ruta)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, "wb") as archivo:
+            archivo.write(CV_FALSO)
+        return ruta
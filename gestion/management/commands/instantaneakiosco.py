@@ -0,0 +1,55 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import gzip
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.kioscos import construir_instantanea
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta la instantánea de las personas acreditables para cargarla en los "
+        "puestos sin conexión. Es la misma que sirve /gestion/api/instantanea."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="Archivo de salida. Si termina en .gz se comprime. (default=instantanea_kiosco.json.gz)",
+            default="instantanea_kiosco.json.gz",
+        )
+        parser.add_argument(
+            "--sin-dni",
+            help="No incluir los DNI.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--no-overwrite",
+            help="Evitar sobreescribir el archivo de salida.",
+            action="store_true",
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        archivo = options["output"]
+        if os.path.exists(archivo) and options["no_overwrite"]:
+            raise CommandError(
+                "El archivo de salida existe y se indicó --no-overwrite."
+            )
+
+        instantanea = construir_instantanea(incluir_dni=not options["sin_dni"])
+        abrir = gzip.open if archivo.endswith(".gz") else open
+        with abrir(archivo, "wt", encoding="utf-8") as salida:
+            json.dump(instantanea, salida, ensure_ascii=False, separators=(",", ":"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Instantánea {instantanea['etag']} con {len(instantanea['personas'])} "
+                f"personas exportada en {archivo} ({os.path.getsize(archivo) / 1024:.0f} KiB)"
+            )
+        )
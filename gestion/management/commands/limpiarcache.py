@@ -0,0 +1,22 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from gestion.claves_cache import (
+    PAGINAS_CACHEADAS,
+    subir_version_paginas,
+    version_paginas,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Vacía las páginas cacheadas. Necesario tras desplegar cambios en plantillas o formularios. "
+        "El resto de la caché (métricas, cupos de envío) se conserva."
+    )
+
+    def handle(self, *args, **options):
+        cache.delete_many(PAGINAS_CACHEADAS, version=version_paginas())
+        subir_version_paginas()
+        self.stdout.write(self.style.SUCCESS("Caché vaciada"))
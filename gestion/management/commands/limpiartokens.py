@@ -0,0 +1,120 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from gestion.models import TIPOS_TOKEN, Token
+from gestion.sqlite import escritura_con_reintentos
+
+ESTADOS_CONFIRMACION_VIGENTE = ("ACEPTADO", "CONFIRMADO")
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra en lotes pequeños los tokens caducados sin usar, para no bloquear la "
+        "base de datos. Se puede ejecutar desde cron durante el evento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-d",
+            "--dias",
+            help="Días desde la expiración (o el uso) antes de borrar un token. (default=7)",
+            type=int,
+            default=7,
+        )
+        parser.add_argument(
+            "--usados",
+            help="Borrar también los tokens usados hace más de --dias días. Los enlaces "
+            "de 'ver tus datos' del correo de verificación dejarán de funcionar. Los "
+            "de confirmación de plaza de los aceptados y confirmados no se borran nunca.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "-a",
+            "--archivo",
+            help="Guardar los tokens borrados en este archivo (JSON Lines, se añaden al final).",
+        )
+        parser.add_argument(
+            "-l",
+            "--lote",
+            help="Tokens borrados por transacción. (default=500)",
+            type=int,
+            default=500,
+        )
+        parser.add_argument(
+            "-p",
+            "--pausa",
+            help="Segundos de espera entre lotes, para dejar escribir a las vistas. (default=0.05)",
+            type=float,
+            default=0.05,
+        )
+        parser.add_argument(
+            "--simular",
+            help="Contar los tokens que se borrarían sin borrar nada.",
+            action="store_true",
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options["dias"])
+        condicion = Q(fecha_expiracion__lt=limite, fecha_uso__isnull=True)
+        if options["usados"]:
+            condicion |= Q(fecha_uso__lt=limite)
+        # Filtrar por tipo permite usar el índice (tipo, fecha_expiracion)
+        tokens = Token.objects.filter(
+            condicion, tipo__in=[tipo for tipo, _ in TIPOS_TOKEN]
+        ).exclude(
+            # Rechazar la plaza y buscar el QR en el alta los necesitan, aunque caduquen
+            tipo="CONFIRMACION",
+            persona__estado__in=ESTADOS_CONFIRMACION_VIGENTE,
+        )
+
+        if options["simular"]:
+            self.stdout.write(
+                self.style.HTTP_INFO(f"Se borrarían {tokens.count()} tokens")
+            )
+            return
+
+        archivo = open(options["archivo"], "a") if options["archivo"] else None
+        borrados = 0
+        try:
+            while True:
+                lote = self.borrar_lote(tokens, options["lote"])
+                if not lote:
+                    break
+
+                # Fuera de la transacción: solo se archiva lo que se ha borrado
+                if archivo:
+                    for token in lote:
+                        archivo.write(json.dumps(token, default=str) + "\n")
+                    archivo.flush()
+                borrados += len(lote)
+                time.sleep(options["pausa"])
+        finally:
+            if archivo:
+                archivo.close()
+
+        self.stdout.write(self.style.SUCCESS(f"{borrados} tokens borrados"))
+
+    @escritura_con_reintentos
+    def borrar_lote(self, tokens, tamano) -> list[dict]:
+        lote = list(
+            tokens.values(
+                "token",
+                "tipo",
+                "persona_id",
+                "fecha_creacion",
+                "fecha_expiracion",
+                "fecha_uso",
+            )[:tamano]
+        )
+        if lote:
+            Token.objects.filter(pk__in=[token["token"] for token in lote]).delete()
+        return lote
@@ -1,11 +1,18 @@
 # Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
 
-import csv, os, logging
+import csv
+import gzip
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Q
 
-from gestion.models import Participante
-
+from gestion.listmonk import ClienteListmonk, ErrorListmonk
+from gestion.models import ESTADOS_PARTICIPANTE, Participante, ParticipanteBorrado
 
 logger = logging.getLogger(__name__)
 
@@ -14,15 +21,38 @@ logger = logging.getLogger(__name__)
 # user1@mail.com,"User One","{""age"": 42, ""planet"": ""Mars""}"
 # user2@mail.com,"User Two","{""age"": 24, ""job"": ""Time Traveller""}"
 
+ATRIBUTOS_EXTRA = ("talla_camiseta",)
+
+
+@contextmanager
+def abrir_salida(archivo: str, comprimir: bool = False):
+    """Escribe en un temporal y lo renombra al terminar: un error no deja a medias el
+    archivo anterior"""
+    temporal = f"{archivo}.tmp"
+    try:
+        with (
+            gzip.open(temporal, "wt", newline="")
+            if comprimir
+            else open(temporal, "w", newline="")
+        ) as salida:
+            yield salida
+        os.replace(temporal, archivo)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
 
 class Command(BaseCommand):
-    help = "Exporta la información de los participantes en CSV para su importación en listmonk."
+    help = (
+        "Exporta la información de los participantes en CSV para su importación en "
+        "listmonk. Con --incremental solo exporta los cambios desde la ejecución anterior."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             "-o",
             "--output",
-            help="Archivo de salida",
+            help="Archivo de salida. Si termina en .gz se comprime. (default=lista_correo.csv)",
             default="lista_correo.csv",
         )
         parser.add_argument(
@@ -31,6 +61,67 @@ class Command(BaseCommand):
             action="store_true",
             default=False,
         )
+        parser.add_argument(
+            "-z",
+            "--gzip",
+            help="Comprimir la salida con gzip aunque no termine en .gz.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "-r",
+            "--restricciones",
+            help="Incluir las restricciones alimentarias en los atributos.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "-l",
+            "--lote",
+            help="Participantes leídos de la base de datos en cada consulta. (default=2000)",
+            type=int,
+            default=2000,
+        )
+        parser.add_argument(
+            "-e",
+            "--estado",
+            help="Exportar solo los participantes en este estado. Se puede repetir. (default=todos)",
+            choices=[estado for estado, _ in ESTADOS_PARTICIPANTE],
+            action="append",
+        )
+        parser.add_argument(
+            "-i",
+            "--incremental",
+            help="Exportar solo los participantes modificados desde la marca de la ejecución anterior, y las bajas.",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--marca",
+            help="Archivo con la marca de la última sincronización. (default=lista_correo.marca.json)",
+            default="lista_correo.marca.json",
+        )
+        parser.add_argument(
+            "--bajas",
+            help="CSV con los correos que dejan la lista en modo incremental. (default=lista_correo_bajas.csv)",
+            default="lista_correo_bajas.csv",
+        )
+        parser.add_argument(
+            "--enviar",
+            help="Enviar también los cambios a la API de listmonk (LISTMONK_*).",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--url",
+            help="URL de listmonk, p. ej. un servidor de pruebas local. (default=LISTMONK_URL)",
+        )
+        parser.add_argument(
+            "--lote-envio",
+            help="Suscriptores por petición a listmonk. (default=1000)",
+            type=int,
+            default=1000,
+        )
 
     def handle(self, *args, **options):
         archivo = options.get("output")
@@ -40,41 +131,215 @@ class Command(BaseCommand):
                 "El archivo de salida existe y se indicó --no-overwrite."
             )
 
-        atributos_extra = ("talla_camiseta",)
+        cliente = None
+        if options["enviar"]:
+            try:
+                cliente = ClienteListmonk.desde_settings(url=options["url"])
+            except ErrorListmonk as e:
+                raise CommandError(str(e))
 
-        participantes = Participante.objects.filter()
-        participantes_info = participantes.values("correo", "nombre", *atributos_extra)
+        estados = sorted(options["estado"] or [])
+        participantes = Participante.objects.all()
+        if estados:
+            participantes = participantes.filter(estado__in=estados)
 
-        self.stdout.write(
-            self.style.HTTP_INFO(
-                f"Encontrados {participantes.count()} participantes. Escribiendo CSV."
+        marca = self.leer_marca(options["marca"]) if options["incremental"] else {}
+        if marca and marca.get("estados") != estados:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Los estados exportados cambiaron: se exportan todos los participantes"
+                )
             )
-        )
+            marca = {**marca, "modificado": None}
 
-        try:
-            with open(archivo, "w") as csvfile:
-                writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL, quotechar='"')
-                writer.writerow(("email", "name", "attributes"))
-
-                for participante in participantes_info:
-                    correo = participante.pop("correo")
-                    nombre = participante.pop("nombre")
-                    atributos = str(participante).replace("'", '"')
+        comprimir = options["gzip"] or archivo.endswith(".gz")
+        self.stdout.write(self.style.HTTP_INFO(f"Escribiendo CSV en {archivo}"))
 
-                    writer.writerow((correo, nombre, atributos))
+        try:
+            if options["incremental"]:
+                total, marca = self.sincronizar(
+                    archivo, comprimir, marca, estados, cliente, options
+                )
+                with abrir_salida(options["marca"]) as salida:
+                    json.dump(marca, salida)
+            else:
+                with abrir_salida(archivo, comprimir) as csvfile:
+                    total = self.escribir(
+                        csvfile, participantes.order_by("pk"), cliente, options
+                    )
 
+        except ErrorListmonk as e:
+            raise CommandError(f"Error al enviar los cambios a listmonk: {e}")
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR("Error encontrado mientras se escribía el CSV!")
             )
             raise e
 
-        logger.info(
-            f"CSV para listmonk exportado con {participantes.count()} participantes"
+        logger.info(f"CSV para listmonk exportado con {total} participantes")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"CSV exportado con {total} participantes!")
+        )
+
+    def leer_marca(self, archivo: str) -> dict:
+        if not os.path.exists(archivo):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"No existe {archivo}: se exportan todos los participantes"
+                )
+            )
+            return {}
+
+        with open(archivo) as entrada:
+            return json.load(entrada)
+
+    def escribir(self, csvfile, participantes, cliente, options, bajas=None) -> int:
+        """Escribe el CSV leyendo los participantes por lotes y, con `cliente`, los
+        importa en listmonk. Devuelve cuántos escribió.
+
+        Con `bajas`, los participantes que no están en los estados exportados se
+        dan de baja en lugar de escribirse"""
+        participantes = participantes.only(
+            "correo", "nombre", "estado", "modificado", *ATRIBUTOS_EXTRA
         )
+        if options["restricciones"]:
+            # Una consulta por lote, no una por participante
+            participantes = participantes.prefetch_related("restricciones_alimentarias")
+        estados = set(options["estado"] or [])
+
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL, quotechar='"')
+        writer.writerow(("email", "name", "attributes"))
+
+        total = 0
+        envio = []
+        self.ultimo = None
+        for participante in participantes.iterator(chunk_size=options["lote"]):
+            self.ultimo = participante
+            if estados and participante.estado not in estados:
+                if bajas is not None:
+                    bajas.anadir(participante.correo, "baja")
+                continue
+
+            atributos = {
+                atributo: getattr(participante, atributo)
+                for atributo in ATRIBUTOS_EXTRA
+            }
+            if options["restricciones"]:
+                atributos["restricciones_alimentarias"] = [
+                    restriccion.nombre
+                    for restriccion in participante.restricciones_alimentarias.all()
+                ]
+
+            fila = (
+                participante.correo,
+                participante.nombre,
+                json.dumps(atributos, ensure_ascii=False),
+            )
+            writer.writerow(fila)
+            total += 1
+
+            if cliente:
+                envio.append(fila)
+                if len(envio) >= options["lote_envio"]:
+                    cliente.importar(envio)
+                    envio = []
+
+        if cliente and envio:
+            cliente.importar(envio)
+
+        return total
+
+    def sincronizar(self, archivo, comprimir, marca, estados, cliente, options):
+        """Exporta los participantes modificados desde la marca, en orden de
+        modificación, y escribe (y envía) las bajas: los modificados que ya no están
+        en los estados exportados y los borrados. Lo que ya tenga listmonk se
+        actualiza al importarlo de nuevo.
+
+        La marca es el (modificado, correo) del último participante leído y el último
+        `ParticipanteBorrado`, así que no crece con la lista. Devuelve el total
+        exportado y la nueva marca"""
+        cambiados = Participante.objects.order_by("modificado", "pk")
+        if marca.get("modificado"):
+            modificado = datetime.fromisoformat(marca["modificado"])
+            cambiados = cambiados.filter(
+                Q(modificado__gt=modificado)
+                | Q(modificado=modificado, pk__gt=marca["correo"])
+            )
+
+        borrados = ParticipanteBorrado.objects.filter(pk__gt=marca.get("borrado", 0))
+        ultimo_borrado = borrados.aggregate(ultimo=Max("pk"))["ultimo"]
+
+        with (
+            abrir_salida(archivo, comprimir) as csvfile,
+            abrir_salida(options["bajas"]) as bajasfile,
+        ):
+            # En la primera sincronización no se había exportado a nadie
+            bajas = Bajas(bajasfile, cliente, options["lote_envio"])
+            total = self.escribir(
+                csvfile, cambiados, cliente, options, bajas if marca else None
+            )
+
+            if marca and ultimo_borrado:
+                # Si se volvió a registrar con el mismo correo no se borra
+                correos = (
+                    borrados.filter(pk__lte=ultimo_borrado)
+                    .exclude(correo__in=Participante.objects.values("pk"))
+                    .order_by("pk")
+                    .values_list("correo", flat=True)
+                )
+                for correo in correos.iterator(chunk_size=options["lote"]):
+                    bajas.anadir(correo, "borrar")
+            bajas.terminar()
 
         self.stdout.write(
-            self.style.SUCCESS(
-                f"CSV exportado con {participantes.count()} participantes!"
+            self.style.HTTP_INFO(
+                f"{bajas.totales['baja']} bajas y {bajas.totales['borrar']} borrados "
+                f"escritos en {options['bajas']}"
             )
         )
+
+        ultimo = self.ultimo
+        return total, {
+            "modificado": (
+                ultimo.modificado.isoformat() if ultimo else marca.get("modificado")
+            ),
+            "correo": ultimo.correo if ultimo else marca.get("correo"),
+            "borrado": ultimo_borrado or marca.get("borrado", 0),
+            "estados": estados,
+        }
+
+
+class Bajas:
+    """Escribe en el CSV de bajas los correos que salen de la lista y, con `cliente`,
+    los da de baja o los borra en listmonk por lotes"""
+
+    def __init__(self, csvfile, cliente: ClienteListmonk | None, lote: int):
+        self.writer = csv.writer(csvfile)
+        self.writer.writerow(("email", "accion"))
+        self.cliente = cliente
+        self.lote = lote
+        self.pendientes = {"baja": [], "borrar": []}
+        self.totales = {"baja": 0, "borrar": 0}
+
+    def anadir(self, correo: str, accion: str):
+        self.writer.writerow((correo, accion))
+        self.totales[accion] += 1
+        if self.cliente:
+            self.pendientes[accion].append(correo)
+            if len(self.pendientes[accion]) >= self.lote:
+                self.enviar(accion)
+
+    def enviar(self, accion: str):
+        correos, self.pendientes[accion] = self.pendientes[accion], []
+        if not correos:
+            return
+        if accion == "baja":
+            self.cliente.dar_de_baja(correos)
+        else:
+            self.cliente.borrar(correos)
+
+    def terminar(self):
+        if self.cliente:
+            self.enviar("baja")
+            self.enviar("borrar")
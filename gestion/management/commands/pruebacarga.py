@@ -0,0 +1,332 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import http.cookiejar
+import os
+import re
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from random import choice, randint
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gestion.models import Participante, Persona, Token
+from gestion.smtp_local import ServidorSMTPLocal
+from gestion.sqlite import METRICA_FALLOS, METRICA_REINTENTOS
+
+DOMINIO_PRUEBA = "carga.invalid"
+
+# PDF mínimo válido para el campo CV
+PDF_SINTETICO = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+RE_CSRF = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Cliente:
+    """Navegador mínimo con cookies propias, como un visitante independiente"""
+
+    def __init__(self, base: str, host: str):
+        self.base = base.rstrip("/")
+        self.host = host
+        # IP propia para LimiteTasaMiddleware, como si llegase a través del proxy
+        self.ip = f"10.{randint(0, 255)}.{randint(0, 255)}.{randint(1, 254)}"
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones()
+        )
+
+    def csrf(self) -> str:
+        return next(
+            (cookie.value for cookie in self.cookies if cookie.name == "csrftoken"), ""
+        )
+
+    def peticion(self, ruta: str, datos: bytes | None = None, cabeceras=None):
+        """Devuelve (segundos, código de estado, cuerpo)"""
+        cabeceras = {
+            "Host": self.host,
+            "X-Forwarded-For": self.ip,
+            **(cabeceras or {}),
+        }
+        if datos is not None:
+            cabeceras["X-CSRFToken"] = self.csrf()
+            cabeceras["Referer"] = f"{self.base}{ruta}"
+
+        peticion = urllib.request.Request(
+            f"{self.base}{ruta}", data=datos, headers=cabeceras
+        )
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(peticion, timeout=60) as respuesta:
+                cuerpo = respuesta.read()
+                estado = respuesta.status
+        except urllib.error.HTTPError as e:
+            cuerpo = e.read()
+            estado = e.code
+        except OSError:
+            cuerpo = b""
+            estado = 0
+        return time.perf_counter() - inicio, estado, cuerpo
+
+
+def multipart(campos: dict, archivos: dict) -> tuple[bytes, str]:
+    limite = uuid4().hex
+    partes = []
+    for nombre, valor in campos.items():
+        partes.append(
+            f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"\r\n\r\n{valor}\r\n'.encode()
+        )
+    for nombre, (archivo, contenido, tipo) in archivos.items():
+        partes.append(
+            f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"; filename="{archivo}"\r\n'
+            f"Content-Type: {tipo}\r\n\r\n".encode() + contenido + b"\r\n"
+        )
+    partes.append(f"--{limite}--\r\n".encode())
+    return b"".join(partes), f"multipart/form-data; boundary={limite}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga contra un servidor local: registros con CV, verificación de "
+        "correo y confirmación de plaza simultáneos. Usa la misma base de datos que el "
+        "servidor para obtener los tokens."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-u",
+            "--url",
+            help="URL base del servidor. (default=http://127.0.0.1:8000)",
+            default="http://127.0.0.1:8000",
+        )
+        parser.add_argument(
+            "-n",
+            "--participantes",
+            help="Participantes sintéticos a registrar. (default=200)",
+            type=int,
+            default=200,
+        )
+        parser.add_argument(
+            "-c",
+            "--concurrencia",
+            help="Clientes simultáneos. (default=20)",
+            type=int,
+            default=20,
+        )
+        parser.add_argument(
+            "--smtp-puerto",
+            help="Levanta un servidor SMTP local que descarta los correos en este puerto. "
+            "El servidor y `enviarcorreos` deben arrancarse con EMAIL_HOST=127.0.0.1, "
+            "EMAIL_PORT=<puerto> y EMAIL_USE_SSL=False.",
+            type=int,
+        )
+        parser.add_argument(
+            "--log",
+            help="Log de avisos del servidor donde contar los 'database is locked'. (default=log/warning.log)",
+            default=os.path.join(settings.LOGFILE_NAME, "warning.log"),
+        )
+        parser.add_argument(
+            "--mantener",
+            help="No borrar los participantes sintéticos al terminar.",
+            action="store_true",
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        if timezone.now() > settings.FECHA_FIN_REGISTRO:
+            raise CommandError("El registro está cerrado (FECHA_FIN_REGISTRO)")
+
+        self.url = options["url"]
+        self.concurrencia = options["concurrencia"]
+        self.ejecucion = uuid4().hex[:6]
+
+        smtp = None
+        if options["smtp_puerto"]:
+            smtp = ServidorSMTPLocal(puerto=options["smtp_puerto"])
+            smtp.iniciar()
+
+        inicio_log = self.tamano_log(options["log"])
+        inicio_metricas = self.metricas()
+        try:
+            resultados = {
+                "registro": self.fase(self.registrar, range(options["participantes"])),
+            }
+            tokens = Token.objects.filter(
+                tipo="VERIFICACION",
+                persona__correo__endswith=f"-{self.ejecucion}@{DOMINIO_PRUEBA}",
+            ).values_list("token", flat=True)
+            resultados["verificar_correo"] = self.fase(self.verificar, list(tokens))
+            resultados["confirmar_plaza"] = self.fase(
+                self.confirmar, self.crear_tokens_confirmacion()
+            )
+        finally:
+            if smtp:
+                smtp.parar()
+            if not options["mantener"]:
+                self.limpiar()
+
+        bloqueos = self.contar_bloqueos(options["log"], inicio_log)
+        reintentos, fallos = (
+            fin - inicio for fin, inicio in zip(self.metricas(), inicio_metricas)
+        )
+        self.informe(resultados, bloqueos, smtp)
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"Escrituras con reintentos: {reintentos} reintentos, {fallos} fallos"
+            )
+        )
+
+    def fase(self, funcion, elementos):
+        """Ejecuta `funcion` para cada elemento con `concurrencia` clientes.
+        Cada llamada devuelve una lista de (segundos, estado)"""
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrencia) as executor:
+            medidas = [m for lista in executor.map(funcion, elementos) for m in lista]
+        return medidas, time.perf_counter() - inicio
+
+    def cliente(self):
+        return Cliente(self.url, settings.HOST_REGISTRO)
+
+    def registrar(self, n):
+        cliente = self.cliente()
+        medidas = [cliente.peticion("/")[:2]]
+
+        cuerpo, tipo = multipart(
+            {
+                "nombre": f"Participante Carga {n}",
+                "dni": f"{randint(0, 99999999):08d}{choice('TRWAGMYFPDXBNJZSQVHLCKE')}",
+                "correo": f"carga-{n}-{self.ejecucion}@{DOMINIO_PRUEBA}",
+                "telefono": f"6{randint(0, 99999999):08d}",
+                "fecha_nacimiento": "2001-01-01",
+                "genero": choice(["H", "M", "O", "-"]),
+                "talla_camiseta": choice(["S", "M", "L", "XL"]),
+                "ciudad": "A Coruña",
+                "nivel_estudio": "UNIVERSIDAD",
+                "centro_estudio": "FIC",
+                "nombre_estudio": "GEI",
+                "curso": "3",
+                "motivacion": "Prueba de carga",
+                "acepta_terminos": "on",
+                "csrfmiddlewaretoken": cliente.csrf(),
+            },
+            {"cv": ("cv.pdf", PDF_SINTETICO, "application/pdf")},
+        )
+        medidas.append(
+            cliente.peticion("/", cuerpo, {"Content-Type": tipo})[:2],
+        )
+        return medidas
+
+    def verificar(self, token):
+        return [self.cliente().peticion(f"/verificar/{token}")[:2]]
+
+    def confirmar(self, token):
+        cliente = self.cliente()
+        segundos, estado, cuerpo = cliente.peticion(f"/confirmar/{token}")
+        medidas = [(segundos, estado)]
+
+        csrf = RE_CSRF.search(cuerpo)
+        datos = f"csrfmiddlewaretoken={csrf.group(1).decode() if csrf else ''}"
+        medidas.append(
+            cliente.peticion(
+                f"/confirmar/{token}/aceptar",
+                datos.encode(),
+                {"Content-Type": "application/x-www-form-urlencoded"},
+            )[:2]
+        )
+        return medidas
+
+    def crear_tokens_confirmacion(self):
+        # Se leen antes de actualizarlos: después ya no están VERIFICADOS
+        verificados = list(
+            Participante.objects.filter(
+                correo__endswith=f"-{self.ejecucion}@{DOMINIO_PRUEBA}",
+                estado="VERIFICADO",
+            ).values_list("pk", flat=True)
+        )
+        ahora = timezone.now()
+        Participante.objects.filter(pk__in=verificados).update(
+            fecha_aceptacion=ahora, estado="ACEPTADO", modificado=ahora
+        )
+        tokens = Token.objects.bulk_create(
+            Token(
+                tipo="CONFIRMACION",
+                persona_id=persona,
+                fecha_expiracion=timezone.now() + timedelta(days=1),
+            )
+            for persona in verificados
+        )
+        return [token.token for token in tokens]
+
+    def limpiar(self):
+        personas = Persona.objects.filter(
+            correo__endswith=f"-{self.ejecucion}@{DOMINIO_PRUEBA}"
+        )
+        for persona in personas.exclude(cv=""):
+            persona.cv.delete(save=False)
+        personas.delete()
+
+    def metricas(self):
+        return (cache.get(METRICA_REINTENTOS, 0), cache.get(METRICA_FALLOS, 0))
+
+    def tamano_log(self, ruta):
+        return os.path.getsize(ruta) if os.path.exists(ruta) else 0
+
+    def contar_bloqueos(self, ruta, desde):
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, "rb") as log:
+            log.seek(desde)
+            return log.read().count(b"database is locked")
+
+    def informe(self, resultados, bloqueos, smtp):
+        for fase, (medidas, duracion) in resultados.items():
+            if not medidas:
+                self.stdout.write(self.style.WARNING(f"{fase}: sin peticiones"))
+                continue
+
+            tiempos = sorted(segundos * 1000 for segundos, _ in medidas)
+            errores = sum(1 for _, estado in medidas if estado == 0 or estado >= 400)
+            percentiles = (
+                statistics.quantiles(tiempos, n=100, method="inclusive")
+                if len(tiempos) > 1
+                else tiempos * 99
+            )
+
+            self.stdout.write(
+                self.style.HTTP_INFO(
+                    f"{fase}: {len(medidas)} peticiones en {duracion:.1f} s "
+                    f"({len(medidas) / duracion:.1f} pet/s). "
+                    f"p50={percentiles[49]:.0f} ms p95={percentiles[94]:.0f} ms "
+                    f"p99={percentiles[98]:.0f} ms max={tiempos[-1]:.0f} ms. "
+                    f"Errores: {errores} ({errores / len(medidas):.1%})"
+                )
+            )
+
+        if bloqueos is None:
+            self.stdout.write(
+                self.style.WARNING("No se encontró el log para contar los bloqueos")
+            )
+        else:
+            estilo = self.style.ERROR if bloqueos else self.style.SUCCESS
+            self.stdout.write(estilo(f"'database is locked': {bloqueos}"))
+
+        if smtp:
+            self.stdout.write(
+                self.style.HTTP_INFO(
+                    f"SMTP local: {smtp.recibidos} correos recibidos ({smtp.bytes_recibidos / 1024:.0f} KiB)"
+                )
+            )
@@ -0,0 +1,199 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import mailbox
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from faker import Faker
+
+from gestion.correo import crear_mensaje
+from gestion.models import ESTADOS_PARTICIPANTE, Participante, Token
+from gestion.tokens import firmar_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los correos de una campaña en un Maildir o mbox local, sin servidor SMTP "
+        "ni escribir en la base de datos. Mide el tiempo de renderizado y el tamaño de "
+        "los mensajes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "destino",
+            help="Ruta del Maildir (directorio) o del mbox (archivo) donde guardar los correos.",
+        )
+        parser.add_argument(
+            "-f",
+            "--formato",
+            help="Formato del buzón. (default=maildir)",
+            choices=["maildir", "mbox"],
+            default="maildir",
+        )
+        parser.add_argument(
+            "-p",
+            "--plantilla",
+            help="Plantilla del correo, sin extensión. (default=correo/confirmacion_plaza)",
+            default="correo/confirmacion_plaza",
+        )
+        parser.add_argument(
+            "-a",
+            "--asunto",
+            help="Asunto del correo. (default=EMAIL_CONFIRMACION_ASUNTO)",
+            default=settings.EMAIL_CONFIRMACION_ASUNTO,
+        )
+        parser.add_argument(
+            "-e",
+            "--estado",
+            help="Estado de los participantes destinatarios. (default=ACEPTADO)",
+            choices=[estado for estado, _ in ESTADOS_PARTICIPANTE],
+            default="ACEPTADO",
+        )
+        parser.add_argument(
+            "-s",
+            "--sinteticos",
+            help="Usar N destinatarios inventados en lugar de los participantes.",
+            type=int,
+        )
+        parser.add_argument(
+            "--hilos",
+            help="Hilos renderizando los correos. (default=4)",
+            type=int,
+            default=4,
+        )
+        parser.add_argument(
+            "--max-ms",
+            help="Avisar de los correos que tarden más en renderizarse. (default=50)",
+            type=float,
+            default=50,
+        )
+        parser.add_argument(
+            "--max-kb",
+            help="Avisar de los correos más grandes. Gmail recorta los mensajes de más de 102 KB. (default=100)",
+            type=float,
+            default=100,
+        )
+
+    def handle(self, *args, **options):
+        destinatarios = self.destinatarios(options)
+        if not destinatarios:
+            raise CommandError("No hay destinatarios")
+
+        if options["formato"] == "maildir":
+            buzon = mailbox.Maildir(options["destino"], create=True)
+        else:
+            if os.path.isdir(options["destino"]):
+                raise CommandError("El destino de un mbox debe ser un archivo")
+            buzon = mailbox.mbox(options["destino"], create=True)
+
+        expiracion = (timezone.now() + timedelta(days=14)).replace(
+            hour=23, minute=59, second=59, microsecond=0
+        )
+
+        def renderizar(destinatario):
+            nombre, correo = destinatario
+            # Token sin guardar: solo se necesita para el enlace
+            token = Token(tipo="CONFIRMACION", fecha_expiracion=expiracion)
+            inicio = time.perf_counter()
+            mensaje = crear_mensaje(
+                options["asunto"],
+                options["plantilla"],
+                {
+                    "nombre": nombre,
+                    "token": firmar_token(token),
+                    "expiracion": expiracion,
+                    "host": settings.HOST_REGISTRO,
+                    "asunto": options["asunto"],
+                },
+                correo,
+            )
+            datos = mensaje.message().as_bytes()
+            return correo, time.perf_counter() - inicio, datos
+
+        inicio = time.perf_counter()
+        tiempos, tamanos = [], []
+        lentos, grandes = [], []
+        buzon.lock()
+        try:
+            with ThreadPoolExecutor(max_workers=options["hilos"]) as executor:
+                for correo, segundos, datos in executor.map(renderizar, destinatarios):
+                    buzon.add(datos)
+                    tiempos.append(segundos * 1000)
+                    tamanos.append(len(datos))
+                    if segundos * 1000 > options["max_ms"]:
+                        lentos.append(correo)
+                    if len(datos) / 1024 > options["max_kb"]:
+                        grandes.append(correo)
+        finally:
+            buzon.flush()
+            buzon.unlock()
+            buzon.close()
+        duracion = time.perf_counter() - inicio
+
+        self.informe(options, tiempos, tamanos, duracion, lentos, grandes)
+
+    def destinatarios(self, options) -> list[tuple[str, str]]:
+        if options["sinteticos"]:
+            fake = Faker("es_ES")
+            return [
+                (fake.name(), f"simulacion-{n}@example.invalid")
+                for n in range(options["sinteticos"])
+            ]
+
+        return list(
+            Participante.objects.filter(estado=options["estado"]).values_list(
+                "nombre", "correo"
+            )
+        )
+
+    def informe(self, options, tiempos, tamanos, duracion, lentos, grandes):
+        percentiles = (
+            statistics.quantiles(tiempos, n=100, method="inclusive")
+            if len(tiempos) > 1
+            else tiempos * 99
+        )
+        total = sum(tamanos)
+
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"{len(tiempos)} correos en {options['destino']} ({options['formato']}) en "
+                f"{duracion:.2f} s ({len(tiempos) / duracion:.0f} correos/s)"
+            )
+        )
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"Renderizado: p50={percentiles[49]:.2f} ms p95={percentiles[94]:.2f} ms "
+                f"max={max(tiempos):.2f} ms"
+            )
+        )
+        self.stdout.write(
+            self.style.HTTP_INFO(
+                f"Tamaño: {total / 1024:.0f} KiB en total, {total / len(tamanos) / 1024:.1f} KiB "
+                f"de media, {max(tamanos) / 1024:.1f} KiB el mayor"
+            )
+        )
+
+        if lentos:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(lentos)} correos tardaron más de {options['max_ms']} ms en renderizarse "
+                    f"(p. ej. {lentos[0]})"
+                )
+            )
+        if grandes:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{len(grandes)} correos ocupan más de {options['max_kb']} KB "
+                    f"(p. ej. {grandes[0]})"
+                )
+            )
+        if not lentos and not grandes:
+            self.stdout.write(
+                self.style.SUCCESS("Sin correos lentos ni demasiado grandes")
+            )
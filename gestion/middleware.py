@@ -0,0 +1,96 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+
+class LimiteTasaMiddleware:
+    """Limita las peticiones por IP a las vistas de `LIMITES_TASA`.
+
+    Las claves son nombres de URL, opcionalmente con el método (`"registro:POST"`
+    tiene prioridad sobre `"registro"`), y los valores `(peticiones, segundos)`.
+    Usa una ventana deslizante aproximada: el contador de la ventana actual más la
+    parte proporcional de la anterior, guardados en la caché `LIMITES_TASA_CACHE`
+    para que el límite sea común a todos los workers.
+
+    Las IPs de `LIMITES_TASA_EXENTAS` (NAT compartidas por muchos participantes)
+    no se limitan.
+
+    Va antes de las sesiones: una petición rechazada no toca la base de datos.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        limite = self.limite(request)
+        if limite:
+            clave, peticiones, segundos = limite
+            espera = self.registrar(clave, peticiones, segundos)
+            if espera:
+                logger.warning(f"Límite de peticiones superado: {clave}")
+                respuesta = HttpResponse(
+                    "Demasiadas peticiones. Inténtalo de nuevo en unos minutos.",
+                    status=429,
+                    content_type="text/plain; charset=utf-8",
+                )
+                respuesta["Retry-After"] = str(espera)
+                return respuesta
+
+        return self.get_response(request)
+
+    def limite(self, request: HttpRequest):
+        """Devuelve (clave, peticiones, segundos) o None si la vista no tiene límite"""
+        try:
+            vista = resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+
+        ip = ip_cliente(request)
+        if ip in settings.LIMITES_TASA_EXENTAS:
+            return None
+
+        for nombre in (f"{vista}:{request.method}", vista):
+            if nombre in settings.LIMITES_TASA:
+                peticiones, segundos = settings.LIMITES_TASA[nombre]
+                return f"limite:{nombre}:{ip}", peticiones, segundos
+        return None
+
+    def registrar(self, clave: str, peticiones: int, segundos: int) -> int:
+        """Cuenta la petición. Devuelve los segundos a esperar si supera el límite, o 0"""
+        cache = caches[settings.LIMITES_TASA_CACHE]
+        ahora = time.time()
+        ventana, transcurrido = divmod(ahora, segundos)
+
+        actual = f"{clave}:{ventana:.0f}"
+        anteriores = cache.get(f"{clave}:{ventana - 1:.0f}", 0)
+        cache.add(actual, 0, timeout=2 * segundos)
+        try:
+            total = cache.incr(actual)
+        except ValueError:
+            # Caducó entre add e incr
+            total = 1
+
+        estimado = anteriores * (1 - transcurrido / segundos) + total
+        if estimado <= peticiones:
+            return 0
+        return math.ceil(segundos - transcurrido)
+
+
+def ip_cliente(request: HttpRequest) -> str:
+    """IP del cliente. Detrás de uno de los `LIMITES_TASA_PROXIES` se usa la última
+    entrada de X-Forwarded-For, la que añade el propio proxy"""
+    ip = request.META.get("REMOTE_ADDR", "")
+    if ip in settings.LIMITES_TASA_PROXIES:
+        reenviada = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        if reenviada:
+            ip = reenviada.rsplit(",", 1)[-1].strip()
+    return ip
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0002_sqlite_pragmas"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="patrocinador",
+            name="nombre",
+            field=models.CharField(max_length=100, verbose_name="Nombre completo"),
+        ),
+        migrations.AlterField(
+            model_name="persona",
+            name="nombre",
+            field=models.CharField(max_length=100, verbose_name="Nombre completo"),
+        ),
+        migrations.AlterField(
+            model_name="persona",
+            name="talla_camiseta",
+            field=models.CharField(
+                choices=[
+                    (None, ""),
+                    ("S", "S"),
+                    ("M", "M"),
+                    ("L", "L"),
+                    ("XL", "XL"),
+                    ("2XL", "2XL"),
+                    ("3XL", "3XL"),
+                ],
+                max_length=10,
+                verbose_name="Talla de la camiseta",
+            ),
+        ),
+        migrations.CreateModel(
+            name="Correo",
+            fields=[
+                ("id_correo", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("VERIFICACION", "Verificación correo"),
+                            ("VERIFICACION_CORRECTA", "Correo verificado"),
+                            ("CONFIRMACION", "Confirmación plaza"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("destinatario", models.EmailField(max_length=254)),
+                ("asunto", models.CharField(max_length=255)),
+                ("cuerpo_texto", models.TextField(verbose_name="Cuerpo (texto)")),
+                (
+                    "cuerpo_html",
+                    models.TextField(
+                        blank=True, null=True, verbose_name="Cuerpo (HTML)"
+                    ),
+                ),
+                ("cabeceras", models.JSONField(blank=True, default=dict)),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente"),
+                            ("ENVIADO", "Enviado"),
+                            ("ERROR", "Error"),
+                        ],
+                        default="PENDIENTE",
+                        max_length=16,
+                    ),
+                ),
+                ("intentos", models.PositiveIntegerField(default=0)),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de creación"
+                    ),
+                ),
+                (
+                    "fecha_proximo_intento",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Fecha del próximo intento",
+                    ),
+                ),
+                (
+                    "fecha_envio",
+                    models.DateTimeField(
+                        blank=True,
+                        default=None,
+                        null=True,
+                        verbose_name="Fecha de envío",
+                    ),
+                ),
+                (
+                    "ultimo_error",
+                    models.TextField(
+                        blank=True,
+                        default=None,
+                        max_length=4096,
+                        null=True,
+                        verbose_name="Último error",
+                    ),
+                ),
+                (
+                    "persona",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="correos",
+                        to="gestion.persona",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Correo",
+                "verbose_name_plural": "Correos",
+                "ordering": ["fecha_creacion"],
+                "indexes": [
+                    models.Index(
+                        fields=["estado", "fecha_proximo_intento"],
+                        name="gestion_cor_estado_19938e_idx",
+                    )
+                ],
+            },
+        ),
+    ]
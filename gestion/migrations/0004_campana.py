@@ -0,0 +1,127 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0003_correo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Campana",
+            fields=[
+                ("id_campana", models.AutoField(primary_key=True, serialize=False)),
+                ("nombre", models.CharField(max_length=100, unique=True)),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("VERIFICACION", "Verificación correo"),
+                            ("VERIFICACION_CORRECTA", "Correo verificado"),
+                            ("CONFIRMACION", "Confirmación plaza"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de creación"
+                    ),
+                ),
+                (
+                    "fecha_expiracion",
+                    models.DateTimeField(
+                        verbose_name="Fecha de expiración de los tokens"
+                    ),
+                ),
+                (
+                    "fecha_fin",
+                    models.DateTimeField(
+                        blank=True,
+                        default=None,
+                        null=True,
+                        verbose_name="Fecha de finalización",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Campaña",
+                "verbose_name_plural": "Campañas",
+                "ordering": ["-fecha_creacion"],
+            },
+        ),
+        migrations.CreateModel(
+            name="EnvioCampana",
+            fields=[
+                ("id_envio", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente"),
+                            ("ENVIADO", "Enviado"),
+                            ("ERROR", "Error"),
+                        ],
+                        default="PENDIENTE",
+                        max_length=16,
+                    ),
+                ),
+                ("intentos", models.PositiveIntegerField(default=0)),
+                (
+                    "fecha_envio",
+                    models.DateTimeField(
+                        blank=True,
+                        default=None,
+                        null=True,
+                        verbose_name="Fecha de envío",
+                    ),
+                ),
+                (
+                    "ultimo_error",
+                    models.TextField(
+                        blank=True,
+                        default=None,
+                        max_length=4096,
+                        null=True,
+                        verbose_name="Último error",
+                    ),
+                ),
+                (
+                    "campana",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="envios",
+                        to="gestion.campana",
+                    ),
+                ),
+                (
+                    "persona",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="envios_campana",
+                        to="gestion.persona",
+                    ),
+                ),
+                (
+                    "token",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="envios_campana",
+                        to="gestion.token",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Envío de campaña",
+                "verbose_name_plural": "Envíos de campaña",
+                "unique_together": {("campana", "persona")},
+            },
+        ),
+    ]
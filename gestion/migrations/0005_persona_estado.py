@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+def rellenar_estado(apps, schema_editor):
+    """Calcula el estado de las personas existentes a partir de sus fechas. Cada paso
+    sobrescribe al anterior, igual que `Persona.calcular_estado`"""
+    Persona = apps.get_model("gestion", "Persona")
+
+    Persona.objects.filter(
+        motivo_error_correo_verificacion__isnull=False,
+        fecha_verificacion_correo__isnull=True,
+    ).update(estado="ERROR_VERIFICACION")
+    Persona.objects.filter(fecha_verificacion_correo__isnull=False).update(
+        estado="VERIFICADO"
+    )
+    Persona.objects.filter(fecha_aceptacion__isnull=False).update(estado="ACEPTADO")
+    Persona.objects.filter(fecha_confirmacion_plaza__isnull=False).update(
+        estado="CONFIRMADO"
+    )
+    Persona.objects.filter(fecha_rechazo_plaza__isnull=False).update(estado="RECHAZO")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0004_campana"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="persona",
+            name="estado",
+            field=models.CharField(
+                choices=[
+                    ("REGISTRADO", "Registrado (sin verificar correo)"),
+                    ("ERROR_VERIFICACION", "Error de verificación del correo"),
+                    ("VERIFICADO", "Correo verificado"),
+                    ("ACEPTADO", "Aceptado"),
+                    ("CONFIRMADO", "Plaza confirmada"),
+                    ("RECHAZO", "Plaza rechazada"),
+                ],
+                db_index=True,
+                default="REGISTRADO",
+                max_length=20,
+                verbose_name="Estado",
+            ),
+        ),
+        migrations.RunPython(rellenar_estado, migrations.RunPython.noop),
+    ]
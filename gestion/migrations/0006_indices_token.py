@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0005_persona_estado"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="token",
+            index=models.Index(
+                fields=["tipo", "persona"], name="gestion_tok_tipo_75874c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="token",
+            index=models.Index(
+                fields=["tipo", "fecha_expiracion"], name="gestion_tok_tipo_0b8a47_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0006_indices_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="persona",
+            name="modificado",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Última modificación",
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0007_persona_modificado"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParticipanteBorrado",
+            fields=[
+                ("id_borrado", models.AutoField(primary_key=True, serialize=False)),
+                ("correo", models.EmailField(max_length=254)),
+                (
+                    "fecha",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de borrado"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Participante borrado",
+                "verbose_name_plural": "Participantes borrados",
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:40
+
+import re
+
+from django.db import migrations
+
+
+def normalizar_dnis(apps, schema_editor):
+    """Normaliza los DNI guardados antes de que el formulario lo hiciera, igual que
+    `gestion.models.normalizar_dni`. Si el DNI normalizado ya lo tiene otra persona
+    (registros duplicados) se deja como estaba"""
+    Persona = apps.get_model("gestion", "Persona")
+
+    existentes = set(Persona.objects.values_list("dni", flat=True))
+    for correo, dni in list(Persona.objects.values_list("correo", "dni")):
+        normalizado = re.sub(r"[\s.-]", "", dni).upper()
+        if normalizado == dni or normalizado in existentes:
+            continue
+        Persona.objects.filter(pk=correo).update(dni=normalizado)
+        existentes.discard(dni)
+        existentes.add(normalizado)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0008_participanteborrado"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_dnis, migrations.RunPython.noop),
+    ]
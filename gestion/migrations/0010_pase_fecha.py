@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0009_normalizar_dni"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="pase",
+            name="fecha",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion", "0010_pase_fecha"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CodigoAcreditacion",
+            fields=[
+                (
+                    "codigo",
+                    models.CharField(
+                        max_length=8,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Código",
+                    ),
+                ),
+                ("lote", models.CharField(db_index=True, max_length=100)),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de registro"
+                    ),
+                ),
+                (
+                    "fecha_asignacion",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Fecha de entrega"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Código de acreditación",
+                "verbose_name_plural": "Códigos de acreditación",
+                "ordering": ["codigo"],
+            },
+        ),
+    ]
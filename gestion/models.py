@@ -1,5 +1,6 @@
 # Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
 
+import re
 from datetime import timedelta
 from uuid import uuid4
 
@@ -40,16 +41,50 @@ TIPOS_TOKEN = (
     ("CONFIRMACION", "Confirmación plaza"),
 )
 
+TIPOS_CORREO = (
+    ("VERIFICACION", "Verificación correo"),
+    ("VERIFICACION_CORRECTA", "Correo verificado"),
+    ("CONFIRMACION", "Confirmación plaza"),
+)
+
+ESTADOS_PARTICIPANTE = (
+    ("REGISTRADO", "Registrado (sin verificar correo)"),
+    ("ERROR_VERIFICACION", "Error de verificación del correo"),
+    ("VERIFICADO", "Correo verificado"),
+    ("ACEPTADO", "Aceptado"),
+    ("CONFIRMADO", "Plaza confirmada"),
+    ("RECHAZO", "Plaza rechazada"),
+)
+
+ESTADOS_CORREO = (
+    ("PENDIENTE", "Pendiente"),
+    ("ENVIADO", "Enviado"),
+    ("ERROR", "Error"),
+)
+
 
 def ruta_cv(instance, filename):
     correo = instance.correo.replace("@", "-").replace(".", "-")
     return f"cv/{instance.dni}_{correo}.pdf"
 
 
+def normalizar_dni(dni: str) -> str:
+    """DNI o NIE en mayúsculas y sin espacios, puntos ni guiones"""
+    return re.sub(r"[\s.-]", "", dni).upper()
+
+
+CABECERA_PDF = b"%PDF-"
+
+
 def validador_pdf(value):
     if value.file.content_type != "application/pdf":
         raise ValidationError("El archivo no es un PDF")
 
+    cabecera = value.file.read(len(CABECERA_PDF))
+    value.file.seek(0)
+    if cabecera != CABECERA_PDF:
+        raise ValidationError("El archivo no es un PDF")
+
 
 class PersonaAbstracta(models.Model):
     correo = models.EmailField(max_length=254, unique=True, primary_key=True)
@@ -144,6 +179,47 @@ class Persona(PersonaAbstracta):
         default=None,
         verbose_name="Motivo del error en el envío del correo de verificación",
     )
+    # Se deriva de las fechas anteriores al guardar. Las actualizaciones con
+    # `.update()` tienen que mantenerlo a mano
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS_PARTICIPANTE,
+        default="REGISTRADO",
+        db_index=True,
+        verbose_name="Estado",
+    )
+    # Marca para la sincronización incremental de la lista de correo (`listacorreo
+    # --incremental`). Como `estado`, las actualizaciones con `.update()` la ponen a mano
+    modificado = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name="Última modificación"
+    )
+
+    def calcular_estado(self) -> str:
+        if self.fecha_rechazo_plaza is not None:
+            return "RECHAZO"
+        if self.fecha_confirmacion_plaza is not None:
+            return "CONFIRMADO"
+        if self.fecha_aceptacion is not None:
+            return "ACEPTADO"
+        if self.fecha_verificacion_correo is not None:
+            return "VERIFICADO"
+        if self.motivo_error_correo_verificacion is not None:
+            return "ERROR_VERIFICACION"
+        return "REGISTRADO"
+
+    def save(self, *args, **kwargs):
+        self.estado = self.calcular_estado()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = [
+                *update_fields,
+                *(
+                    campo
+                    for campo in ("estado", "modificado")
+                    if campo not in update_fields
+                ),
+            ]
+        super().save(*args, **kwargs)
 
     @admin.display(
         boolean=True,
@@ -234,6 +310,22 @@ class Participante(Persona):
         return f"{self.nombre} ({'No aceptado' if not self.fecha_aceptacion else 'Aceptado'})"
 
 
+class ParticipanteBorrado(models.Model):
+    """Correo de un participante borrado, para quitarlo de la lista de correo en la
+    siguiente sincronización incremental (`listacorreo --incremental`)"""
+
+    id_borrado = models.AutoField(primary_key=True)
+    correo = models.EmailField(max_length=254)
+    fecha = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de borrado")
+
+    class Meta:
+        verbose_name = "Participante borrado"
+        verbose_name_plural = "Participantes borrados"
+
+    def __str__(self):
+        return self.correo
+
+
 class RestriccionAlimentaria(models.Model):
     id_restriccion = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=100, unique=True)
@@ -288,7 +380,8 @@ class Pase(models.Model):
         related_name="pases",
         verbose_name="Tipo de pase",
     )
-    fecha = models.DateTimeField(auto_now_add=True)
+    # No es auto_now_add: los pases escaneados sin conexión llegan con su fecha
+    fecha = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = "Pase"
@@ -301,6 +394,27 @@ class Pase(models.Model):
         return f"Pase '{self.tipo_pase}' de {self.persona.nombre} - {self.tipo_pase.nombre} ({self.fecha})"
 
 
+class CodigoAcreditacion(models.Model):
+    """Código impreso en una acreditación, registrado por lotes antes del evento"""
+
+    codigo = models.CharField(max_length=8, primary_key=True, verbose_name="Código")
+    lote = models.CharField(max_length=100, db_index=True)
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True, verbose_name="Fecha de registro"
+    )
+    fecha_asignacion = models.DateTimeField(
+        null=True, blank=True, verbose_name="Fecha de entrega"
+    )
+
+    class Meta:
+        verbose_name = "Código de acreditación"
+        verbose_name_plural = "Códigos de acreditación"
+        ordering = ["codigo"]
+
+    def __str__(self):
+        return f"{self.codigo} ({self.lote})"
+
+
 class Token(models.Model):
     token = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     tipo = models.CharField(max_length=50, choices=TIPOS_TOKEN)
@@ -317,6 +431,12 @@ class Token(models.Model):
         null=True, blank=True, default=None, verbose_name="Fecha de uso"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["tipo", "persona"]),
+            models.Index(fields=["tipo", "fecha_expiracion"]),
+        ]
+
     @admin.display(boolean=True, ordering="fecha_creacion", description="Usado")
     def usado(self):
         return self.fecha_uso is not None
@@ -327,3 +447,117 @@ class Token(models.Model):
 
     def __str__(self):
         return f"Token de {self.tipo.capitalize()} de {self.persona.nombre}"
+
+
+class Correo(models.Model):
+    """Correo pendiente de envío (outbox). Lo envía el comando `enviarcorreos`"""
+
+    id_correo = models.AutoField(primary_key=True)
+    tipo = models.CharField(max_length=50, choices=TIPOS_CORREO)
+    persona = models.ForeignKey(
+        Persona,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="correos",
+    )
+    destinatario = models.EmailField(max_length=254)
+    asunto = models.CharField(max_length=255)
+    cuerpo_texto = models.TextField(verbose_name="Cuerpo (texto)")
+    cuerpo_html = models.TextField(null=True, blank=True, verbose_name="Cuerpo (HTML)")
+    cabeceras = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(
+        max_length=16, choices=ESTADOS_CORREO, default="PENDIENTE"
+    )
+    intentos = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True, verbose_name="Fecha de creación"
+    )
+    fecha_proximo_intento = models.DateTimeField(
+        default=timezone.now, verbose_name="Fecha del próximo intento"
+    )
+    fecha_envio = models.DateTimeField(
+        null=True, blank=True, default=None, verbose_name="Fecha de envío"
+    )
+    ultimo_error = models.TextField(
+        max_length=4096,
+        null=True,
+        blank=True,
+        default=None,
+        verbose_name="Último error",
+    )
+
+    class Meta:
+        verbose_name = "Correo"
+        verbose_name_plural = "Correos"
+        ordering = ["fecha_creacion"]
+
+        indexes = [models.Index(fields=["estado", "fecha_proximo_intento"])]
+
+    def __str__(self):
+        return f"Correo de {self.get_tipo_display()} a {self.destinatario} ({self.estado.lower()})"
+
+
+class Campana(models.Model):
+    """Envío masivo de correos. Guarda el estado de cada destinatario para poder reanudarlo"""
+
+    id_campana = models.AutoField(primary_key=True)
+    nombre = models.CharField(max_length=100, unique=True)
+    tipo = models.CharField(max_length=50, choices=TIPOS_CORREO)
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True, verbose_name="Fecha de creación"
+    )
+    fecha_expiracion = models.DateTimeField(
+        verbose_name="Fecha de expiración de los tokens"
+    )
+    fecha_fin = models.DateTimeField(
+        null=True, blank=True, default=None, verbose_name="Fecha de finalización"
+    )
+
+    class Meta:
+        verbose_name = "Campaña"
+        verbose_name_plural = "Campañas"
+        ordering = ["-fecha_creacion"]
+
+    def __str__(self):
+        return f"Campaña '{self.nombre}' ({self.get_tipo_display()})"
+
+
+class EnvioCampana(models.Model):
+    id_envio = models.AutoField(primary_key=True)
+    campana = models.ForeignKey(
+        Campana, on_delete=models.CASCADE, related_name="envios"
+    )
+    persona = models.ForeignKey(
+        Persona, on_delete=models.CASCADE, related_name="envios_campana"
+    )
+    token = models.ForeignKey(
+        Token,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="envios_campana",
+    )
+    estado = models.CharField(
+        max_length=16, choices=ESTADOS_CORREO, default="PENDIENTE"
+    )
+    intentos = models.PositiveIntegerField(default=0)
+    fecha_envio = models.DateTimeField(
+        null=True, blank=True, default=None, verbose_name="Fecha de envío"
+    )
+    ultimo_error = models.TextField(
+        max_length=4096,
+        null=True,
+        blank=True,
+        default=None,
+        verbose_name="Último error",
+    )
+
+    class Meta:
+        verbose_name = "Envío de campaña"
+        verbose_name_plural = "Envíos de campaña"
+
+        unique_together = ("campana", "persona")
+
+    def __str__(self):
+        return f"Envío de '{self.campana.nombre}' a {self.persona.correo} ({self.estado.lower()})"
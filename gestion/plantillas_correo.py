@@ -0,0 +1,271 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+"""Compilación de las plantillas de correo.
+
+Cada plantilla se aplana una sola vez por proceso (se resuelve el `{% extends %}` de
+`correo/marco.html`), se le incrusta el CSS en los atributos `style` y se minimiza
+el HTML. Por destinatario solo queda renderizar una plantilla plana y pequeña.
+"""
+
+import re
+import threading
+from html.parser import HTMLParser
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+
+RE_EXTENDS = re.compile(r"""^\s*{%\s*extends\s+["']([^"']+)["']\s*%}""")
+RE_BLOQUE = re.compile(
+    r"{%\s*block\s+(\w+)\s*%}(.*?){%\s*endblock(?:\s+\w+)?\s*%}", re.DOTALL
+)
+RE_ESTILO = re.compile(r"<style[^>]*>(.*?)</style>", re.DOTALL | re.IGNORECASE)
+RE_COMENTARIO_CSS = re.compile(r"/\*.*?\*/", re.DOTALL)
+RE_COMENTARIO_HTML = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+RE_ATRIBUTO_STYLE = re.compile(r"""\sstyle\s*=\s*(["'])(.*?)\1""", re.DOTALL)
+# Selectores que se pueden incrustar: etiqueta, .clase y #id, con descendientes
+RE_SELECTOR_SIMPLE = re.compile(r"^[a-zA-Z0-9]*(?:[.#][\w-]+)*$")
+RE_PARTE_SELECTOR = re.compile(r"([.#]?)([\w-]+)")
+
+ETIQUETAS_VACIAS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+
+_compiladas = {}
+_lock = threading.Lock()
+
+
+def fuente(nombre: str) -> str:
+    return engines["django"].engine.get_template(nombre).source
+
+
+def aplanar(nombre: str) -> str:
+    """Fuente de la plantilla con su `{% extends %}` resuelto (un nivel de bloques,
+    sin `block.super`)"""
+    codigo = fuente(nombre)
+    padre = RE_EXTENDS.match(codigo)
+    if not padre or "block.super" in codigo:
+        return codigo
+
+    bloques = dict(RE_BLOQUE.findall(codigo))
+    return RE_BLOQUE.sub(
+        lambda bloque: bloques.get(bloque.group(1), bloque.group(2)),
+        aplanar(padre.group(1)),
+    )
+
+
+def _declaraciones(texto: str) -> dict:
+    resultado = {}
+    for declaracion in texto.split(";"):
+        propiedad, _, valor = declaracion.partition(":")
+        if propiedad.strip() and valor.strip():
+            resultado[propiedad.strip().lower()] = " ".join(valor.split())
+    return resultado
+
+
+def _reglas_css(css: str):
+    """Separa el CSS en reglas incrustables [(selector, especificidad, orden,
+    declaraciones)] y el resto (media queries, pseudoclases...)"""
+    css = RE_COMENTARIO_CSS.sub("", css)
+    reglas, resto = [], []
+    posicion = orden = 0
+
+    while (apertura := css.find("{", posicion)) != -1:
+        cabecera = css[posicion:apertura].strip()
+        # Bloque completo, con llaves anidadas (@media)
+        nivel, cierre = 1, apertura + 1
+        while nivel and cierre < len(css):
+            nivel += {"{": 1, "}": -1}.get(css[cierre], 0)
+            cierre += 1
+        cuerpo = css[apertura + 1 : cierre - 1]
+        posicion = cierre
+
+        incrustables = []
+        for selector in cabecera.split(","):
+            partes = selector.split()
+            if (
+                cabecera.startswith("@")
+                or not partes
+                or not all(RE_SELECTOR_SIMPLE.match(parte) for parte in partes)
+            ):
+                incrustables = []
+                break
+            incrustables.append(partes)
+
+        if not incrustables:
+            resto.append(f"{cabecera}{{{' '.join(cuerpo.split())}}}")
+            continue
+
+        declaraciones = _declaraciones(cuerpo)
+        for partes in incrustables:
+            especificidad = (
+                sum(parte.count("#") for parte in partes),
+                sum(parte.count(".") for parte in partes),
+                sum(1 for parte in partes if parte[:1].isalnum()),
+            )
+            reglas.append((partes, especificidad, orden, declaraciones))
+            orden += 1
+
+    return reglas, "".join(resto)
+
+
+def _coincide(parte: str, etiqueta: str, clases: set, id_: str) -> bool:
+    for prefijo, nombre in RE_PARTE_SELECTOR.findall(parte):
+        if prefijo == "." and nombre not in clases:
+            return False
+        if prefijo == "#" and nombre != id_:
+            return False
+        if not prefijo and nombre.lower() != etiqueta:
+            return False
+    return True
+
+
+def _coincide_selector(partes: list, pila: list) -> bool:
+    """`pila` es la lista de (etiqueta, clases, id) desde la raíz hasta el elemento"""
+    if not _coincide(partes[-1], *pila[-1]):
+        return False
+    # Descendientes: el resto de partes, en orden, entre los ancestros
+    i = len(pila) - 2
+    for parte in reversed(partes[:-1]):
+        while i >= 0 and not _coincide(parte, *pila[i]):
+            i -= 1
+        if i < 0:
+            return False
+        i -= 1
+    return True
+
+
+class _Etiquetas(HTMLParser):
+    """Recorre el HTML guardando la posición y los ancestros de cada etiqueta de apertura"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.pila = []
+        self.etiquetas = []
+
+    def handle_starttag(self, tag, attrs):
+        atributos = dict(attrs)
+        elemento = (
+            tag,
+            set((atributos.get("class") or "").split()),
+            atributos.get("id") or "",
+        )
+        self.etiquetas.append(
+            (self.getpos(), self.get_starttag_text(), [*self.pila, elemento])
+        )
+        if tag not in ETIQUETAS_VACIAS:
+            self.pila.append(elemento)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ETIQUETAS_VACIAS:
+            self.pila.pop()
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.pila) - 1, -1, -1):
+            if self.pila[i][0] == tag:
+                del self.pila[i:]
+                break
+
+
+def incrustar_css(html: str) -> str:
+    """Copia las reglas de los `<style>` con selectores simples al atributo `style` de
+    cada elemento. Los estilos que ya estaban en línea tienen prioridad. Las reglas
+    que no se pueden incrustar (`@media`, pseudoclases) se quedan en el `<style>`"""
+    reglas, resto = [], []
+    for css in RE_ESTILO.findall(html):
+        incrustables, otras = _reglas_css(css)
+        reglas += incrustables
+        resto.append(otras)
+    if not reglas:
+        return html
+
+    reglas.sort(key=lambda regla: (regla[1], regla[2]))
+    etiquetas = _Etiquetas()
+    etiquetas.feed(html)
+    etiquetas.close()
+
+    inicios_linea = [0]
+    for linea in html.splitlines(keepends=True):
+        inicios_linea.append(inicios_linea[-1] + len(linea))
+
+    trozos, anterior = [], 0
+    for (linea, columna), texto, pila in etiquetas.etiquetas:
+        if pila[-1][0] in ("html", "head", "style", "meta", "base", "title"):
+            continue
+        estilo = {}
+        for partes, _, _, declaraciones in reglas:
+            if _coincide_selector(partes, pila):
+                estilo.update(declaraciones)
+        if not estilo:
+            continue
+
+        en_linea = RE_ATRIBUTO_STYLE.search(texto)
+        if en_linea:
+            estilo.update(_declaraciones(en_linea.group(2)))
+        atributo = ' style="{}"'.format(
+            "; ".join(f"{k}: {v}" for k, v in estilo.items()).replace('"', "'")
+        )
+        if en_linea:
+            nuevo = texto[: en_linea.start()] + atributo + texto[en_linea.end() :]
+        else:
+            cierre = len(texto) - (2 if texto.endswith("/>") else 1)
+            nuevo = texto[:cierre].rstrip() + atributo + texto[cierre:]
+
+        inicio = inicios_linea[linea - 1] + columna
+        trozos += [html[anterior:inicio], nuevo]
+        anterior = inicio + len(texto)
+    trozos.append(html[anterior:])
+    html = "".join(trozos)
+
+    # Solo queda en el <style> lo que no se ha podido incrustar
+    resto = "".join(resto)
+    estilos = iter([f"<style>{resto}</style>" if resto else ""])
+    return RE_ESTILO.sub(lambda _: next(estilos, ""), html)
+
+
+def minimizar_html(html: str) -> str:
+    html = RE_COMENTARIO_HTML.sub("", html)
+    html = re.sub(r"\s+", " ", html)
+    return re.sub(
+        r"\s*(</?(?:html|head|body|meta|style|div|p|br|table|tr|td)\b)", r"\1", html
+    )
+
+
+def compilar(plantilla: str) -> tuple[str, str]:
+    """Fuentes compiladas (txt, html) de una plantilla de correo, sin extensión"""
+    html = minimizar_html(incrustar_css(aplanar(f"{plantilla}.html")))
+    return aplanar(f"{plantilla}.txt"), html.strip()
+
+
+def plantillas() -> list[str]:
+    """Plantillas de correo con versión txt y html en los directorios de plantillas"""
+    nombres = set()
+    for directorio in engines["django"].engine.dirs:
+        for html in Path(directorio, "correo").glob("*.html"):
+            if html.with_suffix(".txt").exists():
+                nombres.add(f"correo/{html.stem}")
+    return sorted(nombres)
+
+
+def plantilla_compilada(plantilla: str):
+    """Plantillas (txt, html) listas para renderizar, compiladas una vez por proceso.
+    Con DEBUG se compilan en cada llamada para ver los cambios sin reiniciar"""
+    if settings.DEBUG or plantilla not in _compiladas:
+        texto, html = compilar(plantilla)
+        motor = engines["django"]
+        with _lock:
+            _compiladas[plantilla] = (motor.from_string(texto), motor.from_string(html))
+    return _compiladas[plantilla]
@@ -0,0 +1,64 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gestion.acreditaciones import invalidar_cache_personas
+from gestion.claves_cache import CACHE_FORMULARIO_REGISTRO, version_paginas
+from gestion.models import (
+    Mentor,
+    Participante,
+    ParticipanteBorrado,
+    Patrocinador,
+    Persona,
+    RestriccionAlimentaria,
+)
+from gestion.sqlite import aplicar_pragmas
+
+# Claves de la caché que dependen de cada modelo. Al guardar o borrar una
+# instancia se eliminan, y como la caché es compartida (gestion.cache) el
+# cambio lo ven todos los workers
+INVALIDACIONES = {
+    RestriccionAlimentaria: [CACHE_FORMULARIO_REGISTRO],
+}
+
+
+def invalidar_cache(sender, **kwargs):
+    cache.delete_many(INVALIDACIONES[sender], version=version_paginas())
+
+
+for modelo in INVALIDACIONES:
+    post_save.connect(invalidar_cache, sender=modelo)
+    post_delete.connect(invalidar_cache, sender=modelo)
+
+
+# Campos que guarda la caché de acreditaciones (gestion.acreditaciones). Los
+# guardados que no los tocan, como los cambios de estado, no la invalidan
+CAMPOS_CACHE_ACREDITACIONES = {"acreditacion", "nombre"}
+
+
+def invalidar_cache_acreditaciones(sender, update_fields=None, **kwargs):
+    if update_fields and CAMPOS_CACHE_ACREDITACIONES.isdisjoint(update_fields):
+        return
+    invalidar_cache_personas()
+
+
+# Las señales de los modelos hijos no llegan con sender=Persona
+for modelo in (Persona, Participante, Mentor, Patrocinador):
+    post_save.connect(invalidar_cache_acreditaciones, sender=modelo)
+    post_delete.connect(invalidar_cache_acreditaciones, sender=modelo)
+
+
+@receiver(post_delete, sender=Participante)
+def registrar_participante_borrado(sender, instance, **kwargs):
+    # La marca de `listacorreo --incremental` solo ve modificaciones, no borrados
+    ParticipanteBorrado.objects.create(correo=instance.correo)
+
+
+@receiver(connection_created)
+def ajustar_conexion_sqlite(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            aplicar_pragmas(cursor)
@@ -0,0 +1,490 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+"""Envío masivo de correos con asyncio: unas pocas conexiones SMTP persistentes con
+pipelining, respetando los límites del proveedor (por minuto, por conexión y por día)"""
+
+import asyncio
+import base64
+import logging
+import random
+import re
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import parseaddr
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import EmailMessage
+from django.core.mail.message import sanitize_address
+from django.db import connection
+from django.utils import timezone
+
+from gestion.correo import ResumenEnvio, enviar_en_paralelo
+
+logger = logging.getLogger(__name__)
+
+BACKEND_SMTP = "django.core.mail.backends.smtp.EmailBackend"
+
+RE_PUNTO = re.compile(rb"^\.", re.MULTILINE)
+
+
+class ErrorSMTP(Exception):
+    def __init__(self, codigo: int, mensaje: str):
+        super().__init__(f"{codigo} {mensaje}")
+        self.codigo = codigo
+
+    @property
+    def temporal(self) -> bool:
+        return 400 <= self.codigo < 500
+
+
+class CupoAgotado(Exception):
+    pass
+
+
+@dataclass
+class LimitesProveedor:
+    """Límites del servidor SMTP. None (o 0) para no limitar"""
+
+    por_minuto: float | None = None
+    por_conexion: int | None = None
+    por_dia: int | None = None
+
+    @classmethod
+    def desde_settings(cls, **cambios) -> "LimitesProveedor":
+        """`EMAIL_LIMITES_PROVEEDOR` con los valores de `cambios` que no sean None"""
+        limites = {**settings.EMAIL_LIMITES_PROVEEDOR}
+        limites.update((k, v) for k, v in cambios.items() if v is not None)
+        return cls(**{k: v or None for k, v in limites.items()})
+
+
+class CuboTokens:
+    """Token bucket: `capacidad` envíos seguidos como máximo y `por_segundo` de media"""
+
+    def __init__(self, por_segundo: float | None, capacidad: int = 1):
+        self.por_segundo = por_segundo
+        self.capacidad = capacidad
+        self.tokens = capacidad
+        self.ultimo = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def tomar(self):
+        if not self.por_segundo:
+            return
+
+        async with self.lock:
+            while True:
+                ahora = time.monotonic()
+                self.tokens = min(
+                    self.capacidad,
+                    self.tokens + (ahora - self.ultimo) * self.por_segundo,
+                )
+                self.ultimo = ahora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.por_segundo)
+
+
+class CupoDiario:
+    """Mensajes enviados hoy, en una caché compartida propia (`EMAIL_CUPO_CACHE`)
+    para que cuenten todos los comandos y no se pierdan al desplegar"""
+
+    def __init__(self, maximo: int | None):
+        self.maximo = maximo
+        self.cache = caches[settings.EMAIL_CUPO_CACHE]
+
+    def clave(self):
+        return f"correo:enviados:{timezone.localdate().isoformat()}"
+
+    def reservar(self, cantidad: int = 1) -> int:
+        """Reserva hasta `cantidad` envíos y devuelve cuántos concede.
+        CupoAgotado si no queda ninguno"""
+        if not self.maximo:
+            return cantidad
+        clave = self.clave()
+        while True:
+            self.cache.add(clave, 0, timeout=2 * 24 * 3600)
+            try:
+                enviados = self.cache.incr(clave, cantidad)
+                break
+            except ValueError:
+                # Expulsada entre add e incr: se vuelve a crear
+                continue
+
+        concedidos = min(max(self.maximo - (enviados - cantidad), 0), cantidad)
+        if concedidos < cantidad:
+            self.liberar(cantidad - concedidos)
+        if not concedidos:
+            raise CupoAgotado(f"Cupo diario de {self.maximo} mensajes agotado")
+        return concedidos
+
+    def liberar(self, cantidad: int = 1):
+        if not self.maximo:
+            return
+        try:
+            self.cache.decr(self.clave(), cantidad)
+        except ValueError:
+            pass
+
+
+class ClienteSMTP:
+    """Cliente SMTP mínimo sobre asyncio (SSL o STARTTLS, AUTH PLAIN y PIPELINING)"""
+
+    def __init__(
+        self,
+        host: str,
+        puerto: int,
+        usuario: str | None = None,
+        contrasena: str | None = None,
+        usar_ssl: bool = False,
+        usar_tls: bool = False,
+        timeout: float | None = 30,
+    ):
+        self.host = host
+        self.puerto = puerto
+        self.usuario = usuario
+        self.contrasena = contrasena
+        self.usar_ssl = usar_ssl
+        self.usar_tls = usar_tls
+        self.timeout = timeout
+        self.extensiones = set()
+        self.lector = self.escritor = None
+
+    @classmethod
+    def desde_settings(cls) -> "ClienteSMTP":
+        return cls(
+            settings.EMAIL_HOST,
+            settings.EMAIL_PORT,
+            settings.EMAIL_HOST_USER,
+            settings.EMAIL_HOST_PASSWORD,
+            usar_ssl=settings.EMAIL_USE_SSL,
+            usar_tls=settings.EMAIL_USE_TLS,
+            timeout=settings.EMAIL_TIMEOUT or 30,
+        )
+
+    async def conectar(self):
+        self.lector, self.escritor = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host,
+                self.puerto,
+                ssl=ssl.create_default_context() if self.usar_ssl else None,
+            ),
+            self.timeout,
+        )
+        await self.respuesta(220)
+        await self.ehlo()
+
+        if self.usar_tls:
+            await self.comando("STARTTLS", 220)
+            await self.escritor.start_tls(ssl.create_default_context())
+            await self.ehlo()
+
+        if self.usuario:
+            credenciales = f"\0{self.usuario}\0{self.contrasena}".encode()
+            await self.comando(
+                f"AUTH PLAIN {base64.b64encode(credenciales).decode()}", 235
+            )
+
+    async def ehlo(self):
+        _, lineas = await self.comando(f"EHLO {socket.getfqdn()}", 250)
+        self.extensiones = {linea.split(" ", 1)[0].upper() for linea in lineas[1:]}
+
+    async def respuesta(self, esperado: int | tuple | None = None):
+        """Lee una respuesta (posiblemente de varias líneas). Devuelve (código, líneas)"""
+        lineas = []
+        while True:
+            linea = await asyncio.wait_for(self.lector.readline(), self.timeout)
+            if not linea:
+                raise ConnectionError("El servidor SMTP cerró la conexión")
+            linea = linea.decode(errors="replace").rstrip("\r\n")
+            lineas.append(linea[4:])
+            if linea[3:4] != "-":
+                break
+
+        codigo = int(linea[:3])
+        if esperado is not None and codigo not in (
+            esperado if isinstance(esperado, tuple) else (esperado,)
+        ):
+            raise ErrorSMTP(codigo, " ".join(lineas))
+        return codigo, lineas
+
+    async def comando(self, comando: str, esperado=None):
+        self.escritor.write(f"{comando}\r\n".encode())
+        await self.escritor.drain()
+        return await self.respuesta(esperado)
+
+    async def enviar(self, remitente: str, destinatarios: list[str], datos: bytes):
+        comandos = [f"MAIL FROM:<{remitente}>"]
+        comandos += [f"RCPT TO:<{destinatario}>" for destinatario in destinatarios]
+        comandos.append("DATA")
+        esperados = [(250,)] + [(250, 251)] * len(destinatarios) + [(354,)]
+
+        respuestas = []
+        if "PIPELINING" in self.extensiones:
+            # Todo el sobre en una sola escritura, y después las respuestas
+            self.escritor.write("".join(f"{c}\r\n" for c in comandos).encode())
+            await self.escritor.drain()
+            for _ in comandos:
+                respuestas.append(await self.respuesta())
+        else:
+            for comando, esperado in zip(comandos, esperados):
+                respuestas.append(await self.comando(comando))
+                if respuestas[-1][0] not in esperado:
+                    break
+
+        error = next(
+            (
+                ErrorSMTP(codigo, " ".join(lineas))
+                for (codigo, lineas), esperado in zip(respuestas, esperados)
+                if codigo not in esperado
+            ),
+            None,
+        )
+        if error:
+            if respuestas[-1][0] == 354:
+                # El servidor espera el cuerpo: se envía vacío y se descarta
+                self.escritor.write(b".\r\n")
+                await self.escritor.drain()
+                await self.respuesta()
+            await self.comando("RSET")
+            raise error
+
+        datos = RE_PUNTO.sub(b"..", datos)
+        if not datos.endswith(b"\r\n"):
+            datos += b"\r\n"
+        self.escritor.write(datos + b".\r\n")
+        await self.escritor.drain()
+        await self.respuesta(250)
+
+    def abortar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            self.escritor = None
+
+    async def cerrar(self):
+        if self.escritor is None:
+            return
+        try:
+            await asyncio.wait_for(self.comando("QUIT"), 5)
+        except (OSError, ConnectionError, ErrorSMTP, asyncio.TimeoutError):
+            pass
+        self.escritor.close()
+        self.escritor = None
+
+
+def direccion_sobre(direccion: str, codificacion: str) -> str:
+    """Dirección para MAIL FROM/RCPT TO, saneada como en el backend SMTP de Django
+    (dominios en punycode, sin saltos de línea) y sin el nombre visible"""
+    return parseaddr(sanitize_address(direccion, codificacion))[1]
+
+
+def sobre(mensaje: EmailMessage) -> tuple[str, list[str], bytes]:
+    """Remitente, destinatarios y cuerpo. ValueError si alguna dirección no vale"""
+    codificacion = mensaje.encoding or settings.DEFAULT_CHARSET
+    return (
+        direccion_sobre(
+            mensaje.from_email or settings.DEFAULT_FROM_EMAIL, codificacion
+        ),
+        [
+            direccion_sobre(destinatario, codificacion)
+            for destinatario in mensaje.recipients()
+        ],
+        mensaje.message().as_bytes(linesep="\r\n"),
+    )
+
+
+async def _enviar(
+    mensajes,
+    conexiones: int,
+    limites: LimitesProveedor,
+    reintentos: int,
+    espera_base: float,
+    al_enviar,
+    crear_cliente,
+) -> ResumenEnvio:
+    resumen = ResumenEnvio()
+    cola = asyncio.Queue()
+    for indice in range(len(mensajes)):
+        cola.put_nowait((indice, 0))
+
+    pendientes = len(mensajes)
+    cubo = CuboTokens(
+        limites.por_minuto / 60 if limites.por_minuto else None, capacidad=conexiones
+    )
+    cupo = CupoDiario(limites.por_dia)
+    loop = asyncio.get_running_loop()
+    # El callback puede usar la base de datos: se ejecuta fuera del bucle, en orden
+    hilo_callback = ThreadPoolExecutor(max_workers=1)
+
+    async def terminar(indice, error):
+        nonlocal pendientes
+        if error is None:
+            resumen.enviados += 1
+        else:
+            resumen.fallidos += 1
+            resumen.errores[indice] = error
+        if al_enviar:
+            await loop.run_in_executor(hilo_callback, al_enviar, indice, error)
+
+        pendientes -= 1
+        if not pendientes:
+            for _ in range(conexiones):
+                cola.put_nowait(None)
+
+    reintentando = set()
+
+    async def reencolar(elemento, espera):
+        await asyncio.sleep(espera)
+        cola.put_nowait(elemento)
+
+    async def trabajador():
+        cliente = None
+        enviados_conexion = 0
+        try:
+            while (elemento := await cola.get()) is not None:
+                indice, intento = elemento
+                reservado = False
+                try:
+                    datos = sobre(mensajes[indice])
+                    # Antes de esperar turno: con el cupo agotado no se espera
+                    cupo.reservar()
+                    reservado = True
+
+                    if cliente is not None and limites.por_conexion:
+                        if enviados_conexion >= limites.por_conexion:
+                            await cliente.cerrar()
+                            cliente = None
+                    if cliente is None:
+                        nuevo = crear_cliente()
+                        try:
+                            await nuevo.conectar()
+                        except BaseException:
+                            # Sin autenticar o a medias: no se reutiliza
+                            nuevo.abortar()
+                            raise
+                        cliente = nuevo
+                        enviados_conexion = 0
+
+                    await cubo.tomar()
+                    await cliente.enviar(*datos)
+                    enviados_conexion += 1
+                except (CupoAgotado, ValueError) as e:
+                    # Cupo agotado o direcciones incorrectas: no se reintenta
+                    if reservado:
+                        cupo.liberar()
+                    await terminar(indice, e)
+                except (ErrorSMTP, OSError, asyncio.TimeoutError) as e:
+                    if reservado:
+                        cupo.liberar()
+                    if cliente is not None and (
+                        not isinstance(e, ErrorSMTP) or e.codigo == 421
+                    ):
+                        # Conexión rota o cerrada por el servidor: se abre otra
+                        # para el siguiente mensaje
+                        cliente.abortar()
+                        cliente = None
+
+                    temporal = not isinstance(e, ErrorSMTP) or e.temporal
+                    if temporal and intento < reintentos:
+                        espera = espera_base * 2**intento * random.uniform(1, 1.1)
+                        logger.warning(
+                            f"Error temporal enviando el mensaje {indice} (intento {intento + 1}), "
+                            f"reintento en {espera:.1f} s: {e}"
+                        )
+                        tarea = asyncio.create_task(
+                            reencolar((indice, intento + 1), espera)
+                        )
+                        reintentando.add(tarea)
+                        tarea.add_done_callback(reintentando.discard)
+                    else:
+                        await terminar(indice, e)
+                else:
+                    await terminar(indice, None)
+        finally:
+            if cliente is not None:
+                await cliente.cerrar()
+
+    inicio = time.monotonic()
+    try:
+        if mensajes:
+            await asyncio.gather(*(trabajador() for _ in range(conexiones)))
+    finally:
+        # La conexión a la base de datos del hilo del callback
+        await loop.run_in_executor(hilo_callback, lambda: connection.close())
+        hilo_callback.shutdown()
+
+    resumen.segundos = time.monotonic() - inicio
+    return resumen
+
+
+def _enviar_en_paralelo(
+    mensajes, conexiones: int, limites: LimitesProveedor, al_enviar
+) -> ResumenEnvio:
+    """`enviar_en_paralelo` con el mismo cupo diario: se reservan de una vez los
+    envíos que quedan y el resto falla con CupoAgotado sin intentarlo"""
+    cupo = CupoDiario(limites.por_dia)
+    agotado = CupoAgotado(f"Cupo diario de {limites.por_dia} mensajes agotado")
+    try:
+        reservados = cupo.reservar(len(mensajes)) if mensajes else 0
+    except CupoAgotado:
+        reservados = 0
+
+    def terminado(indice, error):
+        if error is not None:
+            cupo.liberar()
+        if al_enviar:
+            al_enviar(indice, error)
+
+    resumen = enviar_en_paralelo(
+        mensajes[:reservados],
+        hilos=conexiones,
+        por_segundo=limites.por_minuto / 60 if limites.por_minuto else None,
+        al_enviar=terminado,
+    )
+
+    for indice in range(reservados, len(mensajes)):
+        resumen.fallidos += 1
+        resumen.errores[indice] = agotado
+        if al_enviar:
+            al_enviar(indice, agotado)
+    return resumen
+
+
+def enviar_asincrono(
+    mensajes: list[EmailMessage],
+    conexiones: int = 3,
+    limites: LimitesProveedor | None = None,
+    reintentos: int = 3,
+    espera_base: float = 2,
+    al_enviar=None,
+    crear_cliente=ClienteSMTP.desde_settings,
+) -> ResumenEnvio:
+    """Envía los mensajes repartidos entre `conexiones` conexiones SMTP persistentes.
+
+    Los errores 4xx y de conexión se reintentan hasta `reintentos` veces con espera
+    exponencial desde `espera_base` segundos; los 5xx fallan directamente.
+    `al_enviar(indice, error)` se llama en orden, desde un hilo aparte, según termina
+    cada mensaje. Con un `EMAIL_BACKEND` que no es SMTP (consola, locmem) se usa
+    `enviar_en_paralelo`.
+    """
+    if limites is None:
+        limites = LimitesProveedor.desde_settings()
+
+    if settings.EMAIL_BACKEND != BACKEND_SMTP:
+        return _enviar_en_paralelo(mensajes, conexiones, limites, al_enviar)
+
+    return asyncio.run(
+        _enviar(
+            mensajes,
+            conexiones,
+            limites,
+            reintentos,
+            espera_base,
+            al_enviar,
+            crear_cliente,
+        )
+    )
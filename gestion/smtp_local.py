@@ -0,0 +1,137 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+"""Servidor SMTP mínimo que acepta y descarta los correos. Sustituye al servidor
+real en pruebas de carga y envíos de prueba (sin TLS ni autenticación real)"""
+
+import socketserver
+import threading
+
+
+class _ManejadorSMTP(socketserver.StreamRequestHandler):
+    def responder(self, linea: str):
+        self.wfile.write(f"{linea}\r\n".encode())
+
+    def handle(self):
+        servidor: ServidorSMTPLocal = self.server.smtp
+        self.responder("220 localhost SMTP local")
+        autenticado = False
+        remitente, destinatarios = None, []
+
+        while linea := self.rfile.readline():
+            comando = linea.decode(errors="replace").strip()
+            verbo = comando.split(" ", 1)[0].upper()
+
+            match verbo:
+                case "EHLO":
+                    self.wfile.write(
+                        b"250-localhost\r\n250-PIPELINING\r\n250-AUTH PLAIN LOGIN\r\n"
+                    )
+                    self.responder("250 8BITMIME")
+                case "MAIL" | "RCPT" if servidor.autenticacion and not autenticado:
+                    self.responder("530 Autenticación necesaria")
+                case "MAIL":
+                    remitente, destinatarios = comando[10:].strip(), []
+                    self.responder("250 OK")
+                case "RCPT":
+                    destinatarios.append(comando[8:].strip())
+                    self.responder("250 OK")
+                case "HELO" | "RSET" | "NOOP":
+                    self.responder("250 OK")
+                case "AUTH":
+                    if servidor.fallar_autenticacion():
+                        self.responder("454 Error temporal de autenticación")
+                    else:
+                        autenticado = True
+                        self.responder("235 Autenticado")
+                case "DATA":
+                    self.responder("354 Fin con <CRLF>.<CRLF>")
+                    datos = bytearray()
+                    while (linea := self.rfile.readline()) not in (b".\r\n", b""):
+                        datos += linea
+                    if servidor.fallar():
+                        self.responder("451 Error temporal de prueba")
+                    else:
+                        servidor.registrar(bytes(datos), remitente, destinatarios)
+                        self.responder("250 Aceptado")
+                case "QUIT":
+                    self.responder("221 Adios")
+                    return
+                case _:
+                    self.responder("502 Comando no implementado")
+
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ServidorSMTPLocal:
+    """Uso: `with ServidorSMTPLocal(puerto=1025) as smtp: ...; smtp.recibidos`"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        puerto: int = 1025,
+        guardar=False,
+        errores_temporales: int = 0,
+        autenticacion: bool = False,
+        errores_autenticacion: int = 0,
+    ):
+        self.direccion = (host, puerto)
+        self.guardar = guardar
+        # Los primeros mensajes se rechazan con un 451, para probar los reintentos
+        self.errores_temporales = errores_temporales
+        # Con `autenticacion` no se acepta MAIL sin AUTH, y los primeros AUTH
+        # fallan con un 454
+        self.autenticacion = autenticacion
+        self.errores_autenticacion = errores_autenticacion
+        self.autenticaciones = 0
+        self.recibidos = 0
+        self.bytes_recibidos = 0
+        self.mensajes: list[bytes] = []
+        # (MAIL FROM, [RCPT TO]) de cada mensaje guardado, tal cual llegaron
+        self.sobres: list[tuple[str, list[str]]] = []
+        self.lock = threading.Lock()
+        self.servidor = None
+
+    def registrar(self, datos: bytes, remitente=None, destinatarios=()):
+        with self.lock:
+            self.recibidos += 1
+            self.bytes_recibidos += len(datos)
+            if self.guardar:
+                self.mensajes.append(datos)
+                self.sobres.append((remitente, list(destinatarios)))
+
+    def fallar_autenticacion(self) -> bool:
+        with self.lock:
+            self.autenticaciones += 1
+            if self.errores_autenticacion > 0:
+                self.errores_autenticacion -= 1
+                return True
+            return False
+
+    def fallar(self) -> bool:
+        with self.lock:
+            if self.errores_temporales > 0:
+                self.errores_temporales -= 1
+                return True
+            return False
+
+    def iniciar(self):
+        self.servidor = _ServidorTCP(self.direccion, _ManejadorSMTP)
+        self.servidor.smtp = self
+        self.direccion = self.servidor.server_address
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def parar(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *args):
+        self.parar()
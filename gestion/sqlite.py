@@ -0,0 +1,109 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, transaction
+
+logger = logging.getLogger(__name__)
+
+# Contadores en la caché compartida, comunes a todos los workers
+METRICA_REINTENTOS = "metricas:escritura:reintentos"
+METRICA_FALLOS = "metricas:escritura:fallos"
+
+
+def aplicar_pragmas(cursor, pragmas: dict | None = None):
+    """Aplica el perfil de ajustes de SQLite (`settings.SQLITE_PRAGMAS`) a una conexión.
+
+    Salvo `journal_mode`, los PRAGMA son de cada conexión y no se guardan en el
+    archivo, por lo que hay que repetirlos cada vez que se abre una.
+    """
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+
+    for pragma, valor in pragmas.items():
+        cursor.execute(f"PRAGMA {pragma} = {valor}")
+
+
+def incrementar_metrica(clave: str):
+    cache.add(clave, 0, timeout=None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        pass
+
+
+@contextmanager
+def espera_bloqueo(milisegundos: int):
+    """Cambia el `busy_timeout` de la conexión mientras dura el bloque"""
+    conexion = transaction.get_connection()
+    if conexion.vendor != "sqlite":
+        yield
+        return
+
+    with conexion.cursor() as cursor:
+        cursor.execute(f"PRAGMA busy_timeout = {int(milisegundos)}")
+    try:
+        yield
+    finally:
+        with conexion.cursor() as cursor:
+            cursor.execute(
+                f"PRAGMA busy_timeout = {int(settings.SQLITE_PRAGMAS['busy_timeout'])}"
+            )
+
+
+def escritura_con_reintentos(funcion=None, *, intentos=5, espera=0.02):
+    """Ejecuta la función en una transacción corta (`BEGIN IMMEDIATE`, ver
+    `transaction_mode` en settings) y la repite si la base de datos está bloqueada,
+    con espera exponencial y aleatoria para que los escritores no vuelvan a chocar.
+
+    La función debe hacer solo las lecturas y escrituras que tienen que ser
+    atómicas: nada de renderizar plantillas ni mensajes dentro.
+
+    Cada intento espera al bloqueo como mucho `SQLITE_ESPERA_ESCRITURA` ms en lugar
+    del `busy_timeout` general, para que la petición no quede retenida durante
+    `intentos` esperas completas.
+
+    Dentro de otra transacción la función se ejecuta sin más: solo reintenta la
+    más externa. Reintentar dentro multiplicaría los intentos y esperaría con la
+    transacción abierta, reteniendo el bloqueo.
+    """
+
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltorio(*args, **kwargs):
+            if transaction.get_connection().in_atomic_block:
+                return funcion(*args, **kwargs)
+
+            with espera_bloqueo(settings.SQLITE_ESPERA_ESCRITURA):
+                for intento in range(intentos):
+                    try:
+                        with transaction.atomic():
+                            return funcion(*args, **kwargs)
+                    except OperationalError as e:
+                        if "locked" not in str(e):
+                            raise
+
+                        if intento == intentos - 1:
+                            incrementar_metrica(METRICA_FALLOS)
+                            logger.error(
+                                f"Base de datos bloqueada en {funcion.__name__} tras {intentos} intentos"
+                            )
+                            raise
+
+                        incrementar_metrica(METRICA_REINTENTOS)
+                        logger.warning(
+                            f"Base de datos bloqueada en {funcion.__name__}, reintento {intento + 1}"
+                        )
+                        time.sleep(espera * 2**intento * random.uniform(0.5, 1.5))
+
+        return envoltorio
+
+    if funcion is None:
+        return decorador
+    return decorador(funcion)
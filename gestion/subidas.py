@@ -0,0 +1,92 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    StopFutureHandlers,
+    StopUpload,
+)
+
+from gestion.models import CABECERA_PDF
+
+# Lo que pueden ocupar el resto de campos del formulario de registro
+MARGEN_CAMPOS = 64 * 1024
+
+
+class ManejadorSubidaCV(FileUploadHandler):
+    """Recibe el CV en memoria y lo valida mientras llega.
+
+    Comprueba la cabecera `%PDF-` en el primer bloque y corta la subida en cuanto
+    supera `CV_TAMANO_MAXIMO`, sin llegar a escribir nada en disco. Si la petición
+    entera ya es demasiado grande el CV se rechaza al empezar. Al rechazarlo se deja
+    de leer el cuerpo (lo que venga después del CV se pierde) y el motivo queda en
+    `request.errores_subida` para mostrarlo en el formulario.
+    """
+
+    def __init__(self, request=None, campo="cv"):
+        super().__init__(request)
+        self.campo = campo
+        self.activo = False
+        self.peticion_grande = False
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        self.peticion_grande = (
+            content_length > settings.CV_TAMANO_MAXIMO + MARGEN_CAMPOS
+        )
+
+    def rechazar(self, motivo: str):
+        self.request.errores_subida = {self.campo: motivo}
+        self.activo = False
+        # Sin connection_reset el parser leería igualmente el resto del cuerpo
+        raise StopUpload(connection_reset=True)
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.activo = field_name == self.campo
+        if not self.activo:
+            return
+
+        if self.peticion_grande or (
+            self.content_length and self.content_length > settings.CV_TAMANO_MAXIMO
+        ):
+            self.rechazar(self.mensaje_tamano())
+
+        self.file = BytesIO()
+        # El resto de manejadores (memoria / archivo temporal) no reciben el CV
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.activo:
+            return raw_data
+
+        if start == 0 and not raw_data.startswith(CABECERA_PDF):
+            self.rechazar("El archivo no es un PDF")
+
+        if start + len(raw_data) > settings.CV_TAMANO_MAXIMO:
+            self.rechazar(self.mensaje_tamano())
+
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not self.activo:
+            return None
+
+        self.activo = False
+        self.file.seek(0)
+        return InMemoryUploadedFile(
+            file=self.file,
+            field_name=self.field_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def mensaje_tamano(self):
+        return f"El CV no puede ocupar más de {settings.CV_TAMANO_MAXIMO // 1024**2} MB"
@@ -0,0 +1,450 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.forms.models import model_to_dict
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion import acreditaciones
+from gestion.acreditaciones import (
+    NUMERO_MAXIMO,
+    asignar_acreditacion,
+    buscar_persona,
+    codigo_acreditacion,
+    codigo_valido,
+    validar_codigo,
+)
+from gestion.checks import comprobar_acreditaciones
+from gestion.models import CodigoAcreditacion, Mentor, Patrocinador, Persona
+from gestion.tests.utils import CACHE_LOCAL, crear_participante
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AsignarAcreditacionTests(TestCase):
+    def setUp(self):
+        ahora = timezone.now()
+        self.ana = crear_participante(1, fecha_aceptacion=ahora)
+        self.luis = crear_participante(2, fecha_aceptacion=ahora)
+        self.codigo = codigo_acreditacion(1)
+        self.otro_codigo = codigo_acreditacion(2)
+
+    def test_resultados(self):
+        crear_participante(3)
+        for correo, codigo, resultado in (
+            ("p1@example.com", self.codigo, "ASIGNADA"),
+            ("p1@example.com", self.codigo, "REPETIDA"),
+            ("p1@example.com", self.otro_codigo, "YA_TIENE"),
+            ("p2@example.com", self.codigo, "EN_USO"),
+            ("p3@example.com", self.otro_codigo, "NO_ACEPTADO"),
+            ("nadie@example.com", self.otro_codigo, "INEXISTENTE"),
+        ):
+            with self.subTest(correo=correo, codigo=codigo):
+                self.assertEqual(asignar_acreditacion(correo, codigo), resultado)
+
+        self.assertEqual(
+            dict(Persona.objects.values_list("correo", "acreditacion")),
+            {
+                "p1@example.com": self.codigo,
+                "p2@example.com": None,
+                "p3@example.com": None,
+            },
+        )
+
+    def test_un_update_de_la_columna(self):
+        with CaptureQueriesContext(connection) as consultas:
+            asignar_acreditacion(self.ana.correo, self.codigo)
+
+        (update,) = [
+            c["sql"]
+            for c in consultas
+            if c["sql"].startswith('UPDATE "gestion_persona"')
+        ]
+        columnas = update.split(" SET ")[1].split(" WHERE ")[0]
+        self.assertEqual(
+            [columna.split(" = ")[0] for columna in columnas.split(", ")],
+            ['"acreditacion"', '"modificado"'],
+        )
+        self.assertIn('"acreditacion" IS NULL', update)
+
+    def test_no_pisa_otros_cambios(self):
+        # Otro puesto corrige el nombre mientras este tiene la persona cargada
+        Persona.objects.filter(pk=self.ana.pk).update(nombre="Ana Corregida")
+        asignar_acreditacion(self.ana.correo, self.codigo)
+
+        self.ana.refresh_from_db()
+        self.assertEqual(self.ana.nombre, "Ana Corregida")
+        self.assertEqual(self.ana.acreditacion, self.codigo)
+
+    def test_alta_doble_envio(self):
+        self.client.force_login(User.objects.create_superuser("admin", "", "x"))
+        datos = {"persona": self.ana.correo, "acreditacion": self.codigo}
+
+        for _ in range(2):
+            respuesta = self.client.post(reverse("alta"), datos)
+            self.assertRedirects(respuesta, reverse("alta"))
+
+        respuesta = self.client.post(
+            reverse("alta"), {"persona": self.luis.correo, "acreditacion": self.codigo}
+        )
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(
+            [str(m) for m in get_messages(respuesta.wsgi_request)],
+            ["La acreditación ya está asignada a otra persona"],
+        )
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AsignacionConcurrenteTests(TransactionTestCase):
+    def simultaneos(self, peticiones: list[tuple[str, str]]) -> list[str]:
+        barrera = threading.Barrier(len(peticiones))
+        resultados = [None] * len(peticiones)
+
+        def puesto(i, correo, codigo):
+            barrera.wait()
+            try:
+                resultados[i] = asignar_acreditacion(correo, codigo)
+            finally:
+                connection.close()
+
+        hilos = [
+            threading.Thread(target=puesto, args=(i, *peticion))
+            for i, peticion in enumerate(peticiones)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return resultados
+
+    def test_misma_acreditacion_en_varios_puestos(self):
+        ahora = timezone.now()
+        for i in range(6):
+            crear_participante(i, fecha_aceptacion=ahora)
+        codigo = codigo_acreditacion(7)
+
+        resultados = self.simultaneos([(f"p{i}@example.com", codigo) for i in range(6)])
+
+        self.assertEqual(sorted(resultados), ["ASIGNADA"] + ["EN_USO"] * 5)
+        self.assertEqual(Persona.objects.filter(acreditacion=codigo).count(), 1)
+
+    def test_misma_persona_en_varios_puestos(self):
+        crear_participante(1, fecha_aceptacion=timezone.now())
+
+        resultados = self.simultaneos(
+            [("p1@example.com", codigo_acreditacion(i)) for i in range(6)]
+        )
+
+        self.assertEqual(sorted(resultados), ["ASIGNADA"] + ["YA_TIENE"] * 5)
+
+
+class DigitoControlTests(SimpleTestCase):
+    def test_codigos(self):
+        self.assertEqual(codigo_acreditacion(1), "000013")
+        self.assertEqual(codigo_acreditacion(572), "005724")
+        self.assertEqual(codigo_acreditacion(1234567), "12345671")
+        with self.assertRaises(ValueError):
+            codigo_acreditacion(NUMERO_MAXIMO + 1)
+
+    @override_settings(ACREDITACIONES_DIGITO_CONTROL=True)
+    def test_detecta_cifras_cambiadas_e_intercambiadas(self):
+        for numero in range(0, 3000, 7):
+            codigo = codigo_acreditacion(numero)
+            self.assertTrue(codigo_valido(codigo))
+            for i, cifra in enumerate(codigo):
+                for otra in "0123456789".replace(cifra, ""):
+                    self.assertFalse(codigo_valido(codigo[:i] + otra + codigo[i + 1 :]))
+            for i in range(len(codigo) - 1):
+                if codigo[i] != codigo[i + 1]:
+                    intercambiado = (
+                        codigo[:i] + codigo[i + 1] + codigo[i] + codigo[i + 2 :]
+                    )
+                    self.assertFalse(codigo_valido(intercambiado))
+
+    @override_settings(ACREDITACIONES_DIGITO_CONTROL=True)
+    def test_formato(self):
+        for codigo in ("", "13", "00001a", "０００１３", "123456789"):
+            with self.subTest(codigo=codigo):
+                self.assertFalse(codigo_valido(codigo))
+        with self.assertRaises(ValidationError):
+            validar_codigo("000014")
+
+    @override_settings(ACREDITACIONES_DIGITO_CONTROL=False)
+    def test_sin_digito_de_control(self):
+        self.assertTrue(codigo_valido("A-17"))
+        self.assertFalse(codigo_valido("123456789"))
+        self.assertFalse(codigo_valido(""))
+
+
+@override_settings(CACHES=CACHE_LOCAL, ACREDITACIONES_DIGITO_CONTROL=True)
+class CodigosRegistradosTests(TestCase):
+    def setUp(self):
+        self.participante = crear_participante(1, fecha_aceptacion=timezone.now())
+
+    def test_codigo_incorrecto_sin_consultas(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                asignar_acreditacion(self.participante.correo, "000014"), "INCORRECTA"
+            )
+
+    def test_sin_codigos_registrados_vale_cualquiera(self):
+        self.assertEqual(
+            asignar_acreditacion(self.participante.correo, codigo_acreditacion(9)),
+            "ASIGNADA",
+        )
+
+    def test_solo_los_registrados(self):
+        CodigoAcreditacion.objects.create(codigo=codigo_acreditacion(1), lote="a")
+
+        self.assertEqual(
+            asignar_acreditacion(self.participante.correo, codigo_acreditacion(2)),
+            "NO_REGISTRADA",
+        )
+        self.assertEqual(
+            asignar_acreditacion(self.participante.correo, codigo_acreditacion(1)),
+            "ASIGNADA",
+        )
+        self.assertIsNotNone(
+            CodigoAcreditacion.objects.get(pk=codigo_acreditacion(1)).fecha_asignacion
+        )
+
+    def test_api(self):
+        self.client.force_login(User.objects.create_superuser("admin", "", "x"))
+        CodigoAcreditacion.objects.create(codigo=codigo_acreditacion(1), lote="a")
+
+        for codigo, estado, resultado in (
+            ("000014", 400, "INCORRECTA"),
+            (codigo_acreditacion(2), 409, "NO_REGISTRADA"),
+        ):
+            respuesta = self.client.post(
+                reverse("api-alta-asignar"),
+                {"correo": self.participante.correo, "acreditacion": codigo},
+                content_type="application/json",
+            )
+            self.assertEqual(respuesta.status_code, estado)
+            self.assertEqual(respuesta.json()["resultado"], resultado)
+
+    def test_formularios_del_panel(self):
+        peticion = RequestFactory().get("/")
+        peticion.user = User.objects.create_superuser("admin", "", "x")
+        mentor = Mentor.objects.create(
+            correo="m@example.com", nombre="Mentor", dni="00000009Z"
+        )
+        patrocinador = Patrocinador.objects.create(
+            correo="s@example.com", nombre="Patrocinador"
+        )
+
+        for instancia in (self.participante, mentor, patrocinador):
+            with self.subTest(modelo=type(instancia).__name__):
+                modelo_admin = admin.site._registry[type(instancia)]
+                Formulario = modelo_admin.get_form(peticion, instancia)
+                datos = {
+                    **model_to_dict(instancia),
+                    "acreditacion": "000014",
+                }
+                formulario = Formulario(datos, instance=instancia)
+                self.assertFalse(formulario.is_valid())
+                self.assertIn("acreditacion", formulario.errors)
+
+                datos["acreditacion"] = codigo_acreditacion(5)
+                formulario = Formulario(datos, instance=instancia)
+                formulario.is_valid()
+                self.assertNotIn("acreditacion", formulario.errors)
+
+    def test_aviso_de_acreditaciones_sin_digito(self):
+        Persona.objects.filter(pk=self.participante.pk).update(acreditacion="A-17")
+
+        (aviso,) = comprobar_acreditaciones(None)
+        self.assertEqual(aviso.id, "gestion.W001")
+        self.assertIn("A-17", aviso.msg)
+
+        with override_settings(ACREDITACIONES_DIGITO_CONTROL=False):
+            self.assertEqual(comprobar_acreditaciones(None), [])
+
+
+@override_settings(CACHES=CACHE_LOCAL, ACREDITACIONES_DIGITO_CONTROL=True)
+class CodigosAcreditacionComandoTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+
+    def ejecutar(self, **opciones) -> str:
+        salida = StringIO()
+        call_command("codigosacreditacion", stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def codigos(self) -> list[str]:
+        return list(CodigoAcreditacion.objects.values_list("codigo", flat=True))
+
+    def test_rango_y_cantidad(self):
+        self.ejecutar(rango=["1-3"], lote="imprenta")
+        self.ejecutar(cantidad=2)
+
+        self.assertEqual(
+            sorted(self.codigos()), [codigo_acreditacion(n) for n in range(1, 6)]
+        )
+        self.assertEqual(CodigoAcreditacion.objects.filter(lote="imprenta").count(), 3)
+
+    def test_repetidos(self):
+        self.ejecutar(rango=["1-3"], lote="a")
+        salida = self.ejecutar(rango=["2-4"], lote="b")
+
+        self.assertIn("2 códigos ya estaban registrados", salida)
+        self.assertEqual(
+            CodigoAcreditacion.objects.get(pk=codigo_acreditacion(2)).lote, "a"
+        )
+
+    def test_archivo(self):
+        archivo = self.directorio / "codigos.txt"
+        archivo.write_text(f"{codigo_acreditacion(7)}\n\n{codigo_acreditacion(8)}\n")
+        self.ejecutar(archivo=str(archivo))
+        self.assertEqual(
+            sorted(self.codigos()), [codigo_acreditacion(7), codigo_acreditacion(8)]
+        )
+
+        archivo.write_text("000014\n")
+        with self.assertRaisesMessage(CommandError, "000014"):
+            self.ejecutar(archivo=str(archivo))
+
+    def test_rango_incorrecto(self):
+        for rango in ("5", "5-1", f"1-{NUMERO_MAXIMO + 1}"):
+            with self.subTest(rango=rango), self.assertRaises(CommandError):
+                self.ejecutar(rango=[rango])
+        with self.assertRaises(CommandError):
+            self.ejecutar()
+
+    def test_hoja_sin_los_entregados(self):
+        self.ejecutar(rango=["1-3"], lote="a")
+        CodigoAcreditacion.objects.filter(pk=codigo_acreditacion(2)).update(
+            fecha_asignacion=timezone.now()
+        )
+
+        hoja = self.directorio / "hoja.csv"
+        self.ejecutar(hoja=str(hoja))
+        self.assertEqual(
+            hoja.read_text().splitlines(),
+            [
+                "codigo,lote,entregado",
+                f"{codigo_acreditacion(1)},a,no",
+                f"{codigo_acreditacion(3)},a,no",
+            ],
+        )
+
+        html = self.directorio / "hoja.html"
+        self.ejecutar(hoja=str(html), todos=True)
+        self.assertIn(codigo_acreditacion(2), html.read_text())
+
+        with self.assertRaises(CommandError):
+            self.ejecutar(hoja=str(html), no_overwrite=True)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class BuscarPersonaTests(TestCase):
+    def setUp(self):
+        acreditaciones._cache_personas.clear()
+        acreditaciones._generacion.update(valor=None, comprobada=0.0)
+        self.addCleanup(acreditaciones._cache_personas.clear)
+        self.participante = crear_participante(
+            1, fecha_aceptacion=timezone.now(), acreditacion=codigo_acreditacion(1)
+        )
+        self.codigo = codigo_acreditacion(1)
+
+    def test_segunda_busqueda_sin_consultas(self):
+        with self.assertNumQueries(1):
+            persona = buscar_persona(self.codigo)
+        self.assertEqual(persona.correo, self.participante.correo)
+        self.assertEqual(persona.tipo, "PARTICIPANTE")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(buscar_persona(self.codigo), persona)
+
+    def test_inexistentes_e_incorrectas(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(buscar_persona(""))
+        with self.assertNumQueries(1):
+            self.assertIsNone(buscar_persona(codigo_acreditacion(2)))
+        # Las que no existen no se guardan: pueden asignarse en cualquier momento
+        self.assertNotIn(codigo_acreditacion(2), acreditaciones._cache_personas)
+
+    @override_settings(ACREDITACIONES_DIGITO_CONTROL=True)
+    def test_codigo_incorrecto_sin_consultas(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(buscar_persona("000014"))
+
+    def test_invalida_al_cambiar_la_acreditacion_o_el_nombre(self):
+        buscar_persona(self.codigo)
+
+        self.participante.nombre = "Otro nombre"
+        self.participante.save(update_fields=["nombre"])
+        self.assertEqual(buscar_persona(self.codigo).nombre, "Otro nombre")
+
+        self.participante.acreditacion = codigo_acreditacion(2)
+        self.participante.save()
+        self.assertIsNone(buscar_persona(self.codigo))
+        self.assertIsNotNone(buscar_persona(codigo_acreditacion(2)))
+
+    def test_cambios_de_estado_no_invalidan(self):
+        buscar_persona(self.codigo)
+
+        self.participante.fecha_confirmacion_plaza = timezone.now()
+        self.participante.save(update_fields=["fecha_confirmacion_plaza"])
+        with self.assertNumQueries(0):
+            buscar_persona(self.codigo)
+
+    def test_borrar_invalida(self):
+        buscar_persona(self.codigo)
+        self.participante.delete()
+        self.assertIsNone(buscar_persona(self.codigo))
+
+    def test_generacion_de_otro_worker(self):
+        buscar_persona(self.codigo)
+        # Otro worker guarda una persona: sube la generación compartida sin
+        # tocar la caché de este
+        cache.add(acreditaciones.CLAVE_GENERACION, 0, timeout=None)
+        cache.incr(acreditaciones.CLAVE_GENERACION)
+
+        with mock.patch.object(acreditaciones, "INTERVALO_GENERACION", 3600):
+            with self.assertNumQueries(0):
+                buscar_persona(self.codigo)
+
+        acreditaciones._generacion["comprobada"] = 0.0
+        with self.assertNumQueries(1):
+            buscar_persona(self.codigo)
+        with self.assertNumQueries(0):
+            buscar_persona(self.codigo)
+
+    def test_tamano_limitado(self):
+        for n in range(2, 5):
+            crear_participante(
+                n, fecha_aceptacion=timezone.now(), acreditacion=codigo_acreditacion(n)
+            )
+
+        with mock.patch.object(acreditaciones, "TAMANO_CACHE", 2):
+            for n in (1, 2, 1, 3):
+                buscar_persona(codigo_acreditacion(n))
+
+        # Se descarta la menos usada recientemente
+        self.assertEqual(
+            list(acreditaciones._cache_personas),
+            [codigo_acreditacion(1), codigo_acreditacion(3)],
+        )
@@ -0,0 +1,122 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.forms import ParticipanteForm
+from gestion.tests.utils import CACHE_LOCAL, crear_participante, crear_token
+from gestion.tokens import firmar_token
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ApiAltaTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "", "x"))
+        self.participante = crear_participante(
+            1, dni="12345678Z", fecha_aceptacion=timezone.now()
+        )
+
+    def buscar(self, valor: str):
+        return self.client.get(reverse("api-alta-buscar"), {"q": valor})
+
+    def asignar(self, correo: str, acreditacion: str):
+        return self.client.post(
+            reverse("api-alta-asignar"),
+            json.dumps({"correo": correo, "acreditacion": acreditacion}),
+            content_type="application/json",
+        )
+
+    def test_busca_por_correo_dni_y_qr(self):
+        token = crear_token(self.participante, "CONFIRMACION", -1)
+        for valor in (
+            "p1@example.com",
+            "mailto:p1@example.com",
+            "12345678z",
+            "12.345.678-Z",
+            firmar_token(token),
+            f"https://localhost/confirmar/{token.token}/",
+        ):
+            with self.subTest(valor=valor):
+                respuesta = self.buscar(valor)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(respuesta.json()["correo"], "p1@example.com")
+                self.assertEqual(respuesta.json()["tipo"], "participante")
+
+    def test_busqueda_sin_resultado(self):
+        self.assertEqual(self.buscar("87654321X").status_code, 404)
+        self.assertEqual(self.buscar("").status_code, 400)
+
+    def test_asignar(self):
+        otro = crear_participante(2, fecha_aceptacion=timezone.now())
+
+        respuesta = self.asignar(self.participante.correo, "000013")
+        self.assertEqual(respuesta.json()["resultado"], "ASIGNADA")
+        # Repetir la petición no es un error
+        respuesta = self.asignar(self.participante.correo, "000013")
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()["resultado"], "REPETIDA")
+
+        respuesta = self.asignar(otro.correo, "000013")
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()["resultado"], "EN_USO")
+        self.assertEqual(self.asignar("nadie@example.com", "000021").status_code, 404)
+        self.assertEqual(
+            self.client.post(
+                reverse("api-alta-asignar"), "{", content_type="application/json"
+            ).status_code,
+            400,
+        )
+
+    def test_el_formulario_normaliza_el_dni(self):
+        form = ParticipanteForm(data={"dni": " 8765.4321-x "})
+        form.is_valid()
+        self.assertEqual(form.cleaned_data.get("dni"), "87654321X")
+
+        # El mismo DNI con otro formato es un duplicado
+        form = ParticipanteForm(data={"dni": "1234-5678-z"})
+        form.is_valid()
+        self.assertIn("dni", form.errors)
+
+
+class NormalizarDniMigracionTests(TransactionTestCase):
+    antes = [("gestion", "0008_participanteborrado")]
+    despues = [("gestion", "0009_normalizar_dni")]
+
+    def migrar(self, objetivo):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(objetivo)
+        return executor.loader.project_state(objetivo).apps
+
+    def tearDown(self):
+        self.migrar(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_normaliza_los_dni_guardados(self):
+        apps = self.migrar(self.antes)
+        Persona = apps.get_model("gestion", "Persona")
+        for correo, dni in (
+            ("a@example.com", "1234-5678z"),
+            ("b@example.com", "x 1234567.l"),
+            ("c@example.com", "87654321X"),
+            # Duplicados: el normalizado ya existe
+            ("d@example.com", "87654321x"),
+        ):
+            Persona.objects.create(correo=correo, nombre=correo, dni=dni)
+
+        apps = self.migrar(self.despues)
+        Persona = apps.get_model("gestion", "Persona")
+        self.assertEqual(
+            dict(Persona.objects.values_list("correo", "dni")),
+            {
+                "a@example.com": "12345678Z",
+                "b@example.com": "X1234567L",
+                "c@example.com": "87654321X",
+                "d@example.com": "87654321x",
+            },
+        )
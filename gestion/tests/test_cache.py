@@ -0,0 +1,144 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from gestion.cache import RESOLUCION_ACCESO, SQLiteCache
+from gestion.claves_cache import (
+    CACHE_FORMULARIO_REGISTRO,
+    CACHE_REGISTRO_CERRADO,
+    version_paginas,
+)
+from gestion.models import RestriccionAlimentaria
+from gestion.tests.utils import CACHE_LOCAL
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = Path(directorio.name) / "cache.sqlite3"
+
+    def nueva(self, **opciones) -> SQLiteCache:
+        cache = SQLiteCache(self.ruta, {"OPTIONS": opciones})
+        self.addCleanup(lambda: cache._conexion and cache._conexion.close())
+        return cache
+
+    def test_compartida_entre_instancias(self):
+        # Cada worker tiene su instancia, pero todas usan el mismo archivo
+        a, b = self.nueva(), self.nueva()
+        a.set("clave", {"valor": 1})
+        self.assertEqual(b.get("clave"), {"valor": 1})
+
+        b.delete("clave")
+        self.assertIsNone(a.get("clave"))
+
+    def test_caducidad(self):
+        cache = self.nueva()
+        cache.set("corta", 1, timeout=10)
+        cache.set("permanente", 2, timeout=None)
+
+        with mock.patch("gestion.cache.time.time", return_value=time.time() + 11):
+            self.assertIsNone(cache.get("corta"))
+            self.assertFalse(cache.has_key("corta"))
+            self.assertEqual(cache.get("permanente"), 2)
+
+    def test_add_solo_si_no_existe_o_caducada(self):
+        cache = self.nueva()
+        self.assertTrue(cache.add("clave", 1, timeout=10))
+        self.assertFalse(cache.add("clave", 2))
+        self.assertEqual(cache.get("clave"), 1)
+
+        with mock.patch("gestion.cache.time.time", return_value=time.time() + 11):
+            self.assertTrue(cache.add("clave", 3))
+            self.assertEqual(cache.get("clave"), 3)
+
+    def test_incr(self):
+        a, b = self.nueva(), self.nueva()
+        a.set("contador", 1)
+        self.assertEqual(b.incr("contador"), 2)
+        self.assertEqual(a.incr("contador", 3), 5)
+        with self.assertRaises(ValueError):
+            a.incr("no-existe")
+
+    def test_descarta_menos_usadas(self):
+        cache = self.nueva(MAX_ENTRIES=4, CULL_FREQUENCY=2)
+        ahora = time.time()
+        for i in range(4):
+            with mock.patch("gestion.cache.time.time", return_value=ahora + i):
+                cache.set(f"clave{i}", i)
+
+        # Leer la más antigua actualiza su último acceso
+        with mock.patch(
+            "gestion.cache.time.time", return_value=ahora + RESOLUCION_ACCESO + 10
+        ):
+            self.assertEqual(cache.get("clave0"), 0)
+            cache.set("clave4", 4)
+
+        self.assertEqual(cache.get("clave0"), 0)
+        self.assertIsNone(cache.get("clave1"))
+        self.assertIsNone(cache.get("clave2"))
+        self.assertEqual(cache.get("clave3"), 3)
+        self.assertEqual(cache.get("clave4"), 4)
+
+    def test_descarta_caducadas_primero(self):
+        cache = self.nueva(MAX_ENTRIES=2)
+        cache.set("caduca", 0, timeout=1)
+        cache.set("a", 1)
+        with mock.patch("gestion.cache.time.time", return_value=time.time() + 2):
+            cache.set("b", 2)
+            self.assertEqual(cache.get_many(["caduca", "a", "b"]), {"a": 1, "b": 2})
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class InvalidacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_guardar_restriccion_invalida_formulario(self):
+        cache.set(CACHE_FORMULARIO_REGISTRO, "formulario")
+        restriccion = RestriccionAlimentaria.objects.create(nombre="Vegana")
+        self.assertIsNone(cache.get(CACHE_FORMULARIO_REGISTRO))
+
+        cache.set(CACHE_FORMULARIO_REGISTRO, "formulario")
+        restriccion.nombre = "Vegetariana"
+        restriccion.save()
+        self.assertIsNone(cache.get(CACHE_FORMULARIO_REGISTRO))
+
+    def test_borrar_restriccion_invalida_formulario(self):
+        restriccion = RestriccionAlimentaria.objects.create(nombre="Celíaca")
+        cache.set(CACHE_FORMULARIO_REGISTRO, "formulario")
+        restriccion.delete()
+        self.assertIsNone(cache.get(CACHE_FORMULARIO_REGISTRO))
+
+    def test_limpiarcache_solo_vacia_las_paginas(self):
+        cache.set(CACHE_FORMULARIO_REGISTRO, "formulario")
+        cache.set(CACHE_REGISTRO_CERRADO, "cerrado")
+        cache.set("metricas:escritura:reintentos", 3, timeout=None)
+
+        call_command("limpiarcache", stdout=mock.MagicMock())
+
+        self.assertIsNone(cache.get(CACHE_FORMULARIO_REGISTRO))
+        self.assertIsNone(cache.get(CACHE_REGISTRO_CERRADO))
+        self.assertEqual(cache.get("metricas:escritura:reintentos"), 3)
+
+    def test_limpiarcache_sube_la_version(self):
+        # Una página de la versión anterior que ya no está en PAGINAS_CACHEADAS
+        anterior = version_paginas()
+        cache.set("registro:antigua", "antigua", version=anterior)
+        call_command("limpiarcache", stdout=mock.MagicMock())
+
+        version = version_paginas()
+        self.assertNotEqual(version, anterior)
+        self.assertIsNone(cache.get("registro:antigua", version=version))
+
+        # La invalidación por señales usa la versión nueva
+        cache.set(CACHE_FORMULARIO_REGISTRO, "formulario", version=version)
+        RestriccionAlimentaria.objects.create(nombre="Vegana")
+        self.assertIsNone(cache.get(CACHE_FORMULARIO_REGISTRO, version=version))
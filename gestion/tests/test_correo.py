@@ -0,0 +1,204 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.correo import ESPERA_MAXIMA, encolar_correo
+from gestion.models import Correo, Participante
+from gestion.tests.utils import CACHE_LOCAL, crear_participante, datos_registro
+
+
+def enviar(**opciones):
+    call_command("enviarcorreos", una_vez=True, stdout=mock.MagicMock(), **opciones)
+
+
+class BackendInestable(locmem.EmailBackend):
+    """Pierde la conexión en los `fallos` primeros envíos. Una vez perdida, el resto
+    de envíos fallan hasta que se vuelve a abrir"""
+
+    fallos = 0
+    aperturas = 0
+
+    def open(self):
+        BackendInestable.aperturas += 1
+        self.rota = False
+        return True
+
+    def send_messages(self, messages):
+        if getattr(self, "rota", True):
+            raise OSError("Conexión cerrada")
+        if BackendInestable.fallos:
+            BackendInestable.fallos -= 1
+            self.rota = True
+            raise OSError("Conexión perdida")
+        return super().send_messages(messages)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class RegistroEncolaTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_registro_no_envia_en_la_peticion(self):
+        respuesta = self.client.post(reverse("registro"), datos_registro(1))
+        self.assertEqual(respuesta.status_code, 200)
+
+        participante = Participante.objects.get(correo="p1@example.com")
+        self.assertEqual(mail.outbox, [])
+        correo = Correo.objects.get()
+        self.assertEqual(correo.tipo, "VERIFICACION")
+        self.assertEqual(correo.persona_id, participante.pk)
+        self.assertEqual(correo.destinatario, "p1@example.com")
+        self.assertEqual(correo.estado, "PENDIENTE")
+
+        enviar()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["p1@example.com"])
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class EnviarCorreosTests(TestCase):
+    def setUp(self):
+        self.participante = crear_participante(1)
+
+    def encolar(self, tipo="VERIFICACION", **campos) -> Correo:
+        correo = encolar_correo(
+            tipo,
+            "Asunto",
+            "correo/verificacion_correo",
+            {"nombre": "Persona", "token": "abc", "host": "localhost"},
+            self.participante.correo,
+            persona=self.participante,
+            cabeceras={"Message-ID": "<prueba@localhost>"},
+        )
+        Correo.objects.filter(pk=correo.pk).update(**campos)
+        return correo
+
+    def test_envia_pendientes(self):
+        correo = self.encolar()
+        enviar()
+
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, "ENVIADO")
+        self.assertEqual(correo.intentos, 1)
+        self.assertIsNotNone(correo.fecha_envio)
+
+        mensaje = mail.outbox[0]
+        self.assertEqual(mensaje.subject, "Asunto")
+        self.assertEqual(mensaje.extra_headers["Message-ID"], "<prueba@localhost>")
+        self.assertEqual(mensaje.alternatives[0][1], "text/html")
+
+        # No se reenvía
+        enviar()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_respeta_proximo_intento(self):
+        self.encolar(fecha_proximo_intento=timezone.now() + timedelta(minutes=5))
+        enviar()
+        self.assertEqual(mail.outbox, [])
+
+    @mock.patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=OSError("Conexión rechazada"),
+    )
+    def test_fallo_reprograma_con_espera_exponencial(self, _):
+        correo = self.encolar()
+        for intento in (1, 2):
+            Correo.objects.filter(pk=correo.pk).update(
+                fecha_proximo_intento=timezone.now()
+            )
+            antes = timezone.now()
+            enviar(espera_base=60, max_intentos=5)
+
+            correo.refresh_from_db()
+            self.assertEqual(correo.estado, "PENDIENTE")
+            self.assertEqual(correo.intentos, intento)
+            self.assertEqual(correo.ultimo_error, "Conexión rechazada")
+            espera = timedelta(seconds=60 * 2 ** (intento - 1))
+            self.assertGreaterEqual(correo.fecha_proximo_intento, antes + espera)
+            self.assertLessEqual(
+                correo.fecha_proximo_intento, timezone.now() + espera * 1.1
+            )
+
+    @mock.patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=OSError("Conexión rechazada"),
+    )
+    def test_espera_maxima(self, _):
+        correo = self.encolar(intentos=20)
+        enviar(espera_base=60, max_intentos=50)
+
+        correo.refresh_from_db()
+        self.assertLessEqual(
+            correo.fecha_proximo_intento, timezone.now() + ESPERA_MAXIMA * 1.1
+        )
+
+    @mock.patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=OSError("Buzón inexistente"),
+    )
+    def test_fallo_definitivo_marca_al_participante(self, _):
+        correo = self.encolar(intentos=2)
+        enviar(max_intentos=3)
+
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, "ERROR")
+        self.participante.refresh_from_db()
+        self.assertEqual(
+            self.participante.motivo_error_correo_verificacion, "Buzón inexistente"
+        )
+        self.assertEqual(self.participante.estado, "ERROR_VERIFICACION")
+
+    @mock.patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=OSError("Buzón inexistente"),
+    )
+    def test_fallo_definitivo_de_otros_tipos(self, _):
+        self.encolar("VERIFICACION_CORRECTA", intentos=2)
+        enviar(max_intentos=3)
+
+        self.participante.refresh_from_db()
+        self.assertIsNone(self.participante.motivo_error_correo_verificacion)
+        self.assertEqual(self.participante.estado, "REGISTRADO")
+
+    @mock.patch(
+        "django.core.mail.backends.locmem.EmailBackend.open",
+        side_effect=OSError("Sin conexión"),
+    )
+    def test_fallo_al_conectar(self, _):
+        primero, segundo = self.encolar(), self.encolar()
+        enviar()
+
+        for correo in (primero, segundo):
+            correo.refresh_from_db()
+            self.assertEqual(correo.intentos, 1)
+            self.assertEqual(correo.ultimo_error, "Sin conexión")
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(EMAIL_BACKEND="gestion.tests.test_correo.BackendInestable")
+    def test_reabre_la_conexion_tras_un_fallo(self):
+        BackendInestable.fallos, BackendInestable.aperturas = 1, 0
+        primero, *resto = self.encolar(), self.encolar(), self.encolar()
+        enviar()
+
+        primero.refresh_from_db()
+        self.assertEqual(primero.estado, "PENDIENTE")
+        self.assertEqual(primero.ultimo_error, "Conexión perdida")
+        for correo in resto:
+            correo.refresh_from_db()
+            self.assertEqual(correo.estado, "ENVIADO")
+            self.assertEqual(correo.intentos, 1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(BackendInestable.aperturas, 2)
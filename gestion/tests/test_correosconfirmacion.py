@@ -0,0 +1,234 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from gestion.correo import LimitadorTasa, enviar_en_paralelo
+from gestion.models import Campana, EnvioCampana, Token
+from gestion.tests.utils import CACHE_LOCAL, crear_participante, crear_token
+
+BACKEND_CONTADOR = "gestion.tests.test_correosconfirmacion.BackendContador"
+
+
+class BackendContador(EmailBackend):
+    """locmem que cuenta las conexiones abiertas y falla con los destinatarios
+    de `rechazados`"""
+
+    aperturas = 0
+    rechazados = set()
+    lock = threading.Lock()
+
+    def open(self):
+        with self.lock:
+            BackendContador.aperturas += 1
+        return True
+
+    def send_messages(self, messages):
+        for mensaje in messages:
+            if set(mensaje.to) & self.rechazados:
+                raise OSError(f"Rechazado: {mensaje.to[0]}")
+        return super().send_messages(messages)
+
+
+def mensajes(n: int) -> list[EmailMessage]:
+    return [
+        EmailMessage(f"Prueba {i}", "Cuerpo", to=[f"p{i}@example.com"])
+        for i in range(n)
+    ]
+
+
+@override_settings(EMAIL_BACKEND=BACKEND_CONTADOR)
+class EnvioParaleloTests(SimpleTestCase):
+    def setUp(self):
+        BackendContador.aperturas = 0
+        BackendContador.rechazados = set()
+
+    def test_reutiliza_una_conexion_por_lote(self):
+        resumen = enviar_en_paralelo(mensajes(10), hilos=2, tamano_lote=4)
+
+        self.assertEqual((resumen.enviados, resumen.fallidos), (10, 0))
+        self.assertEqual(len(mail.outbox), 10)
+        self.assertEqual(BackendContador.aperturas, 3)
+
+    def test_fallo_reabre_la_conexion(self):
+        BackendContador.rechazados = {"p1@example.com"}
+        avisos = {}
+        resumen = enviar_en_paralelo(
+            mensajes(4),
+            hilos=1,
+            tamano_lote=4,
+            al_enviar=lambda indice, error: avisos.__setitem__(indice, error),
+        )
+
+        self.assertEqual((resumen.enviados, resumen.fallidos), (3, 1))
+        self.assertEqual(set(resumen.errores), {1})
+        self.assertEqual(BackendContador.aperturas, 2)
+        self.assertEqual(sorted(avisos), [0, 1, 2, 3])
+        self.assertIsInstance(avisos[1], OSError)
+        self.assertIsNone(avisos[2])
+
+    def test_limite_por_segundo(self):
+        inicio = time.monotonic()
+        resumen = enviar_en_paralelo(
+            mensajes(5), hilos=3, tamano_lote=1, por_segundo=20
+        )
+
+        # Cuatro intervalos de 50 ms entre los cinco envíos, aunque haya tres hilos
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.2)
+        self.assertEqual(resumen.enviados, 5)
+        self.assertGreater(resumen.por_segundo, 0)
+
+
+class LimitadorTasaTests(SimpleTestCase):
+    def test_sin_limite_no_espera(self):
+        limitador = LimitadorTasa(None)
+        inicio = time.monotonic()
+        for _ in range(100):
+            limitador.esperar()
+        self.assertLess(time.monotonic() - inicio, 0.05)
+
+    def test_reparte_los_turnos(self):
+        limitador = LimitadorTasa(50)
+        inicio = time.monotonic()
+        for _ in range(6):
+            limitador.esperar()
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.1)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CorreosConfirmacionTests(TestCase):
+    def ejecutar(self, **opciones) -> str:
+        salida = StringIO()
+        call_command("correosconfirmacion", por_minuto=0, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_envia_a_los_aceptados_y_resume(self):
+        ahora = timezone.now()
+        aceptados = [crear_participante(i, fecha_aceptacion=ahora) for i in range(3)]
+        crear_participante(10, fecha_verificacion_correo=ahora)
+        crear_participante(11, fecha_aceptacion=ahora, fecha_confirmacion_plaza=ahora)
+
+        salida = self.ejecutar()
+
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            sorted(p.correo for p in aceptados),
+        )
+        self.assertIn("Enviados: 3. Fallidos: 0.", salida)
+        self.assertIn("mensajes/s", salida)
+
+
+@override_settings(CACHES=CACHE_LOCAL, EMAIL_BACKEND=BACKEND_CONTADOR)
+class CampanaReanudableTests(TestCase):
+    def setUp(self):
+        BackendContador.rechazados = set()
+        ahora = timezone.now()
+        self.aceptados = [
+            crear_participante(i, fecha_aceptacion=ahora) for i in range(3)
+        ]
+
+    def ejecutar(self, **opciones) -> str:
+        salida = StringIO()
+        call_command(
+            "correosconfirmacion",
+            campana="prueba",
+            por_minuto=0,
+            reintentos=0,
+            stdout=salida,
+            **opciones,
+        )
+        return salida.getvalue()
+
+    def test_reanudar_solo_envia_los_pendientes(self):
+        BackendContador.rechazados = {"p1@example.com"}
+        salida = self.ejecutar()
+        self.assertIn("Enviados: 2. Fallidos: 1.", salida)
+        campana = Campana.objects.get(nombre="prueba")
+        self.assertIsNone(campana.fecha_fin)
+        self.assertEqual(
+            campana.envios.get(persona__correo="p1@example.com").estado, "ERROR"
+        )
+        token_fallido = Token.objects.get(persona__correo="p1@example.com")
+
+        BackendContador.rechazados = set()
+        mail.outbox.clear()
+        salida = self.ejecutar()
+
+        self.assertIn("2 participantes ya tenían el correo", salida)
+        self.assertEqual([m.to for m in mail.outbox], [["p1@example.com"]])
+        # Mismo token que en el primer intento
+        self.assertEqual(Token.objects.filter(tipo="CONFIRMACION").count(), 3)
+        self.assertIn(
+            str(token_fallido.token), mail.outbox[0].extra_headers["Message-ID"]
+        )
+
+        campana.refresh_from_db()
+        self.assertIsNotNone(campana.fecha_fin)
+        self.assertFalse(campana.envios.exclude(estado="ENVIADO").exists())
+
+        mail.outbox.clear()
+        self.assertIn("Enviados: 0. Fallidos: 0.", self.ejecutar())
+        self.assertEqual(mail.outbox, [])
+
+    def test_tokens_de_golpe_y_reutilizados(self):
+        vigente = crear_token(self.aceptados[0], "CONFIRMACION", 3)
+        crear_token(self.aceptados[1], "CONFIRMACION", -1)
+
+        # Una consulta para todos los tokens, no una por participante
+        with CaptureQueriesContext(connection) as consultas:
+            salida = self.ejecutar()
+        inserciones = [
+            c["sql"]
+            for c in consultas
+            if c["sql"].startswith('INSERT INTO "gestion_token"')
+        ]
+        self.assertEqual(len(inserciones), 1)
+        self.assertIn("1 tokens reutilizados, 2 creados", salida)
+
+        envio = EnvioCampana.objects.get(persona=self.aceptados[0])
+        self.assertEqual(envio.token, vigente)
+        self.assertEqual(
+            Token.objects.filter(tipo="CONFIRMACION", fecha_uso__isnull=True).count(),
+            4,
+        )
+
+    def test_token_caducado_se_sustituye(self):
+        BackendContador.rechazados = {"p0@example.com"}
+        self.ejecutar()
+        envio = EnvioCampana.objects.get(persona=self.aceptados[0])
+        Token.objects.filter(pk=envio.token_id).update(
+            fecha_expiracion=timezone.now() - timedelta(minutes=1)
+        )
+
+        BackendContador.rechazados = set()
+        self.ejecutar()
+
+        envio.refresh_from_db()
+        self.assertEqual(envio.estado, "ENVIADO")
+        self.assertGreater(envio.token.fecha_expiracion, timezone.now())
+
+    def test_nuevos_aceptados_se_anaden(self):
+        self.ejecutar()
+        crear_participante(5, fecha_aceptacion=timezone.now())
+        mail.outbox.clear()
+
+        salida = self.ejecutar()
+
+        self.assertIn("1 destinatarios nuevos", salida)
+        self.assertEqual([m.to for m in mail.outbox], [["p5@example.com"]])
+
+    def test_expiracion_pasada(self):
+        with self.assertRaises(CommandError):
+            self.ejecutar(expiracion="2000-01-01T00:00")
+        self.assertFalse(Campana.objects.exists())
@@ -0,0 +1,160 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.models import Participante
+from gestion.tests.utils import CACHE_LOCAL, crear_participante
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class EstadoTests(TestCase):
+    def test_transiciones_al_guardar(self):
+        participante = crear_participante(1)
+        self.assertEqual(participante.estado, "REGISTRADO")
+
+        pasos = [
+            ("motivo_error_correo_verificacion", "Buzón lleno", "ERROR_VERIFICACION"),
+            ("fecha_verificacion_correo", timezone.now(), "VERIFICADO"),
+            ("fecha_aceptacion", timezone.now(), "ACEPTADO"),
+            ("fecha_confirmacion_plaza", timezone.now(), "CONFIRMADO"),
+            ("fecha_rechazo_plaza", timezone.now(), "RECHAZO"),
+        ]
+        for campo, valor, estado in pasos:
+            setattr(participante, campo, valor)
+            # Aunque no esté en update_fields, el estado también se guarda
+            participante.save(update_fields=[campo])
+            self.assertEqual(
+                Participante.objects.get(pk=participante.pk).estado, estado
+            )
+
+    def test_update_fields_incluye_modificado(self):
+        participante = crear_participante(1)
+        antes = participante.modificado
+        participante.fecha_verificacion_correo = timezone.now()
+        participante.save(update_fields=["fecha_verificacion_correo"])
+
+        participante.refresh_from_db()
+        self.assertGreater(participante.modificado, antes)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class EstadoAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "", "x"))
+        ahora = timezone.now()
+        self.registrado = crear_participante(1)
+        self.verificado = crear_participante(2, fecha_verificacion_correo=ahora)
+        self.confirmado = crear_participante(
+            3,
+            fecha_verificacion_correo=ahora,
+            fecha_aceptacion=ahora,
+            fecha_confirmacion_plaza=ahora,
+        )
+
+    def test_aceptar_solo_verificados(self):
+        self.client.post(
+            reverse("admin:gestion_participante_changelist"),
+            {
+                "action": "aceptar_participante",
+                ACTION_CHECKBOX_NAME: [
+                    self.registrado.pk,
+                    self.verificado.pk,
+                    self.confirmado.pk,
+                ],
+            },
+        )
+
+        self.assertEqual(
+            dict(Participante.objects.values_list("correo", "estado")),
+            {
+                "p1@example.com": "REGISTRADO",
+                "p2@example.com": "ACEPTADO",
+                "p3@example.com": "CONFIRMADO",
+            },
+        )
+        self.verificado.refresh_from_db()
+        self.assertIsNotNone(self.verificado.fecha_aceptacion)
+
+    def test_filtro_por_estado(self):
+        respuesta = self.client.get(
+            reverse("admin:gestion_participante_changelist"), {"estado": "VERIFICADO"}
+        )
+        self.assertEqual(
+            [p.pk for p in respuesta.context["cl"].result_list], [self.verificado.pk]
+        )
+
+    def test_embudo(self):
+        respuesta = self.client.get(reverse("gestion"))
+        embudo = dict(respuesta.context["embudo"])
+        self.assertEqual(embudo["Registrado (sin verificar correo)"], 1)
+        self.assertEqual(embudo["Correo verificado"], 1)
+        self.assertEqual(embudo["Plaza confirmada"], 1)
+        self.assertEqual(embudo["Aceptado"], 0)
+
+    def test_embudo_sin_permiso(self):
+        self.client.force_login(User.objects.create_user("puesto"))
+        respuesta = self.client.get(reverse("gestion"))
+        self.assertIsNone(respuesta.context["embudo"])
+
+
+class RellenarEstadoMigracionTests(TransactionTestCase):
+    antes = [("gestion", "0004_campana")]
+    despues = [("gestion", "0005_persona_estado")]
+
+    def migrar(self, objetivo):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(objetivo)
+        return executor.loader.project_state(objetivo).apps
+
+    def tearDown(self):
+        self.migrar(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_calcula_el_estado_de_las_fechas(self):
+        apps = self.migrar(self.antes)
+        Persona = apps.get_model("gestion", "Persona")
+        ahora = timezone.now()
+        personas = (
+            ("registrado@example.com", {}),
+            ("error@example.com", {"motivo_error_correo_verificacion": "x"}),
+            ("verificado@example.com", {"fecha_verificacion_correo": ahora}),
+            (
+                "aceptado@example.com",
+                {"fecha_verificacion_correo": ahora, "fecha_aceptacion": ahora},
+            ),
+            (
+                "confirmado@example.com",
+                {"fecha_aceptacion": ahora, "fecha_confirmacion_plaza": ahora},
+            ),
+            (
+                "rechazo@example.com",
+                {"fecha_aceptacion": ahora, "fecha_rechazo_plaza": ahora},
+            ),
+        )
+        for n, (correo, campos) in enumerate(personas):
+            Persona.objects.create(
+                correo=correo, nombre=correo, dni=f"{n:08d}A", **campos
+            )
+
+        apps = self.migrar(self.despues)
+        Persona = apps.get_model("gestion", "Persona")
+        self.assertEqual(
+            {
+                correo.split("@")[0]: estado
+                for correo, estado in Persona.objects.values_list("correo", "estado")
+            },
+            {
+                "registrado": "REGISTRADO",
+                "error": "ERROR_VERIFICACION",
+                "verificado": "VERIFICADO",
+                "aceptado": "ACEPTADO",
+                "confirmado": "CONFIRMADO",
+                "rechazo": "RECHAZO",
+            },
+        )
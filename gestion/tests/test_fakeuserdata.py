@@ -0,0 +1,134 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from gestion.acreditaciones import codigo_valido
+from gestion.models import (
+    Mentor,
+    Participante,
+    Pase,
+    Patrocinador,
+    Persona,
+    Presencia,
+    Token,
+)
+from gestion.tests.utils import CACHE_LOCAL
+
+AHORA = "2027-01-25T12:00:00+01:00"
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class FakeUserDataTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.media = directorio.name
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def generar(self, cantidad=200, **opciones) -> str:
+        salida = StringIO()
+        call_command(
+            "fakeuserdata",
+            cantidad,
+            semilla=opciones.pop("semilla", 1),
+            ahora=AHORA,
+            stdout=salida,
+            **opciones,
+        )
+        return salida.getvalue()
+
+    def instantanea(self):
+        return (
+            list(
+                Persona.objects.order_by("pk").values_list(
+                    "correo", "dni", "estado", "acreditacion", "fecha_registro"
+                )
+            ),
+            list(Token.objects.order_by("token").values_list("token", "fecha_uso")),
+            Presencia.objects.count(),
+            Pase.objects.count(),
+        )
+
+    def test_evento_completo(self):
+        salida = self.generar(200, mentores=5, patrocinadores=3)
+
+        self.assertEqual(Participante.objects.count(), 200)
+        self.assertEqual(Mentor.objects.count(), 5)
+        self.assertEqual(Patrocinador.objects.count(), 3)
+        self.assertIn("filas creadas", salida)
+
+        # El estado guardado es el que corresponde a las fechas
+        for participante in Participante.objects.all():
+            self.assertEqual(participante.estado, participante.calcular_estado())
+        self.assertEqual(
+            set(Participante.objects.values_list("estado", flat=True)),
+            {
+                "REGISTRADO",
+                "ERROR_VERIFICACION",
+                "VERIFICADO",
+                "ACEPTADO",
+                "CONFIRMADO",
+                "RECHAZO",
+            },
+        )
+
+        ahora = datetime.fromisoformat(AHORA)
+        tokens = Token.objects.all()
+        self.assertTrue(tokens.filter(fecha_uso__isnull=False).exists())
+        self.assertTrue(
+            tokens.filter(fecha_uso__isnull=True, fecha_expiracion__lt=ahora).exists()
+        )
+        self.assertTrue(
+            tokens.filter(fecha_uso__isnull=True, fecha_expiracion__gt=ahora).exists()
+        )
+
+        acreditaciones = [
+            *Persona.objects.exclude(acreditacion=None).values_list(
+                "acreditacion", flat=True
+            ),
+            *Patrocinador.objects.values_list("acreditacion", flat=True),
+        ]
+        self.assertTrue(all(codigo_valido(codigo) for codigo in acreditaciones))
+        self.assertFalse(Mentor.objects.filter(acreditacion=None).exists())
+        self.assertTrue(Presencia.objects.filter(salida=None).exists())
+        self.assertTrue(Pase.objects.exists())
+
+        for participante in Participante.objects.all()[:5]:
+            self.assertTrue(
+                os.path.exists(os.path.join(settings.MEDIA_ROOT, participante.cv.name))
+            )
+
+    def test_semilla_reproducible(self):
+        self.generar(60, lote=25)
+        primera = self.instantanea()
+
+        Persona.objects.all().delete()
+        Patrocinador.objects.all().delete()
+        self.generar(60)
+
+        self.assertEqual(self.instantanea(), primera)
+
+    def test_insercion_por_tablas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.generar(300, lote=100, sin_cv=True)
+
+        inserciones = [c for c in consultas if c["sql"].startswith("INSERT INTO")]
+        # Una inserción por tabla y lote (más los tipos de pase), no una por fila
+        self.assertLess(len(inserciones), 60)
+        self.assertEqual(os.listdir(self.media), [])
+
+    def test_continua_la_numeracion(self):
+        self.generar(20, mentores=0, patrocinadores=0)
+        self.generar(20, mentores=0, patrocinadores=0, semilla=2)
+        self.assertEqual(Participante.objects.count(), 40)
@@ -0,0 +1,183 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion import kioscos
+from gestion.models import Pase, Presencia, RestriccionAlimentaria, TipoPase
+from gestion.tests.utils import CACHE_LOCAL, crear_participante
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class SincronizacionTests(TestCase):
+    def setUp(self):
+        ahora = timezone.now()
+        self.acreditado = crear_participante(
+            1, fecha_aceptacion=ahora, acreditacion="000013"
+        )
+        self.aceptado = crear_participante(2, fecha_aceptacion=ahora)
+        self.tipo = TipoPase.objects.create(
+            nombre="Comida", inicio_validez=ahora - timedelta(hours=1)
+        )
+        self.hace = lambda segundos: (ahora - timedelta(seconds=segundos)).isoformat()
+
+    def test_aplica_y_repetir_el_lote_no_duplica(self):
+        eventos = [
+            {
+                "id": 1,
+                "tipo": "entrada",
+                "acreditacion": "000013",
+                "fecha": self.hace(60),
+            },
+            {
+                "id": 2,
+                "tipo": "pase",
+                "acreditacion": "000013",
+                "tipo_pase": self.tipo.pk,
+                "fecha": self.hace(50),
+            },
+            {
+                "id": 3,
+                "tipo": "alta",
+                "correo": self.aceptado.correo,
+                "acreditacion": "000021",
+                "fecha": self.hace(40),
+            },
+            {
+                "id": 4,
+                "tipo": "salida",
+                "acreditacion": "000013",
+                "fecha": self.hace(30),
+            },
+        ]
+
+        primera = kioscos.sincronizar(eventos, "puesto 1")
+        self.assertEqual({r["resultado"] for r in primera}, {"APLICADO"})
+        segunda = kioscos.sincronizar(eventos, "puesto 1")
+        self.assertEqual({r["resultado"] for r in segunda}, {"DUPLICADO"})
+
+        self.assertEqual(Pase.objects.count(), 1)
+        presencia = Presencia.objects.get()
+        self.assertIsNotNone(presencia.entrada)
+        self.assertIsNotNone(presencia.salida)
+        self.aceptado.refresh_from_db()
+        self.assertEqual(self.aceptado.acreditacion, "000021")
+
+    def test_errores_y_conflictos(self):
+        resultados = kioscos.sincronizar(
+            [
+                {
+                    "id": 1,
+                    "tipo": "otro",
+                    "acreditacion": "000013",
+                    "fecha": self.hace(1),
+                },
+                {"id": 2, "tipo": "entrada", "acreditacion": "000013", "fecha": "ayer"},
+                {
+                    "id": 3,
+                    "tipo": "entrada",
+                    "acreditacion": "999999",
+                    "fecha": self.hace(1),
+                },
+                {
+                    "id": 4,
+                    "tipo": "alta",
+                    "correo": self.aceptado.correo,
+                    "acreditacion": "000013",
+                    "fecha": self.hace(1),
+                },
+            ]
+        )
+        self.assertEqual(
+            [r["resultado"] for r in resultados],
+            ["ERROR", "ERROR", "CONFLICTO", "CONFLICTO"],
+        )
+        self.assertEqual(resultados[3]["detalle"], "EN_USO")
+
+    def test_una_transaccion_por_bloque(self):
+        eventos = [
+            {
+                "id": i,
+                "tipo": "entrada",
+                "acreditacion": "000013",
+                "fecha": self.hace(10 * i + 10),
+            }
+            for i in range(450)
+        ]
+        with mock.patch.object(kioscos, "_aplicar", wraps=kioscos._aplicar) as aplicar:
+            resultados = kioscos.sincronizar(eventos)
+
+        self.assertEqual(aplicar.call_count, 3)
+        self.assertEqual(
+            [len(llamada.args[0]) for llamada in aplicar.call_args_list], [200, 200, 50]
+        )
+        self.assertEqual({r["resultado"] for r in resultados}, {"APLICADO"})
+        self.assertEqual(Presencia.objects.count(), 450)
+        # En orden cronológico entre bloques
+        self.assertEqual([r["id"] for r in resultados], list(range(450)))
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class InstantaneaTests(TestCase):
+    def setUp(self):
+        crear_participante(1, fecha_aceptacion=timezone.now(), acreditacion="000013")
+        crear_participante(2)
+        self.tipo = TipoPase.objects.create(
+            nombre="Cena", inicio_validez=timezone.now()
+        )
+
+    def test_contiene_solo_los_acreditables(self):
+        instantanea = kioscos.construir_instantanea()
+        self.assertEqual(
+            [persona[0] for persona in instantanea["personas"]], ["p1@example.com"]
+        )
+        self.assertEqual(instantanea["etag"], kioscos.version_instantanea())
+
+    def test_consultas(self):
+        with self.assertNumQueries(4):
+            version = kioscos.version_instantanea()
+        with self.assertNumQueries(5):
+            kioscos.construir_instantanea(version=version)
+
+    def test_la_vista_calcula_la_version_una_vez(self):
+        self.client.force_login(User.objects.create_superuser("admin", "", "x"))
+        with mock.patch(
+            "gestion.views.version_instantanea", wraps=kioscos.version_instantanea
+        ) as version:
+            respuesta = self.client.get(reverse("api-instantanea"))
+
+        self.assertEqual(version.call_count, 1)
+        self.assertEqual(respuesta.headers["ETag"], f'"{respuesta.json()["etag"]}-1"')
+
+    def test_la_version_cambia_al_editar_tipos_y_restricciones(self):
+        version = kioscos.version_instantanea()
+        self.tipo.nombre = "Cena día 1"
+        self.tipo.save()
+        self.assertNotEqual(kioscos.version_instantanea(), version)
+
+        version = kioscos.version_instantanea()
+        restriccion = RestriccionAlimentaria.objects.create(nombre="Vegana")
+        self.assertNotEqual(kioscos.version_instantanea(), version)
+        version = kioscos.version_instantanea()
+        restriccion.nombre = "Vegetariana"
+        restriccion.save()
+        self.assertNotEqual(kioscos.version_instantanea(), version)
+
+    def test_etag(self):
+        self.client.force_login(User.objects.create_superuser("admin", "", "x"))
+        respuesta = self.client.get(reverse("api-instantanea"))
+        self.assertEqual(respuesta.status_code, 200)
+
+        etag = respuesta.headers["ETag"]
+        respuesta = self.client.get(reverse("api-instantanea"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+
+        self.tipo.inicio_validez += timedelta(hours=1)
+        self.tipo.save()
+        respuesta = self.client.get(reverse("api-instantanea"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
@@ -0,0 +1,90 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from gestion.tests.utils import CACHE_LOCAL
+
+
+@override_settings(
+    CACHES=CACHE_LOCAL,
+    LIMITES_TASA={"registro:POST": (2, 600), "registro": (3, 60)},
+    LIMITES_TASA_PROXIES=["10.0.0.1"],
+    LIMITES_TASA_EXENTAS=["10.0.0.9"],
+)
+class LimiteTasaTests(TestCase):
+    def setUp(self):
+        caches["limites"].clear()
+        self.url = reverse("registro")
+
+    def get(self, ip="192.0.2.1", **cabeceras):
+        return self.client.get(self.url, REMOTE_ADDR=ip, **cabeceras)
+
+    def test_supera_el_limite(self):
+        for _ in range(3):
+            self.assertEqual(self.get().status_code, 200)
+
+        respuesta = self.get()
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertTrue(0 < int(respuesta["Retry-After"]) <= 60)
+
+    def test_rechazo_sin_consultas(self):
+        for _ in range(3):
+            self.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().status_code, 429)
+
+    def test_limite_por_ip(self):
+        for _ in range(3):
+            self.get()
+        self.assertEqual(self.get().status_code, 429)
+        self.assertEqual(self.get(ip="192.0.2.2").status_code, 200)
+
+    def test_limite_por_metodo(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.client.post(self.url, REMOTE_ADDR="192.0.2.1").status_code, 200
+            )
+        self.assertEqual(
+            self.client.post(self.url, REMOTE_ADDR="192.0.2.1").status_code, 429
+        )
+        # El límite del POST no consume el del GET
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_ip_reenviada_por_proxy(self):
+        for _ in range(3):
+            self.get(ip="10.0.0.1", HTTP_X_FORWARDED_FOR="1.1.1.1, 192.0.2.5")
+        self.assertEqual(
+            self.get(ip="10.0.0.1", HTTP_X_FORWARDED_FOR="192.0.2.5").status_code, 429
+        )
+        # Otra IP detrás del mismo proxy
+        self.assertEqual(
+            self.get(ip="10.0.0.1", HTTP_X_FORWARDED_FOR="192.0.2.6").status_code, 200
+        )
+
+    def test_x_forwarded_for_sin_proxy_se_ignora(self):
+        for i in range(3):
+            self.get(HTTP_X_FORWARDED_FOR=f"192.0.2.{100 + i}")
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR="192.0.2.200").status_code, 429)
+
+    def test_ip_exenta(self):
+        for _ in range(10):
+            self.assertEqual(self.get(ip="10.0.0.9").status_code, 200)
+
+    def test_ventana_deslizante(self):
+        inicio = 60 * 1000
+        with mock.patch("gestion.middleware.time.time", return_value=inicio + 59):
+            for _ in range(3):
+                self.get()
+
+        # A mitad de la ventana siguiente cuenta la mitad de la anterior
+        with mock.patch("gestion.middleware.time.time", return_value=inicio + 90):
+            self.assertEqual(self.get().status_code, 200)
+            self.assertEqual(self.get().status_code, 429)
+
+        with mock.patch("gestion.middleware.time.time", return_value=inicio + 180):
+            self.assertEqual(self.get().status_code, 200)
@@ -0,0 +1,70 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from gestion.models import Token
+from gestion.tests.utils import CACHE_LOCAL, crear_participante, crear_token
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class LimpiarTokensTests(TestCase):
+    def setUp(self):
+        ahora = timezone.now()
+        self.registrado = crear_participante(1)
+        self.verificado = crear_participante(2, fecha_verificacion_correo=ahora)
+        self.confirmado = crear_participante(
+            3,
+            fecha_verificacion_correo=ahora,
+            fecha_aceptacion=ahora,
+            fecha_confirmacion_plaza=ahora,
+        )
+        self.rechazado = crear_participante(
+            4, fecha_aceptacion=ahora, fecha_rechazo_plaza=ahora
+        )
+        hace_un_mes = ahora - timedelta(days=30)
+
+        self.caducado = crear_token(self.registrado, "VERIFICACION", -30)
+        self.vigente = crear_token(self.registrado, "VERIFICACION", 1)
+        self.verificacion_usada = crear_token(
+            self.verificado, "VERIFICACION", -30, fecha_uso=hace_un_mes
+        )
+        self.confirmacion = crear_token(self.confirmado, "CONFIRMACION", -30)
+        self.confirmacion_usada = crear_token(
+            self.confirmado, "CONFIRMACION", -30, fecha_uso=hace_un_mes
+        )
+        self.confirmacion_rechazo = crear_token(self.rechazado, "CONFIRMACION", -30)
+
+    def limpiar(self, *args) -> set:
+        call_command("limpiartokens", "--pausa", "0", *args, stdout=StringIO())
+        return set(Token.objects.values_list("pk", flat=True))
+
+    def test_borra_solo_los_caducados_sin_usar(self):
+        quedan = self.limpiar()
+
+        self.assertNotIn(self.caducado.pk, quedan)
+        self.assertNotIn(self.confirmacion_rechazo.pk, quedan)
+        self.assertIn(self.vigente.pk, quedan)
+        # 'Ver tus datos' del correo de verificación
+        self.assertIn(self.verificacion_usada.pk, quedan)
+
+    def test_conserva_la_confirmacion_de_aceptados_y_confirmados(self):
+        self.assertIn(self.confirmacion.pk, self.limpiar())
+        quedan = self.limpiar("--usados")
+        self.assertIn(self.confirmacion.pk, quedan)
+        self.assertIn(self.confirmacion_usada.pk, quedan)
+
+    def test_usados(self):
+        quedan = self.limpiar("--usados")
+
+        self.assertNotIn(self.verificacion_usada.pk, quedan)
+        self.assertIn(self.vigente.pk, quedan)
+
+    def test_simular_no_borra(self):
+        antes = Token.objects.count()
+        self.limpiar("--simular")
+        self.assertEqual(Token.objects.count(), antes)
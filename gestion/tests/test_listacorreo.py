@@ -0,0 +1,322 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import csv
+import gzip
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from gestion.listmonk import consulta_correos
+from gestion.management.commands.listacorreo import abrir_salida
+from gestion.models import Participante, ParticipanteBorrado, RestriccionAlimentaria
+from gestion.tests.utils import CACHE_LOCAL, crear_participante
+
+
+def leer_csv(ruta: Path) -> list[dict]:
+    abrir = gzip.open if ruta.read_bytes()[:2] == b"\x1f\x8b" else open
+    with abrir(ruta, "rt", newline="") as archivo:
+        return list(csv.DictReader(archivo))
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ListaCorreoTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+
+    def exportar(self, archivo="lista.csv", **opciones) -> Path:
+        ruta = self.directorio / archivo
+        call_command("listacorreo", output=str(ruta), stdout=StringIO(), **opciones)
+        return ruta
+
+    def test_atributos_json_validos(self):
+        crear_participante(1, nombre='Ana "la Rápida" O\'Neil', talla_camiseta="M")
+
+        (fila,) = leer_csv(self.exportar())
+
+        self.assertEqual(fila["email"], "p1@example.com")
+        self.assertEqual(fila["name"], 'Ana "la Rápida" O\'Neil')
+        self.assertEqual(json.loads(fila["attributes"]), {"talla_camiseta": "M"})
+
+    def test_gzip(self):
+        crear_participante(1)
+        for ruta in (
+            self.exportar("lista.csv.gz"),
+            self.exportar("lista.csv", gzip=True),
+        ):
+            with self.subTest(ruta=ruta):
+                self.assertEqual(ruta.read_bytes()[:2], b"\x1f\x8b")
+                self.assertEqual(len(leer_csv(ruta)), 1)
+
+    def test_restricciones_sin_una_consulta_por_fila(self):
+        vegana = RestriccionAlimentaria.objects.create(nombre="Vegana")
+        celiaca = RestriccionAlimentaria.objects.create(nombre="Celíaca")
+
+        def consultas(desde: int, hasta: int) -> int:
+            for i in range(desde, hasta):
+                crear_participante(i).restricciones_alimentarias.set([vegana, celiaca])
+            with CaptureQueriesContext(connection) as capturadas:
+                self.exportar(restricciones=True, lote=1000)
+            return len(capturadas)
+
+        self.assertEqual(consultas(0, 2), consultas(2, 10))
+
+        filas = leer_csv(self.directorio / "lista.csv")
+        self.assertEqual(len(filas), 10)
+        self.assertEqual(
+            json.loads(filas[0]["attributes"])["restricciones_alimentarias"],
+            ["Celíaca", "Vegana"],
+        )
+
+    def test_por_lotes(self):
+        for i in range(5):
+            crear_participante(i)
+        filas = leer_csv(self.exportar(lote=2))
+        self.assertEqual(
+            [f["email"] for f in filas], [f"p{i}@example.com" for i in range(5)]
+        )
+
+    def test_filtro_por_estado(self):
+        ahora = timezone.now()
+        crear_participante(1)
+        crear_participante(2, fecha_aceptacion=ahora)
+        crear_participante(3, fecha_aceptacion=ahora, fecha_confirmacion_plaza=ahora)
+
+        filas = leer_csv(self.exportar(estado=["ACEPTADO", "CONFIRMADO"]))
+        self.assertEqual(
+            sorted(f["email"] for f in filas), ["p2@example.com", "p3@example.com"]
+        )
+
+    def test_no_overwrite(self):
+        (self.directorio / "lista.csv").write_text("anterior")
+        with self.assertRaises(CommandError):
+            self.exportar(no_overwrite=True)
+        self.assertEqual((self.directorio / "lista.csv").read_text(), "anterior")
+
+    def test_un_error_no_deja_el_archivo_a_medias(self):
+        ruta = self.directorio / "lista.csv"
+        ruta.write_text("anterior")
+        with self.assertRaises(RuntimeError):
+            with abrir_salida(str(ruta)) as salida:
+                salida.write("nuevo")
+                raise RuntimeError()
+
+        self.assertEqual(ruta.read_text(), "anterior")
+        self.assertEqual(list(self.directorio.iterdir()), [ruta])
+
+
+class ListmonkFalso(BaseHTTPRequestHandler):
+    """Servidor de pruebas con la parte de la API de listmonk que usa el cliente.
+    Guarda las peticiones en `servidor.peticiones` como (método, ruta, cuerpo)"""
+
+    def responder(self, datos: dict, estado: int = 200):
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def registrar(self):
+        longitud = int(self.headers.get("Content-Length") or 0)
+        cuerpo = self.rfile.read(longitud)
+        self.server.peticiones.append((self.command, self.path, cuerpo))
+        if self.server.error:
+            self.responder({"message": "error"}, 500)
+            return False
+        return True
+
+    def do_GET(self):
+        if self.registrar():
+            self.responder({"data": {"status": "finished"}})
+
+    def do_POST(self):
+        if self.registrar():
+            self.responder({"data": True})
+
+    do_PUT = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES=CACHE_LOCAL, LISTMONK_LISTA=3)
+class ListaCorreoIncrementalTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), ListmonkFalso)
+        self.servidor.peticiones = []
+        self.servidor.error = False
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+        ahora = timezone.now()
+        self.participantes = [
+            crear_participante(i, fecha_aceptacion=ahora) for i in range(3)
+        ]
+
+    def exportar(self, **opciones) -> tuple[list[dict], list[dict], str]:
+        salida = StringIO()
+        call_command(
+            "listacorreo",
+            output=str(self.directorio / "lista.csv"),
+            marca=str(self.directorio / "marca.json"),
+            bajas=str(self.directorio / "bajas.csv"),
+            incremental=True,
+            stdout=salida,
+            **{"estado": ["ACEPTADO"], **opciones},
+        )
+        return (
+            leer_csv(self.directorio / "lista.csv"),
+            leer_csv(self.directorio / "bajas.csv"),
+            salida.getvalue(),
+        )
+
+    def test_solo_los_cambios(self):
+        filas, bajas, salida = self.exportar()
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(bajas, [])
+        self.assertIn("No existe", salida)
+
+        filas, bajas, _ = self.exportar()
+        self.assertEqual(filas, [])
+
+        participante = self.participantes[1]
+        participante.nombre = "Nuevo nombre"
+        participante.save()
+        filas, _, _ = self.exportar()
+        self.assertEqual(
+            [(f["email"], f["name"]) for f in filas],
+            [("p1@example.com", "Nuevo nombre")],
+        )
+
+    def test_bajas_y_borrados(self):
+        self.exportar()
+        confirmado, borrado = self.participantes[0], self.participantes[2]
+        confirmado.fecha_confirmacion_plaza = timezone.now()
+        confirmado.save()
+        borrado.delete()
+
+        _, bajas, _ = self.exportar()
+
+        self.assertEqual(
+            [(b["email"], b["accion"]) for b in bajas],
+            [("p0@example.com", "baja"), ("p2@example.com", "borrar")],
+        )
+        # La marca no guarda los correos exportados
+        marca = json.loads((self.directorio / "marca.json").read_text())
+        self.assertEqual(
+            marca,
+            {
+                "modificado": confirmado.modificado.isoformat(),
+                "correo": "p0@example.com",
+                "borrado": ParticipanteBorrado.objects.get().pk,
+                "estados": ["ACEPTADO"],
+            },
+        )
+
+        # Las bajas no se repiten
+        _, bajas, _ = self.exportar()
+        self.assertEqual(bajas, [])
+
+    def test_misma_fecha_de_modificacion(self):
+        # El correo desempata a los modificados en el mismo instante
+        modificado = timezone.now()
+        Participante.objects.update(modificado=modificado)
+        self.exportar(lote=1)
+        marca = self.directorio / "marca.json"
+        marca.write_text(
+            json.dumps(
+                {
+                    "modificado": modificado.isoformat(),
+                    "correo": "p0@example.com",
+                    "borrado": 0,
+                    "estados": ["ACEPTADO"],
+                }
+            )
+        )
+
+        filas, _, _ = self.exportar()
+        self.assertEqual(
+            [f["email"] for f in filas], ["p1@example.com", "p2@example.com"]
+        )
+        filas, _, _ = self.exportar()
+        self.assertEqual(filas, [])
+
+    def test_borrado_y_registrado_de_nuevo(self):
+        self.exportar()
+        self.participantes[2].delete()
+        crear_participante(2, fecha_aceptacion=timezone.now())
+
+        filas, bajas, _ = self.exportar()
+        self.assertEqual([f["email"] for f in filas], ["p2@example.com"])
+        self.assertEqual(bajas, [])
+
+    def test_cambio_de_estados_exporta_todo(self):
+        self.exportar()
+        filas, _, salida = self.exportar(estado=["ACEPTADO", "CONFIRMADO"])
+        self.assertEqual(len(filas), 3)
+        self.assertIn("Los estados exportados cambiaron", salida)
+
+    def test_enviar_a_listmonk(self):
+        self.exportar(enviar=True, url=self.url, lote_envio=2)
+        importaciones = [
+            cuerpo
+            for metodo, ruta, cuerpo in self.servidor.peticiones
+            if (metodo, ruta) == ("POST", "/api/import/subscribers")
+        ]
+        self.assertEqual(len(importaciones), 2)
+        self.assertIn(b'"lists": [3]', importaciones[0])
+        self.assertIn(b"p0@example.com", importaciones[0])
+        self.assertIn(b"p2@example.com", importaciones[1])
+
+        self.servidor.peticiones.clear()
+        self.participantes[0].fecha_confirmacion_plaza = timezone.now()
+        self.participantes[0].save()
+        self.participantes[2].delete()
+        self.exportar(enviar=True, url=self.url)
+
+        peticiones = {
+            (metodo, ruta): json.loads(cuerpo)
+            for metodo, ruta, cuerpo in self.servidor.peticiones
+            if cuerpo
+        }
+        self.assertEqual(
+            peticiones[("PUT", "/api/subscribers/query/lists")],
+            {
+                "query": "subscribers.email IN ('p0@example.com')",
+                "action": "unsubscribe",
+                "target_list_ids": [3],
+            },
+        )
+        self.assertEqual(
+            peticiones[("POST", "/api/subscribers/query/delete")],
+            {"query": "subscribers.email IN ('p2@example.com')"},
+        )
+
+    def test_error_de_listmonk_no_avanza_la_marca(self):
+        self.servidor.error = True
+        with self.assertRaises(CommandError):
+            self.exportar(enviar=True, url=self.url)
+        self.assertFalse((self.directorio / "marca.json").exists())
+
+    def test_consulta_escapa_las_comillas(self):
+        self.assertEqual(
+            consulta_correos(["a@example.com", "o'neil@example.com"]),
+            "subscribers.email IN ('a@example.com', 'o''neil@example.com')",
+        )
@@ -0,0 +1,152 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import re
+import tempfile
+from datetime import datetime
+from html.parser import HTMLParser
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, override_settings
+
+from gestion.plantillas_correo import (
+    _compiladas,
+    aplanar,
+    compilar,
+    incrustar_css,
+    minimizar_html,
+    plantilla_compilada,
+    plantillas,
+)
+
+PARAMETROS = {
+    "nombre": "Persona",
+    "token": "abc",
+    "host": "localhost",
+    "expiracion": datetime(2027, 2, 1),
+}
+
+
+class _Texto(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.partes = []
+
+    def handle_data(self, data):
+        self.partes.append(data)
+
+
+def texto_visible(html: str) -> str:
+    """Texto del HTML sin el <style> ni espacios, que el minimizado puede quitar
+    entre bloques"""
+    lector = _Texto()
+    lector.feed(re.sub(r"<style.*?</style>", "", html, flags=re.DOTALL))
+    return "".join("".join(lector.partes).split())
+
+
+class IncrustarCSSTests(SimpleTestCase):
+    def test_reglas_simples(self):
+        html = incrustar_css(
+            "<html><head><style>p { color: red; } .aviso { color: blue }"
+            " div p { margin: 0 }</style></head>"
+            '<body><div><p class="aviso">a</p></div><p>b</p></body></html>'
+        )
+
+        self.assertIn('<p class="aviso" style="color: blue; margin: 0">a</p>', html)
+        self.assertIn('<p style="color: red">b</p>', html)
+        self.assertNotIn("<style>", html)
+
+    def test_especificidad_y_estilo_en_linea(self):
+        html = incrustar_css(
+            "<style>#id { color: green } .c { color: blue } p { color: red }</style>"
+            '<p id="id" class="c">a</p><p class="c" style="color: black">b</p>'
+        )
+
+        self.assertIn('<p id="id" class="c" style="color: green">a</p>', html)
+        self.assertIn('<p class="c" style="color: black">b</p>', html)
+
+    def test_mantiene_lo_que_no_se_puede_incrustar(self):
+        html = incrustar_css(
+            "<style>p { color: red } a:hover { color: blue }"
+            " @media (max-width: 600px) { p { color: green } }</style><p>a</p>"
+        )
+
+        self.assertIn('<p style="color: red">a</p>', html)
+        self.assertIn("a:hover{color: blue}", html)
+        self.assertIn("@media (max-width: 600px){p { color: green }}", html)
+
+    def test_sin_estilos(self):
+        self.assertEqual(incrustar_css("<p>a</p>"), "<p>a</p>")
+
+
+class MinimizarHTMLTests(SimpleTestCase):
+    def test_quita_espacios_y_comentarios(self):
+        self.assertEqual(
+            minimizar_html("<div>\n    <!-- nota -->\n    <p>a   b</p>\n</div>"),
+            "<div><p>a b</p></div>",
+        )
+
+    def test_mantiene_los_comentarios_condicionales(self):
+        self.assertIn(
+            "<!--[if mso]>", minimizar_html("<!--[if mso]><p>a</p><![endif]-->")
+        )
+
+
+class PlantillasCompiladasTests(SimpleTestCase):
+    def setUp(self):
+        _compiladas.clear()
+
+    def test_aplanar_resuelve_el_marco(self):
+        codigo = aplanar("correo/confirmacion_plaza.html")
+        self.assertNotIn("{% extends", codigo)
+        self.assertNotIn("{% block", codigo)
+        self.assertIn("<!doctype html>", codigo)
+        self.assertIn("{{ nombre }}", codigo)
+
+    def test_mismo_contenido_que_sin_compilar(self):
+        for plantilla in plantillas():
+            with self.subTest(plantilla=plantilla):
+                texto, html = plantilla_compilada(plantilla)
+                original_html = render_to_string(f"{plantilla}.html", PARAMETROS)
+                original_texto = render_to_string(f"{plantilla}.txt", PARAMETROS)
+
+                compilado = html.render(PARAMETROS)
+                self.assertEqual(texto_visible(compilado), texto_visible(original_html))
+                self.assertLess(len(compilado), len(original_html))
+                self.assertEqual(texto.render(PARAMETROS), original_texto)
+
+    def test_se_compila_una_vez(self):
+        primera = plantilla_compilada("correo/verificacion_correo")
+        self.assertIs(plantilla_compilada("correo/verificacion_correo"), primera)
+
+    @override_settings(DEBUG=True)
+    def test_con_debug_se_recompila(self):
+        primera = plantilla_compilada("correo/verificacion_correo")
+        self.assertIsNot(plantilla_compilada("correo/verificacion_correo"), primera)
+
+    def test_plantillas(self):
+        self.assertEqual(
+            plantillas(),
+            [
+                "correo/confirmacion_plaza",
+                "correo/verificacion_correo",
+                "correo/verificacion_correo_correcta",
+            ],
+        )
+
+
+class CompilarCorreosTests(SimpleTestCase):
+    def test_guarda_las_compiladas(self):
+        salida = StringIO()
+        with tempfile.TemporaryDirectory() as directorio:
+            call_command("compilarcorreos", salida=directorio, stdout=salida)
+
+            texto, html = compilar("correo/confirmacion_plaza")
+            ruta = Path(directorio, "correo", "confirmacion_plaza")
+            self.assertEqual(ruta.with_suffix(".html").read_text(), html)
+            self.assertEqual(ruta.with_suffix(".txt").read_text(), texto)
+
+        self.assertIn("correo/confirmacion_plaza:", salida.getvalue())
+        self.assertIn("menos", salida.getvalue())
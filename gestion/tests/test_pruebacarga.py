@@ -0,0 +1,108 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+from django.http.multipartparser import MultiPartParser
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from gestion.management.commands.pruebacarga import (
+    PDF_SINTETICO,
+    Command,
+    multipart,
+)
+from gestion.models import Participante, Persona
+from gestion.tests.utils import CACHE_LOCAL
+
+
+class MultipartTests(SimpleTestCase):
+    def test_lo_lee_django(self):
+        cuerpo, tipo = multipart(
+            {"nombre": "Persona", "ciudad": "A Coruña"},
+            {"cv": ("cv.pdf", PDF_SINTETICO, "application/pdf")},
+        )
+        campos, archivos = MultiPartParser(
+            {"CONTENT_TYPE": tipo, "CONTENT_LENGTH": len(cuerpo)},
+            BytesIO(cuerpo),
+            [MemoryFileUploadHandler()],
+        ).parse()
+
+        self.assertEqual(campos["ciudad"], "A Coruña")
+        self.assertEqual(archivos["cv"].read(), PDF_SINTETICO)
+
+
+class InformeTests(SimpleTestCase):
+    def test_cuenta_bloqueos_desde_el_inicio(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            log = Path(directorio) / "warning.log"
+            log.write_bytes(b"database is locked\n")
+            comando = Command()
+            inicio = comando.tamano_log(log)
+            with log.open("ab") as archivo:
+                archivo.write(b"otro aviso\ndatabase is locked\ndatabase is locked\n")
+
+            self.assertEqual(comando.contar_bloqueos(log, inicio), 2)
+            self.assertIsNone(comando.contar_bloqueos(Path(directorio) / "no", 0))
+
+    def test_percentiles_y_errores(self):
+        salida = StringIO()
+        comando = Command(stdout=salida)
+        medidas = [(i / 1000, 200) for i in range(1, 100)] + [(1, 500)]
+        comando.informe({"registro": (medidas, 2)}, 0, None)
+
+        linea = salida.getvalue()
+        self.assertIn("registro: 100 peticiones en 2.0 s (50.0 pet/s)", linea)
+        self.assertIn("p50=50 ms", linea)
+        self.assertIn("max=1000 ms", linea)
+        self.assertIn("Errores: 1 (1.0%)", linea)
+
+
+class PruebaCargaTests(LiveServerTestCase):
+    # El servidor de pruebas comparte una única conexión a la base de datos en
+    # memoria entre sus hilos, así que los clientes van de uno en uno
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.media = Path(directorio.name)
+        ajustes = override_settings(CACHES=CACHE_LOCAL, MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_recorre_las_tres_fases(self):
+        salida = StringIO()
+        call_command(
+            "pruebacarga",
+            url=self.live_server_url,
+            participantes=4,
+            concurrencia=1,
+            log=str(self.media / "warning.log"),
+            stdout=salida,
+        )
+
+        informe = salida.getvalue()
+        self.assertIn("registro: 8 peticiones", informe)
+        self.assertIn("verificar_correo: 4 peticiones", informe)
+        self.assertIn("confirmar_plaza: 8 peticiones", informe)
+        self.assertEqual(informe.count("Errores: 0 (0.0%)"), 3, informe)
+        # Sin --mantener se borran los participantes sintéticos y sus CV
+        self.assertFalse(Persona.objects.exists())
+        self.assertEqual(list(self.media.glob("cv/*")), [])
+
+    def test_mantener(self):
+        call_command(
+            "pruebacarga",
+            url=self.live_server_url,
+            participantes=2,
+            concurrencia=1,
+            mantener=True,
+            log=str(self.media / "warning.log"),
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            sorted(Participante.objects.values_list("estado", flat=True)),
+            ["CONFIRMADO", "CONFIRMADO"],
+        )
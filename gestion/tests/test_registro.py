@@ -0,0 +1,59 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.claves_cache import CACHE_REGISTRO_CERRADO
+from gestion.models import RestriccionAlimentaria
+from gestion.tests.utils import CACHE_LOCAL
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class RegistroCacheadoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        RestriccionAlimentaria.objects.create(nombre="Vegana")
+
+    def test_segunda_visita_sin_consultas(self):
+        primera = self.client.get(reverse("registro"))
+        self.assertContains(primera, "Vegana")
+
+        with self.assertNumQueries(0):
+            segunda = self.client.get(reverse("registro"))
+        self.assertContains(segunda, "Vegana")
+
+    def test_cambiar_restricciones_invalida(self):
+        self.client.get(reverse("registro"))
+        RestriccionAlimentaria.objects.create(nombre="Celíaca")
+
+        self.assertContains(self.client.get(reverse("registro")), "Celíaca")
+
+        RestriccionAlimentaria.objects.filter(nombre="Celíaca").get().delete()
+        self.assertNotContains(self.client.get(reverse("registro")), "Celíaca")
+
+
+@override_settings(
+    CACHES=CACHE_LOCAL, FECHA_FIN_REGISTRO=timezone.now() - timedelta(days=1)
+)
+class RegistroCerradoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cacheado_para_anonimos(self):
+        primera = self.client.get(reverse("registro"))
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(cache.get(CACHE_REGISTRO_CERRADO), primera.content.decode())
+
+        with self.assertNumQueries(0):
+            segunda = self.client.get(reverse("registro"))
+        self.assertEqual(segunda.content, primera.content)
+
+    def test_con_sesion_no_se_cachea(self):
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "sesion"
+        self.assertEqual(self.client.get(reverse("registro")).status_code, 200)
+        self.assertIsNone(cache.get(CACHE_REGISTRO_CERRADO))
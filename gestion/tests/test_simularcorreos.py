@@ -0,0 +1,79 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import mailbox
+import tempfile
+from email import message_from_bytes
+from io import StringIO
+from pathlib import Path
+
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from gestion.models import Token
+from gestion.tests.utils import CACHE_LOCAL, crear_participante
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class SimularCorreosTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+
+    def simular(self, destino, **opciones) -> str:
+        salida = StringIO()
+        call_command("simularcorreos", str(destino), stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_maildir_con_los_participantes(self):
+        ahora = timezone.now()
+        for i in range(3):
+            crear_participante(i, fecha_aceptacion=ahora)
+        crear_participante(10)
+
+        salida = self.simular(self.directorio / "buzon")
+
+        buzon = mailbox.Maildir(self.directorio / "buzon", create=False)
+        self.assertEqual(
+            sorted(mensaje["To"] for mensaje in buzon),
+            ["p0@example.com", "p1@example.com", "p2@example.com"],
+        )
+        self.assertIn("3 correos en", salida)
+        self.assertIn("Renderizado: p50=", salida)
+        # Ni envía ni escribe en la base de datos
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(Token.objects.exists())
+
+    def test_mbox_con_sinteticos(self):
+        destino = self.directorio / "campana.mbox"
+        salida = self.simular(destino, formato="mbox", sinteticos=5)
+
+        mensajes = list(mailbox.mbox(destino, create=False))
+        self.assertEqual(len(mensajes), 5)
+        cuerpo = message_from_bytes(mensajes[0].as_bytes())
+        self.assertTrue(cuerpo.is_multipart())
+        self.assertIn("5 correos en", salida)
+
+    def test_avisa_de_lentos_y_grandes(self):
+        salida = self.simular(
+            self.directorio / "buzon", sinteticos=2, max_ms=0, max_kb=0.01
+        )
+
+        self.assertIn("2 correos tardaron más de 0 ms", salida)
+        self.assertIn("2 correos ocupan más de 0.01 KB", salida)
+
+    def test_sin_avisos(self):
+        salida = self.simular(
+            self.directorio / "buzon", sinteticos=1, max_ms=10_000, max_kb=10_000
+        )
+        self.assertIn("Sin correos lentos ni demasiado grandes", salida)
+
+    def test_sin_destinatarios(self):
+        with self.assertRaisesMessage(CommandError, "No hay destinatarios"):
+            self.simular(self.directorio / "buzon")
+
+    def test_mbox_en_un_directorio(self):
+        with self.assertRaises(CommandError):
+            self.simular(self.directorio, formato="mbox", sinteticos=1)
@@ -0,0 +1,168 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from gestion.smtp_async import (
+    BACKEND_SMTP,
+    ClienteSMTP,
+    CupoAgotado,
+    CupoDiario,
+    ErrorSMTP,
+    LimitesProveedor,
+    enviar_asincrono,
+)
+from gestion.smtp_local import ServidorSMTPLocal
+from gestion.tests.utils import CACHE_LOCAL
+
+
+def mensajes(n: int, **kwargs) -> list[EmailMessage]:
+    return [
+        EmailMessage(
+            f"Prueba {i}",
+            "Cuerpo",
+            kwargs.get("from_email", "remitente@example.com"),
+            kwargs.get("to", [f"p{i}@example.com"]),
+        )
+        for i in range(n)
+    ]
+
+
+@override_settings(EMAIL_BACKEND=BACKEND_SMTP, CACHES=CACHE_LOCAL)
+class EnvioAsincronoTests(SimpleTestCase):
+    def setUp(self):
+        caches["correo"].clear()
+
+    def enviar(self, servidor, lista, usuario=None, **kwargs):
+        host, puerto = servidor.direccion
+        return enviar_asincrono(
+            lista,
+            conexiones=kwargs.pop("conexiones", 2),
+            limites=kwargs.pop("limites", LimitesProveedor()),
+            espera_base=0.01,
+            crear_cliente=lambda: ClienteSMTP(
+                host, puerto, usuario, "contrasena", timeout=5
+            ),
+            **kwargs,
+        )
+
+    def test_reintenta_los_errores_temporales(self):
+        with ServidorSMTPLocal(puerto=0, errores_temporales=2) as servidor:
+            resumen = self.enviar(servidor, mensajes(5))
+
+        self.assertEqual((resumen.enviados, resumen.fallidos), (5, 0))
+        self.assertEqual(servidor.recibidos, 5)
+
+    def test_agota_los_reintentos(self):
+        with ServidorSMTPLocal(puerto=0, errores_temporales=100) as servidor:
+            resumen = self.enviar(servidor, mensajes(1), reintentos=2)
+
+        self.assertEqual((resumen.enviados, resumen.fallidos), (0, 1))
+        self.assertIsInstance(resumen.errores[0], ErrorSMTP)
+        self.assertEqual(resumen.errores[0].codigo, 451)
+
+    def test_autenticacion_fallida_abre_otra_conexion(self):
+        # Reutilizar la conexión sin autenticar daría un 530 definitivo
+        with ServidorSMTPLocal(
+            puerto=0, autenticacion=True, errores_autenticacion=1
+        ) as servidor:
+            resumen = self.enviar(servidor, mensajes(1), usuario="u", conexiones=1)
+
+        self.assertEqual((resumen.enviados, resumen.fallidos), (1, 0))
+        self.assertEqual(servidor.autenticaciones, 2)
+
+    def test_cupo_agotado_no_espera_turno(self):
+        # Con un envío por minuto, esperar turno para el segundo mensaje tardaría 60 s
+        limites = LimitesProveedor(por_minuto=1, por_dia=1)
+        inicio = time.monotonic()
+        with ServidorSMTPLocal(puerto=0) as servidor:
+            resumen = self.enviar(servidor, mensajes(3), limites=limites, conexiones=1)
+
+        self.assertLess(time.monotonic() - inicio, 10)
+        self.assertEqual((resumen.enviados, resumen.fallidos), (1, 2))
+        self.assertTrue(
+            all(isinstance(e, CupoAgotado) for e in resumen.errores.values())
+        )
+        self.assertEqual(servidor.recibidos, 1)
+
+    def test_sobre_saneado(self):
+        lista = mensajes(
+            1,
+            from_email="José Pérez <jose@exámple.com>",
+            to=['"Doe, John" <john@example.com>'],
+        )
+        with ServidorSMTPLocal(puerto=0, guardar=True) as servidor:
+            resumen = self.enviar(servidor, lista)
+
+        self.assertEqual(resumen.enviados, 1)
+        self.assertEqual(
+            servidor.sobres,
+            [("<jose@xn--exmple-qta.com>", ["<john@example.com>"])],
+        )
+
+    def test_direccion_con_salto_de_linea_no_se_envia(self):
+        lista = mensajes(1, to=["p@example.com\nRCPT TO:<otro@example.com>"])
+        lista += mensajes(1)
+        with ServidorSMTPLocal(puerto=0, guardar=True) as servidor:
+            resumen = self.enviar(servidor, lista)
+
+        self.assertEqual((resumen.enviados, resumen.fallidos), (1, 1))
+        self.assertIsInstance(resumen.errores[0], ValueError)
+        self.assertEqual(
+            servidor.sobres, [("<remitente@example.com>", ["<p0@example.com>"])]
+        )
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CupoDiarioTests(SimpleTestCase):
+    def setUp(self):
+        caches["correo"].clear()
+
+    def test_reserva_lo_que_queda(self):
+        cupo = CupoDiario(5)
+        self.assertEqual(cupo.reservar(3), 3)
+        self.assertEqual(cupo.reservar(3), 2)
+        with self.assertRaises(CupoAgotado):
+            cupo.reservar()
+
+        cupo.liberar(2)
+        self.assertEqual(cupo.reservar(), 1)
+
+    def test_clave_expulsada_entre_add_e_incr(self):
+        cache = caches["correo"]
+        incr = cache.incr
+
+        def expulsada(*args, **kwargs):
+            cache.delete(CupoDiario(1).clave())
+            incr_expulsada.side_effect = incr
+            raise ValueError()
+
+        with mock.patch.object(cache, "incr", side_effect=expulsada) as incr_expulsada:
+            self.assertEqual(CupoDiario(5).reservar(), 1)
+        self.assertEqual(cache.get(CupoDiario(1).clave()), 1)
+
+    def test_limpiarcache_no_lo_borra(self):
+        CupoDiario(5).reservar(4)
+        call_command("limpiarcache", stdout=mock.MagicMock())
+        self.assertEqual(CupoDiario(5).reservar(4), 1)
+
+    @override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+    def test_sin_smtp_tambien_respeta_el_cupo(self):
+        terminados = []
+        resumen = enviar_asincrono(
+            mensajes(3),
+            limites=LimitesProveedor(por_dia=2),
+            al_enviar=lambda indice, error: terminados.append((indice, error)),
+        )
+
+        self.assertEqual((resumen.enviados, resumen.fallidos), (2, 1))
+        self.assertIsInstance(resumen.errores[2], CupoAgotado)
+        self.assertEqual(sorted(indice for indice, _ in terminados), [0, 1, 2])
+
+        resumen = enviar_asincrono(mensajes(1), limites=LimitesProveedor(por_dia=2))
+        self.assertEqual((resumen.enviados, resumen.fallidos), (0, 1))
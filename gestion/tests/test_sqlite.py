@@ -0,0 +1,113 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from gestion.sqlite import METRICA_FALLOS, METRICA_REINTENTOS, escritura_con_reintentos
+from gestion.tests.utils import CACHE_LOCAL
+
+
+def bloqueada(veces: int):
+    """Función que falla con 'database is locked' las primeras `veces` llamadas"""
+    llamadas = []
+
+    def funcion():
+        llamadas.append(transaction.get_connection().in_atomic_block)
+        if len(llamadas) <= veces:
+            raise OperationalError("database is locked")
+        return len(llamadas)
+
+    return funcion, llamadas
+
+
+class PragmasTests(TestCase):
+    def test_perfil_aplicado_en_la_conexion(self):
+        with connection.cursor() as cursor:
+            for pragma in ("busy_timeout", "cache_size"):
+                with self.subTest(pragma=pragma):
+                    cursor.execute(f"PRAGMA {pragma}")
+                    self.assertEqual(
+                        cursor.fetchone()[0], settings.SQLITE_PRAGMAS[pragma]
+                    )
+            cursor.execute("PRAGMA foreign_keys")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class BenchSQLiteTests(SimpleTestCase):
+    def test_informa_de_las_diferencias_con_la_base(self):
+        salida = StringIO()
+        call_command(
+            "benchsqlite",
+            "--hilos",
+            "2",
+            "--escrituras",
+            "5",
+            "--transaccion",
+            "IMMEDIATE",
+            stdout=salida,
+        )
+
+        salida = salida.getvalue()
+        self.assertIn("Con perfil: 10 escrituras", salida)
+        # La base se abre sin la espera por defecto de sqlite3.connect
+        self.assertIn("busy_timeout=5000 (sin perfil 0)", salida)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class EscrituraConReintentosTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reintenta_si_esta_bloqueada(self):
+        funcion, llamadas = bloqueada(2)
+        self.assertEqual(escritura_con_reintentos(funcion, espera=0)(), 3)
+        # Cada intento en su transacción
+        self.assertEqual(llamadas, [True, True, True])
+        self.assertEqual(cache.get(METRICA_REINTENTOS), 2)
+
+    def test_se_rinde_tras_los_intentos(self):
+        funcion, llamadas = bloqueada(10)
+        with self.assertRaises(OperationalError):
+            escritura_con_reintentos(funcion, intentos=3, espera=0)()
+        self.assertEqual(len(llamadas), 3)
+        self.assertEqual(cache.get(METRICA_FALLOS), 1)
+
+    def test_espera_corta_en_cada_intento(self):
+        def busy_timeout():
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA busy_timeout")
+                return cursor.fetchone()[0]
+
+        with override_settings(SQLITE_ESPERA_ESCRITURA=100):
+            self.assertEqual(escritura_con_reintentos(busy_timeout)(), 100)
+        self.assertEqual(busy_timeout(), settings.SQLITE_PRAGMAS["busy_timeout"])
+
+    def test_otros_errores_no_se_reintentan(self):
+        def funcion():
+            llamadas.append(1)
+            raise OperationalError("no such table: x")
+
+        llamadas = []
+        with self.assertRaises(OperationalError):
+            escritura_con_reintentos(funcion, espera=0)()
+        self.assertEqual(llamadas, [1])
+
+    def test_solo_reintenta_la_transaccion_externa(self):
+        interna, llamadas_internas = bloqueada(2)
+        interna = escritura_con_reintentos(interna, espera=0)
+        externas = []
+
+        @escritura_con_reintentos(espera=0)
+        def externa():
+            externas.append(1)
+            return interna()
+
+        self.assertEqual(externa(), 3)
+        # La interna no reintenta por su cuenta: cada fallo repite la externa
+        self.assertEqual(len(externas), 3)
+        self.assertEqual(len(llamadas_internas), 3)
@@ -0,0 +1,155 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import tempfile
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.http.multipartparser import MultiPartParser
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from gestion.management.commands.pruebacarga import PDF_SINTETICO, multipart
+from gestion.models import Participante
+from gestion.subidas import ManejadorSubidaCV
+from gestion.tests.utils import CACHE_LOCAL, datos_registro
+
+
+class CuerpoContado(BytesIO):
+    """Cuerpo de la petición que anota cuántos bytes se leyeron"""
+
+    leidos = 0
+
+    def read(self, *args):
+        datos = super().read(*args)
+        self.leidos += len(datos)
+        return datos
+
+
+class ManejadorEspia(TemporaryFileUploadHandler):
+    """Manejador de archivos temporales que anota los campos que le llegan"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.campos = []
+
+    def receive_data_chunk(self, raw_data, start):
+        self.campos.append(self.field_name)
+        return super().receive_data_chunk(raw_data, start)
+
+
+@override_settings(CV_TAMANO_MAXIMO=1024**2, FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+class ManejadorSubidaCVTests(SimpleTestCase):
+    def subir(self, archivos: dict, tamano_bloque=8 * 1024):
+        request = SimpleNamespace()
+        espia = ManejadorEspia()
+        manejadores = [ManejadorSubidaCV(request), espia]
+        for manejador in manejadores:
+            manejador.chunk_size = tamano_bloque
+        cuerpo, tipo = multipart({"nombre": "Persona"}, archivos)
+        self.cuerpo = CuerpoContado(cuerpo)
+        _, recibidos = MultiPartParser(
+            {"CONTENT_TYPE": tipo, "CONTENT_LENGTH": len(cuerpo)},
+            self.cuerpo,
+            manejadores,
+        ).parse()
+        return recibidos, getattr(request, "errores_subida", None), espia
+
+    def test_pdf_en_memoria(self):
+        recibidos, errores, espia = self.subir(
+            {"cv": ("cv.pdf", PDF_SINTETICO, "application/pdf")}
+        )
+
+        self.assertIsNone(errores)
+        self.assertEqual(recibidos["cv"].read(), PDF_SINTETICO)
+        self.assertEqual(espia.campos, [])
+
+    def test_rechaza_lo_que_no_es_pdf(self):
+        recibidos, errores, espia = self.subir(
+            {"cv": ("cv.pdf", b"MZ" + b"\0" * 1024, "application/pdf")}
+        )
+
+        self.assertNotIn("cv", recibidos)
+        self.assertEqual(errores, {"cv": "El archivo no es un PDF"})
+        self.assertEqual(espia.campos, [])
+
+    def test_corta_al_superar_el_tamano(self):
+        grande = PDF_SINTETICO + b"\0" * 2 * 1024**2
+        recibidos, errores, espia = self.subir(
+            {"cv": ("cv.pdf", grande, "application/pdf")}
+        )
+
+        self.assertNotIn("cv", recibidos)
+        self.assertEqual(errores, {"cv": "El CV no puede ocupar más de 1 MB"})
+        self.assertEqual(espia.campos, [])
+
+    def test_no_lee_el_resto_del_cuerpo(self):
+        for contenido in (
+            b"MZ" + b"\0" * 512 * 1024,
+            PDF_SINTETICO + b"\0" * 2 * 1024**2,
+        ):
+            with self.subTest(tamano=len(contenido)):
+                self.subir({"cv": ("cv.pdf", contenido, "application/pdf")})
+                self.assertLess(self.cuerpo.leidos, 128 * 1024)
+
+    def test_corta_sin_tamano_declarado(self):
+        # Con la petición por debajo del límite no se sabe lo que ocupará el CV hasta
+        # recibirlo: se corta al pasarse, sin leer lo que queda
+        with override_settings(CV_TAMANO_MAXIMO=256 * 1024):
+            _, errores, _ = self.subir(
+                {
+                    "cv": (
+                        "cv.pdf",
+                        PDF_SINTETICO + b"\0" * 300 * 1024,
+                        "application/pdf",
+                    )
+                },
+                tamano_bloque=16 * 1024,
+            )
+
+        self.assertEqual(list(errores), ["cv"])
+        self.assertLess(self.cuerpo.leidos, len(self.cuerpo.getvalue()))
+
+    def test_otros_archivos_siguen_su_camino(self):
+        recibidos, errores, espia = self.subir(
+            {"adjunto": ("a.txt", b"texto", "text/plain")}
+        )
+
+        self.assertIsNone(errores)
+        self.assertEqual(recibidos["adjunto"].read(), b"texto")
+        self.assertEqual(espia.campos, ["adjunto"])
+
+
+@override_settings(CACHES=CACHE_LOCAL, CV_TAMANO_MAXIMO=1024**2)
+class RegistroCVTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.media = directorio.name
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_registro_con_cv(self):
+        self.client.post(reverse("registro"), datos_registro(1))
+
+        participante = Participante.objects.get()
+        with participante.cv.open() as cv:
+            self.assertEqual(cv.read(), PDF_SINTETICO)
+
+    def test_registro_con_cv_invalido(self):
+        respuesta = self.client.post(
+            reverse("registro"),
+            datos_registro(
+                1, cv=SimpleUploadedFile("cv.pdf", b"<html>", "application/pdf")
+            ),
+        )
+
+        self.assertFalse(Participante.objects.exists())
+        self.assertEqual(
+            respuesta.context["form"].errors["cv"], ["El archivo no es un PDF"]
+        )
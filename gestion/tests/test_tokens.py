@@ -0,0 +1,186 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from unittest import mock
+from uuid import uuid4
+
+from django.contrib.messages import get_messages
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.models import Mentor
+from gestion.tokens import firmar_token, resolver_token
+from gestion.tests.utils import CACHE_LOCAL, crear_participante, crear_token
+
+
+def mensajes(respuesta) -> list[str]:
+    return [str(m) for m in get_messages(respuesta.wsgi_request)]
+
+
+@override_settings(CACHES=CACHE_LOCAL, TOKENS_FIRMADOS=False)
+class TokensCaducadosUUIDTests(TestCase):
+    """Los enlaces caducados se resuelven según el estado actual del participante.
+    Las mismas pruebas se repiten con los tokens firmados"""
+
+    def enlace(self, nombre: str, token) -> str:
+        return reverse(nombre, args=[firmar_token(token)])
+
+    def test_confirmado_puede_rechazar_con_el_enlace_caducado(self):
+        ahora = timezone.now()
+        participante = crear_participante(
+            1, fecha_aceptacion=ahora, fecha_confirmacion_plaza=ahora
+        )
+        token = crear_token(participante, "CONFIRMACION", -1)
+
+        respuesta = self.client.get(self.enlace("rechazar-plaza", token))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTemplateUsed(respuesta, "rechazar_plaza.html")
+
+        self.client.post(self.enlace("rechazar-plaza", token))
+        participante.refresh_from_db()
+        self.assertEqual(participante.estado, "RECHAZO")
+
+    def test_no_puede_aceptar_con_el_enlace_caducado(self):
+        participante = crear_participante(1, fecha_aceptacion=timezone.now())
+        token = crear_token(participante, "CONFIRMACION", -1)
+
+        self.client.post(self.enlace("aceptar-plaza", token))
+        participante.refresh_from_db()
+        self.assertEqual(participante.estado, "ACEPTADO")
+
+    def test_confirmar_muestra_el_participante_con_el_enlace_caducado(self):
+        participante = crear_participante(1, fecha_aceptacion=timezone.now())
+        token = crear_token(participante, "CONFIRMACION", -1)
+
+        respuesta = self.client.get(self.enlace("confirmar-plaza", token))
+        self.assertEqual(respuesta.context["participante"], participante)
+        self.assertEqual(respuesta.context["token"], token)
+
+    def test_verificado_con_el_enlace_caducado(self):
+        participante = crear_participante(1, fecha_verificacion_correo=timezone.now())
+        token = crear_token(participante, "VERIFICACION", -1)
+
+        respuesta = self.client.get(self.enlace("verificar-correo", token))
+        self.assertTemplateUsed(respuesta, "verificacion_correcta.html")
+        self.assertIn("Ya habías verificado", " ".join(mensajes(respuesta)))
+
+    def test_sin_verificar_con_el_enlace_caducado(self):
+        participante = crear_participante(1)
+        token = crear_token(participante, "VERIFICACION", -1)
+
+        respuesta = self.client.get(self.enlace("verificar-correo", token))
+        self.assertTemplateUsed(respuesta, "verificacion_incorrecta.html")
+        self.assertEqual(respuesta.context["motivo"], "Token expirado")
+        participante.refresh_from_db()
+        self.assertEqual(participante.estado, "REGISTRADO")
+
+    def test_verificar_con_el_enlace_vigente(self):
+        participante = crear_participante(1)
+        token = crear_token(participante, "VERIFICACION", 1)
+
+        self.client.get(self.enlace("verificar-correo", token))
+        participante.refresh_from_db()
+        token.refresh_from_db()
+        self.assertEqual(participante.estado, "VERIFICADO")
+        self.assertIsNotNone(token.fecha_uso)
+
+
+@override_settings(TOKENS_FIRMADOS=True)
+class TokensCaducadosFirmadosTests(TokensCaducadosUUIDTests):
+    pass
+
+
+@override_settings(CACHES=CACHE_LOCAL, TOKENS_FIRMADOS=True)
+class TokensFirmadosTests(TestCase):
+    def setUp(self):
+        self.participante = crear_participante(1)
+        self.token = crear_token(self.participante, "CONFIRMACION", 1)
+
+    def test_resuelve_el_token_firmado(self):
+        resolucion = resolver_token(firmar_token(self.token), "CONFIRMACION")
+        self.assertTrue(resolucion.valido)
+        self.assertEqual(resolucion.participante, self.participante)
+
+    def test_rechaza_manipulados_sin_consultar(self):
+        firmado = firmar_token(self.token)
+        with self.assertNumQueries(0):
+            self.assertFalse(resolver_token(firmado[:-1] + "x", "CONFIRMACION").existe)
+            # Otro tipo de token: otro salt
+            self.assertFalse(resolver_token(firmado, "VERIFICACION").existe)
+
+    def test_caducado_sin_consultar(self):
+        token = crear_token(self.participante, "CONFIRMACION", -1)
+        with self.assertNumQueries(0):
+            resolucion = resolver_token(firmar_token(token), "CONFIRMACION")
+        self.assertEqual(resolucion.estado, "EXPIRADO")
+        resolucion = resolver_token(firmar_token(token), "CONFIRMACION", caducados=True)
+        self.assertEqual(resolucion.participante, self.participante)
+
+    def test_el_uuid_sigue_funcionando(self):
+        resolucion = resolver_token(str(self.token.token), "CONFIRMACION")
+        self.assertTrue(resolucion.valido)
+
+
+@override_settings(CACHES=CACHE_LOCAL, TOKENS_FIRMADOS=False)
+class ResolverTokenTests(TestCase):
+    def setUp(self):
+        self.participante = crear_participante(1, fecha_aceptacion=timezone.now())
+
+    def test_estados(self):
+        vigente = crear_token(self.participante, "CONFIRMACION", 1)
+        caducado = crear_token(self.participante, "CONFIRMACION", -1)
+        usado = crear_token(
+            self.participante, "CONFIRMACION", 1, fecha_uso=timezone.now()
+        )
+
+        for token, estado in (
+            (vigente, "VALIDO"),
+            (caducado, "EXPIRADO"),
+            (usado, "USADO"),
+        ):
+            resolucion = resolver_token(str(token.token), "CONFIRMACION")
+            self.assertEqual(resolucion.estado, estado)
+            self.assertEqual(resolucion.token, token)
+            self.assertEqual(resolucion.participante, self.participante)
+
+    def test_inexistente(self):
+        token = crear_token(self.participante, "VERIFICACION", 1)
+        for valor, tipo in (
+            (str(uuid4()), "VERIFICACION"),
+            ("no-es-un-token", "VERIFICACION"),
+            (str(token.token), "CONFIRMACION"),
+        ):
+            resolucion = resolver_token(valor, tipo)
+            self.assertFalse(resolucion.existe)
+            self.assertIsNone(resolucion.participante)
+
+    def test_persona_que_no_es_participante(self):
+        mentor = Mentor.objects.create(
+            correo="mentor@example.com", nombre="Mentor", dni="00000009Z"
+        )
+        token = crear_token(mentor, "CONFIRMACION", 1)
+        self.assertFalse(resolver_token(str(token.token), "CONFIRMACION").existe)
+
+    def test_una_sola_consulta(self):
+        token = crear_token(self.participante, "CONFIRMACION", 1)
+        with self.assertNumQueries(1):
+            resolucion = resolver_token(str(token.token), "CONFIRMACION")
+            resolucion.token.persona.correo
+            resolucion.participante.fecha_aceptacion
+
+    @mock.patch("gestion.views.resolver_token", wraps=resolver_token)
+    def test_las_vistas_usan_el_servicio(self, resolver):
+        verificacion = crear_token(self.participante, "VERIFICACION", 1)
+        confirmacion = crear_token(self.participante, "CONFIRMACION", 1)
+
+        self.client.get(reverse("verificar-correo", args=[verificacion.token]))
+        self.client.get(reverse("confirmar-plaza", args=[confirmacion.token]))
+        self.client.post(reverse("aceptar-plaza", args=[confirmacion.token]))
+        self.client.post(reverse("rechazar-plaza", args=[confirmacion.token]))
+
+        self.assertEqual(
+            [llamada.args[1] for llamada in resolver.call_args_list],
+            ["VERIFICACION", "CONFIRMACION", "CONFIRMACION", "CONFIRMACION"],
+        )
+        self.participante.refresh_from_db()
+        self.assertEqual(self.participante.estado, "RECHAZO")
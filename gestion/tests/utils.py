@@ -0,0 +1,66 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+from datetime import date, timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from gestion.management.commands.pruebacarga import PDF_SINTETICO
+from gestion.models import Participante, Token
+
+CACHE_LOCAL = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "limites": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "limites",
+    },
+    "correo": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "correo",
+    },
+}
+
+
+def crear_participante(n: int = 0, **campos) -> Participante:
+    return Participante.objects.create(
+        **{
+            "correo": f"p{n}@example.com",
+            "nombre": f"Persona {n}",
+            "dni": f"{n:08d}A",
+            "telefono": "600000000",
+            "fecha_nacimiento": date(2000, 1, 1),
+            **campos,
+        }
+    )
+
+
+def crear_token(persona, tipo: str, dias: float = 7, **campos) -> Token:
+    """Token que caduca dentro de `dias` días (negativo: ya caducado)"""
+    return Token.objects.create(
+        persona=persona,
+        tipo=tipo,
+        fecha_expiracion=timezone.now() + timedelta(days=dias),
+        **campos,
+    )
+
+
+def datos_registro(n: int = 0, **campos) -> dict:
+    """Datos válidos del formulario de registro, con CV"""
+    return {
+        "nombre": f"Persona {n}",
+        "dni": f"{n:08d}A",
+        "correo": f"p{n}@example.com",
+        "telefono": "600000000",
+        "fecha_nacimiento": "2000-01-01",
+        "genero": "-",
+        "talla_camiseta": "M",
+        "ciudad": "A Coruña",
+        "nivel_estudio": "UNIVERSIDAD",
+        "centro_estudio": "FIC",
+        "nombre_estudio": "GEI",
+        "curso": "3",
+        "motivacion": "Pruebas",
+        "acepta_terminos": "on",
+        "cv": SimpleUploadedFile("cv.pdf", PDF_SINTETICO, "application/pdf"),
+        **campos,
+    }
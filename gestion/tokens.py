@@ -0,0 +1,98 @@
+# Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
+
+import time
+from dataclasses import dataclass
+from uuid import UUID
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from gestion.models import Participante, Token
+
+ESTADOS_RESOLUCION = ("VALIDO", "EXPIRADO", "USADO", "INEXISTENTE")
+
+
+@dataclass(frozen=True)
+class ResolucionToken:
+    """Resultado de buscar un token de un enlace público. `token` y `participante`
+    son None si el token no existe"""
+
+    estado: str
+    token: Token | None = None
+    participante: Participante | None = None
+
+    @property
+    def existe(self) -> bool:
+        return self.estado != "INEXISTENTE"
+
+    @property
+    def valido(self) -> bool:
+        return self.estado == "VALIDO"
+
+
+INEXISTENTE = ResolucionToken("INEXISTENTE")
+
+
+def _firmante(tipo: str) -> signing.Signer:
+    # Un salt por tipo: un token de verificación no sirve para confirmar la plaza
+    return signing.Signer(salt=f"gestion.tokens.{tipo}")
+
+
+def firmar_token(token: Token) -> str:
+    """Valor del token para los enlaces de los correos.
+
+    Con `TOKENS_FIRMADOS` es el UUID y la fecha de expiración firmados con
+    `SECRET_KEY` (y comprobados también con `SECRET_KEY_FALLBACKS`), de forma que los
+    enlaces manipulados o caducados se rechazan sin consultar la base de datos. La
+    expiración queda fijada al firmar: si se amplía en la base de datos hay que
+    enviar un enlace nuevo.
+    """
+    if not settings.TOKENS_FIRMADOS:
+        return str(token.token)
+
+    return _firmante(token.tipo).sign_object(
+        [token.token.hex, int(token.fecha_expiracion.timestamp())]
+    )
+
+
+def resolver_token(token: str, tipo: str, caducados: bool = False) -> ResolucionToken:
+    """Busca el token con su persona y su participante en una única consulta.
+
+    Acepta tanto el UUID como el formato firmado de `firmar_token`. Los tokens
+    firmados inválidos o caducados no llegan a la base de datos; en ese caso la
+    resolución caducada no incluye ni token ni participante. Con `caducados` se
+    buscan también los firmados caducados, para identificar al participante.
+    """
+    try:
+        uuid = UUID(str(token))
+    except ValueError:
+        try:
+            valor, expiracion = _firmante(tipo).unsign_object(token)
+            uuid = UUID(hex=valor)
+        except (signing.BadSignature, ValueError, TypeError):
+            return INEXISTENTE
+
+        if expiracion <= time.time() and not caducados:
+            return ResolucionToken("EXPIRADO")
+
+    token_obj = (
+        Token.objects.select_related("persona__participante")
+        .filter(token=uuid, tipo=tipo)
+        .first()
+    )
+    if token_obj is None:
+        return INEXISTENTE
+
+    participante = getattr(token_obj.persona, "participante", None)
+    if participante is None:
+        return INEXISTENTE
+
+    if token_obj.fecha_uso is not None:
+        estado = "USADO"
+    elif token_obj.fecha_expiracion <= timezone.now():
+        estado = "EXPIRADO"
+    else:
+        estado = "VALIDO"
+
+    return ResolucionToken(estado, token_obj, participante)
@@ -39,4 +39,8 @@ urlpatterns = [
         name="presencia-editar",
     ),
     path("gestion/info/<correo>", views.info_participante, name="info-participante"),
+    path("gestion/api/alta/buscar", views.api_alta_buscar, name="api-alta-buscar"),
+    path("gestion/api/alta/asignar", views.api_alta_asignar, name="api-alta-asignar"),
+    path("gestion/api/instantanea", views.api_instantanea, name="api-instantanea"),
+    path("gestion/api/sincronizar", views.api_sincronizar, name="api-sincronizar"),
 ]
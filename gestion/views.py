@@ -1,19 +1,38 @@
 # Copyright (C) 2025-now  p.fernandezf <p@fernandezf.es> & iago.rivas <delthia@delthia.com>
 
+import json
 import os
+import re
 from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_not_required
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
-from django.core.mail import EmailMultiAlternatives
-from django.http import FileResponse, HttpRequest, HttpResponse
+from django.db import transaction
+from django.db.models import Count
+from django.http import FileResponse, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render, Http404
 from django.template.loader import render_to_string
 from django.utils import timezone
-from django.views.decorators.http import require_http_methods
-
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_http_methods
+
+from gestion.acreditaciones import (
+    VENTANA_DUPLICADOS,
+    PersonaAcreditada,
+    asignar_acreditacion,
+    buscar_persona,
+)
+from gestion.claves_cache import (
+    CACHE_FORMULARIO_REGISTRO,
+    CACHE_REGISTRO_CERRADO,
+    TIEMPO_CACHE_REGISTRO,
+    version_paginas,
+)
+from gestion.correo import encolar_correo
 from gestion.forms import (
     EditarPresenciaForm,
     ParticipanteForm,
@@ -21,7 +40,9 @@ from gestion.forms import (
     Registro,
     RevisarParticipanteForm,
 )
+from gestion.kioscos import construir_instantanea, sincronizar, version_instantanea
 from gestion.models import (
+    ESTADOS_PARTICIPANTE,
     Mentor,
     Participante,
     Pase,
@@ -29,55 +50,72 @@ from gestion.models import (
     Presencia,
     TipoPase,
     Token,
+    normalizar_dni,
 )
+from gestion.sqlite import escritura_con_reintentos
+from gestion.subidas import ManejadorSubidaCV
+from gestion.tokens import firmar_token, resolver_token
 
 
 @login_not_required
+@csrf_exempt
 @require_http_methods(["GET", "POST"])
 def registro(request: HttpRequest):
+    # El manejador tiene que estar antes de leer request.POST (incluido el CSRF)
+    request.upload_handlers.insert(0, ManejadorSubidaCV(request))
+    return _registro(request)
+
+
+@csrf_protect
+def _registro(request: HttpRequest):
     if timezone.now() > settings.FECHA_FIN_REGISTRO:
-        return render(request, "registro_cerrado.html")
+        return registro_cerrado(request)
 
     if request.method == "GET":
-        return render(request, "registro.html", {"form": ParticipanteForm()})
+        # El formulario es igual para todos. Se invalida al cambiar las restricciones alimentarias
+        formulario = cache.get_or_set(
+            CACHE_FORMULARIO_REGISTRO,
+            lambda: ParticipanteForm().render(),
+            TIEMPO_CACHE_REGISTRO,
+            version=version_paginas(),
+        )
+        return render(
+            request,
+            "registro.html",
+            {"form": ParticipanteForm(), "formulario": formulario},
+        )
 
-    form = ParticipanteForm(request.POST, request.FILES)
+    form = ParticipanteForm(
+        request.POST,
+        request.FILES,
+        errores_subida=getattr(request, "errores_subida", None),
+    )
     if form.is_valid() and request.POST.get("acepta_terminos", False):
-        participante: Participante = form.save()
-        token = Token(
-            tipo="VERIFICACION",
-            persona=participante,
-            fecha_expiracion=(timezone.now() + timedelta(days=7)).replace(
-                hour=23, minute=59, second=59
-            ),
-        )
-        token.save()
-        try:
-            params = {
-                "nombre": participante.nombre,
-                "token": token.token,
-                "host": settings.HOST_REGISTRO,
-            }
-            email = EmailMultiAlternatives(
-                settings.EMAIL_VERIFICACION_ASUNTO,
-                render_to_string("correo/verificacion_correo.txt", params),
-                to=(participante.correo,),
-                reply_to=("hackudc@gpul.org",),
-                headers={"Message-ID": f"hackudc-{token.fecha_creacion.timestamp()}"},
-            )
-            email.attach_alternative(
-                render_to_string("correo/verificacion_correo.html", params), "text/html"
+        with transaction.atomic():
+            participante: Participante = form.save()
+            token = Token(
+                tipo="VERIFICACION",
+                persona=participante,
+                fecha_expiracion=(timezone.now() + timedelta(days=7)).replace(
+                    hour=23, minute=59, second=59
+                ),
             )
-            email.send(fail_silently=False)
-        except Exception as e:
-            participante.motivo_error_correo_verificacion = str(e)[:4096]
-            participante.save()
-
-            messages.error(
-                request,
-                "Error al enviar el correo de verificación. Contacta con nosotros a través de hackudc@gpul.org para resolverlo.",
+            token.save()
+
+            # El envío lo hace el comando `enviarcorreos`
+            encolar_correo(
+                "VERIFICACION",
+                settings.EMAIL_VERIFICACION_ASUNTO,
+                "correo/verificacion_correo",
+                {
+                    "nombre": participante.nombre,
+                    "token": firmar_token(token),
+                    "host": settings.HOST_REGISTRO,
+                },
+                participante.correo,
+                persona=participante,
+                cabeceras={"Message-ID": f"hackudc-{token.fecha_creacion.timestamp()}"},
             )
-            return render(request, "registro.html", {"form": form})
 
         return render(
             request, "registro.html", {"form": form, "participante": participante}
@@ -87,11 +125,26 @@ def registro(request: HttpRequest):
     return render(request, "registro.html", {"form": form})
 
 
+def registro_cerrado(request: HttpRequest):
+    # Con sesión puede haber mensajes o usuario, que no deben cachearse
+    if request.COOKIES.get(settings.SESSION_COOKIE_NAME):
+        return render(request, "registro_cerrado.html")
+
+    contenido = cache.get_or_set(
+        CACHE_REGISTRO_CERRADO,
+        lambda: render_to_string("registro_cerrado.html", request=request),
+        TIEMPO_CACHE_REGISTRO,
+        version=version_paginas(),
+    )
+    return HttpResponse(contenido)
+
+
 @login_not_required
 @require_http_methods(["GET"])
 def verificar_correo(request: HttpRequest, token: str):
-    token_obj = Token.objects.filter(token=token, tipo="VERIFICACION").first()
-    if not token_obj:
+    # Con los caducados: se decide según el estado actual del participante
+    resolucion = resolver_token(token, "VERIFICACION", caducados=True)
+    if not resolucion.existe:
         messages.error(request, "El token es inválido.")
         return render(
             request,
@@ -99,11 +152,9 @@ def verificar_correo(request: HttpRequest, token: str):
             {"motivo": "Token inválido", "token": token},
         )
 
-    participante: Participante = Participante.objects.get(
-        correo=token_obj.persona.correo
-    )
+    token_obj, participante = resolucion.token, resolucion.participante
 
-    if not token_obj.valido() and not participante.verificado():
+    if not resolucion.valido and not participante.verificado():
         messages.error(
             request,
             "El token de verificación ha expirado.",
@@ -118,34 +169,26 @@ def verificar_correo(request: HttpRequest, token: str):
         ahora = timezone.now()
 
         participante.fecha_verificacion_correo = ahora
-        participante.save()
+        participante.save(update_fields=["fecha_verificacion_correo"])
 
         token_obj.fecha_uso = ahora
-        token_obj.save()
+        token_obj.save(update_fields=["fecha_uso"])
 
-        try:
-            params = {
+        encolar_correo(
+            "VERIFICACION_CORRECTA",
+            "HackUDC - Correo verificado",
+            "correo/verificacion_correo_correcta",
+            {
                 "nombre": participante.nombre,
-                "token": token_obj.token,
+                "token": firmar_token(token_obj),
                 "host": request.get_host(),
                 "asunto": "HackUDC - Correo verificado",
-            }
-            email = EmailMultiAlternatives(
-                "HackUDC - Correo verificado",
-                render_to_string("correo/verificacion_correo_correcta.txt", params),
-                to=(participante.correo,),
-                reply_to=("hackudc@gpul.org",),
-                headers={
-                    "Message-ID": f"hackudc-{token_obj.fecha_creacion.timestamp()}"
-                },
-            )
-            email.attach_alternative(
-                render_to_string("correo/verificacion_correo_correcta.html", params),
-                "text/html",
-            )
-            email.send(fail_silently=False)
-        except Exception as e:
-            pass
+            },
+            participante.correo,
+            persona=participante,
+            cabeceras={"Message-ID": f"hackudc-{token_obj.fecha_creacion.timestamp()}"},
+        )
+
         messages.success(
             request,
             "Tu correo está verificado! Vuelve cuando quieras para revisar tus detalles!",
@@ -176,15 +219,13 @@ def verificar_correo(request: HttpRequest, token: str):
 @login_not_required
 @require_http_methods(["GET", "POST"])
 def confirmar_plaza(request: HttpRequest, token: str):
-    token_obj = Token.objects.filter(token=token, tipo="CONFIRMACION").first()
+    resolucion = resolver_token(token, "CONFIRMACION", caducados=True)
 
-    if not token_obj:
+    if not resolucion.existe:
         messages.error(request, "Token inválido")
         return render(request, "vacio.html", {"titulo": "Confirmar plaza"})
 
-    participante: Participante = Participante.objects.get(
-        correo=token_obj.persona.correo
-    )
+    token_obj, participante = resolucion.token, resolucion.participante
 
     if request.method == "GET":
         return render(
@@ -193,7 +234,7 @@ def confirmar_plaza(request: HttpRequest, token: str):
             {"token": token_obj, "participante": participante},
         )
 
-    if not token_obj.valido() and not participante.confirmado():
+    if not resolucion.valido and not participante.confirmado():
         messages.error(
             request,
             "El token de verificación ha expirado. Ponte en contacto con nosotros para confirmar tu plaza a través de hackudc@gpul.org.",
@@ -205,26 +246,27 @@ def confirmar_plaza(request: HttpRequest, token: str):
 @login_not_required
 @require_http_methods(["POST"])
 def aceptar_plaza(request: HttpRequest, token: str):
-    token_obj = Token.objects.filter(token=token, tipo="CONFIRMACION").first()
+    resolucion = resolver_token(token, "CONFIRMACION")
+
+    if not resolucion.existe:
+        messages.error(request, "Token inválido")
+        return render(request, "vacio.html", {"titulo": "Confirmar plaza"})
 
-    if not token_obj.valido():
+    if not resolucion.valido:
         messages.error(
             request,
             "Token caducado. No puedes confirmar tu plaza. Si crees que es un error, ponte en contacto a través de hackudc@gpul.org para solucionarlo",
         )
         return redirect("confirmar-plaza", token)
 
-    participante: Participante = Participante.objects.get(
-        correo=token_obj.persona.correo
-    )
-
+    token_obj, participante = resolucion.token, resolucion.participante
     ahora = timezone.now()
 
     participante.fecha_confirmacion_plaza = ahora
-    participante.save()
+    participante.save(update_fields=["fecha_confirmacion_plaza"])
 
     token_obj.fecha_uso = ahora
-    token_obj.save()
+    token_obj.save(update_fields=["fecha_uso"])
 
     messages.success(request, "Plaza confirmada.")
     return redirect("confirmar-plaza", token)
@@ -233,25 +275,25 @@ def aceptar_plaza(request: HttpRequest, token: str):
 @login_not_required
 @require_http_methods(["GET", "POST"])
 def rechazar_plaza(request: HttpRequest, token: str):
-    token_obj = Token.objects.filter(token=token, tipo="CONFIRMACION").first()
+    # Se puede renunciar a la plaza aunque el enlace haya caducado
+    resolucion = resolver_token(token, "CONFIRMACION", caducados=True)
 
-    if not token_obj:
+    if not resolucion.existe:
         messages.error(request, "Token inválido")
         return render(request, "vacio.html")
 
+    token_obj, participante = resolucion.token, resolucion.participante
+
     if request.method == "GET":
         return render(request, "rechazar_plaza.html", {"token": token_obj})
 
     ahora = timezone.now()
 
-    participante: Participante = Participante.objects.get(
-        correo=token_obj.persona.correo
-    )
     participante.fecha_rechazo_plaza = ahora
-    participante.save()
+    participante.save(update_fields=["fecha_rechazo_plaza"])
 
     token_obj.fecha_uso = ahora
-    token_obj.save()
+    token_obj.save(update_fields=["fecha_uso"])
 
     messages.success(
         request,
@@ -261,7 +303,17 @@ def rechazar_plaza(request: HttpRequest, token: str):
 
 
 def gestion(request: HttpRequest):
-    return render(request, "gestion/index.html")
+    embudo = None
+    if request.user.has_perm("gestion.view_participante"):
+        # Un solo recorrido del índice de estado
+        totales = dict(
+            Participante.objects.values_list("estado").annotate(total=Count("pk"))
+        )
+        embudo = [
+            (nombre, totales.get(estado, 0)) for estado, nombre in ESTADOS_PARTICIPANTE
+        ]
+
+    return render(request, "gestion/index.html", {"embudo": embudo})
 
 
 def cvs(request: HttpRequest, archivo: str):
@@ -292,8 +344,24 @@ def alta(request: HttpRequest):
 
     if form.is_valid():
         datos = form.cleaned_data
+        correo = datos["persona"].strip()
+
+        # 3. Petición completa
+        # Asignar la acreditación con un UPDATE condicional: dos puestos (o un doble
+        # envío) con la misma persona o la misma acreditación no se pisan
+        if datos["acreditacion"]:
+            resultado = asignar_acreditacion(correo, datos["acreditacion"])
+            _, error = RESPUESTAS_ASIGNACION[resultado]
+            if error:
+                messages.error(request, error)
+            else:
+                messages.success(
+                    request,
+                    f"Asignada acreditación {datos['acreditacion']} a {correo}",
+                )
+            return redirect("alta")
 
-        persona = Persona.objects.filter(correo=datos["correo"]).first()
+        persona = Persona.objects.filter(correo=correo).first()
 
         if not persona:
             messages.error(request, "No se encontró el participante")
@@ -309,25 +377,25 @@ def alta(request: HttpRequest):
 
         # 2. Petición solo con el correo
         # Mostrar los datos y el formulario precompletado con el correo
-        if not datos["acreditacion"]:
-            messages.info(request, f"{persona.nombre} - {persona.talla_camiseta}")
-            return render(request, "gestion/registro.html", {"form": form})
-
-        # 3. Petición completa
-        # Asignar la acreditación. Página de éxito con timeout y volver a la original
-        persona.acreditacion = datos["acreditacion"]
-        persona.save()
-
-        messages.success(
-            request,
-            f"Asignada acreditación {persona.acreditacion} a {persona.correo}",
-        )
-        return redirect("alta")
+        messages.info(request, f"{persona.nombre} - {persona.talla_camiseta}")
+        return render(request, "gestion/registro.html", {"form": form})
 
     messages.error(request, "Datos incorrectos")
     return render(request, "gestion/registro.html", {"form": form})
 
 
+RESPUESTAS_ASIGNACION = {
+    "ASIGNADA": (200, None),
+    "REPETIDA": (200, None),
+    "YA_TIENE": (409, "La persona ya tiene otra acreditación"),
+    "EN_USO": (409, "La acreditación ya está asignada a otra persona"),
+    "NO_ACEPTADO": (409, "El participante no ha sido aceptado"),
+    "INEXISTENTE": (404, "No se encontró el participante"),
+    "INCORRECTA": (400, "Acreditación incorrecta: revisa que esté bien tecleada"),
+    "NO_REGISTRADA": (409, "La acreditación no está entre los códigos impresos"),
+}
+
+
 @require_http_methods(["GET", "POST"])
 def pases(request: HttpRequest):
     """Pases del evento. Registra un pase y muestra si es la primera vez que ese participante utiliza ese pase"""
@@ -345,12 +413,18 @@ def pases(request: HttpRequest):
 
     if form.is_valid():
         datos = form.cleaned_data
-        persona = Persona.objects.filter(acreditacion=datos["acreditacion"]).first()
+        persona = buscar_persona(datos["acreditacion"])
 
         if persona:
-            pase = Pase(persona=persona, tipo_pase=datos["tipo_pase"])
-            pase.save()
-            messages.success(request, f"Pase creado")
+            previos = _registrar_pase(persona, datos["tipo_pase"])
+            if previos is None:
+                messages.warning(request, "Pase ya registrado hace unos segundos")
+            elif previos:
+                messages.warning(
+                    request, f"Pase creado. Es la {previos + 1}ª vez que lo usa"
+                )
+            else:
+                messages.success(request, f"Pase creado")
             return redirect("pases")
 
         messages.error(request, "No existe la acreditación")
@@ -360,6 +434,19 @@ def pases(request: HttpRequest):
     return render(request, "gestion/pases.html", {"form": form})
 
 
+@escritura_con_reintentos
+def _registrar_pase(persona: PersonaAcreditada, tipo_pase: TipoPase) -> int | None:
+    """Crea el pase y devuelve cuántos había antes del mismo tipo, o None si es una
+    lectura duplicada"""
+    previos = Pase.objects.filter(persona_id=persona.correo, tipo_pase=tipo_pase)
+    if previos.filter(fecha__gte=timezone.now() - VENTANA_DUPLICADOS).exists():
+        return None
+
+    total = previos.count()
+    Pase.objects.create(persona_id=persona.correo, tipo_pase=tipo_pase)
+    return total
+
+
 @require_http_methods(["GET"])
 def presencia(request: HttpRequest, acreditacion: str = ""):
     if not acreditacion:
@@ -368,13 +455,15 @@ def presencia(request: HttpRequest, acreditacion: str = ""):
     if not acreditacion:
         return render(request, "gestion/presencia.html")
 
-    persona = Persona.objects.filter(acreditacion=acreditacion).first()
+    persona = buscar_persona(acreditacion)
 
     if not persona:
         messages.error(request, "No existe la acreditación")
         return redirect("presencia")
 
-    presencias = Presencia.objects.filter(persona=persona).order_by("-entrada")
+    presencias = Presencia.objects.filter(persona_id=persona.correo).order_by(
+        "-entrada"
+    )
 
     tiempo_total = timedelta()
     for presencia in presencias:
@@ -402,50 +491,81 @@ def presencia(request: HttpRequest, acreditacion: str = ""):
 
 @require_http_methods(["GET"])
 def presencia_entrada(request: HttpRequest, acreditacion: str):
-    persona = Persona.objects.filter(acreditacion=acreditacion).first()
+    persona = buscar_persona(acreditacion)
     if not persona:
         messages.error(request, "No existe la acreditación")
         return redirect("presencia")
 
-    presencias = Presencia.objects.filter(persona=persona)
-    ultima = presencias.order_by("-entrada").first()
+    ultima, duplicada = _registrar_entrada(persona)
 
-    if not ultima:
+    if duplicada:
+        messages.warning(request, "Entrada ya registrada hace unos segundos")
+    elif not ultima:
         messages.error(request, "No había ninguna entrada")
     elif not ultima.salida:
         messages.warning(request, "No hay salida registrada de la última presencia")
 
-    # Guardar entrada
-    entrada = Presencia(persona=persona, entrada=timezone.now())
-    entrada.save()
-
     return redirect("presencia", acreditacion=acreditacion)
 
 
+@escritura_con_reintentos
+def _registrar_entrada(persona: PersonaAcreditada) -> tuple[Presencia | None, bool]:
+    """Guarda la entrada. Devuelve la presencia anterior y si era una lectura duplicada"""
+    ahora = timezone.now()
+    ultima = (
+        Presencia.objects.filter(persona_id=persona.correo).order_by("-entrada").first()
+    )
+
+    if (
+        ultima
+        and not ultima.salida
+        and ultima.entrada
+        and ahora - ultima.entrada < VENTANA_DUPLICADOS
+    ):
+        return ultima, True
+
+    Presencia.objects.create(persona_id=persona.correo, entrada=ahora)
+    return ultima, False
+
+
 @require_http_methods(["GET"])
 def presencia_salida(request: HttpRequest, acreditacion: str):
-    persona = Persona.objects.filter(acreditacion=acreditacion).first()
+    persona = buscar_persona(acreditacion)
     if not persona:
         messages.error(request, "No existe la acreditación")
         return redirect("presencia")
 
-    presencias = Presencia.objects.filter(persona=persona)
-    ultima = presencias.order_by("-entrada").first()
+    ultima, duplicada = _registrar_salida(persona)
 
-    if not ultima:
+    if duplicada:
+        messages.warning(request, "Salida ya registrada hace unos segundos")
+    elif not ultima:
         messages.error(request, "No había ninguna entrada")
-        ultima = Presencia(persona=persona)
     elif ultima.salida:
         messages.warning(request, "La última presencia ya tiene salida registrada")
-        ultima = Presencia(persona=persona)
-
-    # Guardar salida
-    ultima.salida = timezone.now()
-    ultima.save()
 
     return redirect("presencia", acreditacion=acreditacion)
 
 
+@escritura_con_reintentos
+def _registrar_salida(persona: PersonaAcreditada) -> tuple[Presencia | None, bool]:
+    """Cierra la última presencia o crea una solo con salida. Devuelve la presencia
+    anterior (sin modificar) y si era una lectura duplicada"""
+    ahora = timezone.now()
+    ultima = (
+        Presencia.objects.filter(persona_id=persona.correo).order_by("-entrada").first()
+    )
+
+    if ultima and ultima.salida and ahora - ultima.salida < VENTANA_DUPLICADOS:
+        return ultima, True
+
+    if ultima and not ultima.salida:
+        Presencia.objects.filter(pk=ultima.pk).update(salida=ahora)
+    else:
+        Presencia.objects.create(persona_id=persona.correo, salida=ahora)
+    return ultima, False
+
+
 @require_http_methods(["GET", "POST"])
 def presencia_editar(request: HttpRequest, id_presencia: str):
     presencia = Presencia.objects.filter(id_presencia=id_presencia).first()
@@ -507,3 +627,148 @@ def info_participante(request: HttpRequest, correo: str):
                 del form.fields["telefono"]
 
     return render(request, "verificacion_correcta.html", {"form": form})
+
+
+# API JSON de los puestos de acreditación -------------------------------------
+# Respuestas mínimas y sin mensajes en la sesión, para lectores de códigos de barras
+
+RE_DNI = re.compile(r"^[XYZ]?\d{7,8}[A-Z]$")
+
+
+def _datos_alta(persona: Persona) -> dict:
+    if hasattr(persona, "participante"):
+        tipo = "participante"
+    elif hasattr(persona, "mentor"):
+        tipo = "mentor"
+    else:
+        tipo = "persona"
+
+    return {
+        "correo": persona.correo,
+        "nombre": persona.nombre,
+        "tipo": tipo,
+        "estado": persona.estado,
+        "talla_camiseta": persona.talla_camiseta,
+        "restricciones_alimentarias": [
+            restriccion.nombre
+            for restriccion in persona.restricciones_alimentarias.all()
+        ],
+        "detalle_restricciones_alimentarias": persona.detalle_restricciones_alimentarias,
+        "acreditacion": persona.acreditacion,
+    }
+
+
+def _buscar_persona_alta(valor: str) -> Persona | None:
+    """Busca por correo, DNI/NIE o el contenido del QR (el enlace o el token de
+    confirmación de plaza) con la persona, su tipo y sus restricciones"""
+    personas = Persona.objects.select_related(
+        "participante", "mentor"
+    ).prefetch_related("restricciones_alimentarias")
+
+    valor = valor.strip()
+    if "/" in valor:
+        # Enlace completo: el token es el último segmento
+        valor = valor.rstrip("/").rsplit("/", 1)[-1]
+    if "@" in valor:
+        return personas.filter(correo=valor.removeprefix("mailto:")).first()
+
+    dni = normalizar_dni(valor)
+    if RE_DNI.match(dni):
+        return personas.filter(dni__in={dni, valor}).first()
+
+    resolucion = resolver_token(valor, "CONFIRMACION", caducados=True)
+    if not resolucion.existe or resolucion.token is None:
+        return None
+    return personas.filter(pk=resolucion.token.persona_id).first()
+
+
+@require_http_methods(["GET"])
+def api_alta_buscar(request: HttpRequest):
+    """`?q=` con el correo, el DNI/NIE o el QR. Devuelve los datos para la entrega
+    de la acreditación"""
+    valor = request.GET.get("q", "")
+    if not valor.strip():
+        return JsonResponse({"error": "Falta el parámetro q"}, status=400)
+
+    persona = _buscar_persona_alta(valor)
+    if persona is None:
+        return JsonResponse({"error": "No se encontró el participante"}, status=404)
+
+    return JsonResponse(_datos_alta(persona))
+
+
+@require_http_methods(["POST"])
+def api_alta_asignar(request: HttpRequest):
+    """Cuerpo JSON `{"correo": ..., "acreditacion": ...}`. Repetir la misma petición
+    no es un error: responde igual que la primera vez"""
+    try:
+        datos = json.loads(request.body)
+        correo = str(datos["correo"]).strip()
+        acreditacion = str(datos["acreditacion"]).strip()
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse(
+            {"error": "Se esperaba un JSON con correo y acreditacion"}, status=400
+        )
+    if not correo:
+        return JsonResponse({"error": "Datos incorrectos"}, status=400)
+
+    resultado = asignar_acreditacion(correo, acreditacion)
+    estado, error = RESPUESTAS_ASIGNACION[resultado]
+    if error:
+        return JsonResponse({"error": error, "resultado": resultado}, status=estado)
+
+    return JsonResponse({"resultado": resultado, "acreditacion": acreditacion})
+
+
+# Máximo de eventos por petición de sincronización
+MAX_EVENTOS_SINCRONIZACION = 5000
+
+
+def _etag_instantanea(request: HttpRequest) -> str:
+    # La vista la reutiliza para no calcularla dos veces
+    request.version_instantanea = version_instantanea()
+    # Con y sin DNI son instantáneas distintas
+    dni = request.user.has_perm("gestion.ver_dni_telefono_participante")
+    return f"{request.version_instantanea}-{int(dni)}"
+
+
+@gzip_page
+@require_http_methods(["GET"])
+@condition(etag_func=_etag_instantanea)
+def api_instantanea(request: HttpRequest):
+    """Instantánea para los puestos sin conexión (ver gestion.kioscos). Con
+    If-None-Match responde 304 si no ha cambiado, sin leer las personas"""
+    return JsonResponse(
+        construir_instantanea(
+            incluir_dni=request.user.has_perm("gestion.ver_dni_telefono_participante"),
+            version=request.version_instantanea,
+        )
+    )
+
+
+@require_http_methods(["POST"])
+def api_sincronizar(request: HttpRequest):
+    """Cuerpo JSON `{"puesto": ..., "eventos": [...]}` con las altas, pases, entradas
+    y salidas registradas sin conexión. Devuelve el resultado de cada evento"""
+    try:
+        datos = json.loads(request.body)
+        eventos = datos["eventos"]
+        puesto = str(datos.get("puesto", ""))
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse(
+            {"error": "Se esperaba un JSON con la lista de eventos"}, status=400
+        )
+    if not isinstance(eventos, list) or len(eventos) > MAX_EVENTOS_SINCRONIZACION:
+        return JsonResponse(
+            {
+                "error": f"Se esperaba una lista de hasta {MAX_EVENTOS_SINCRONIZACION} eventos"
+            },
+            status=400,
+        )
+
+    return JsonResponse(
+        {
+            "resultados": sincronizar(eventos, puesto),
+            "version": version_instantanea(),
+        }
+    )
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "gestion.middleware.LimiteTasaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -94,9 +95,79 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Las transacciones toman el bloqueo de escritura al empezar. Evita los
+            # "database is locked" al pasar de lectura a escritura (gestion.sqlite)
+            "transaction_mode": "IMMEDIATE",
+        },
     }
 }
 
+# Ajustes aplicados a cada nueva conexión de SQLite (gestion.signals).
+# Comparar con y sin ellos: `python manage.py benchsqlite`
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms
+    "foreign_keys": "ON",
+    "cache_size": -20000,  # KiB (20 MB)
+    "mmap_size": 128 * 1024**2,  # 128 MB
+    "temp_store": "MEMORY",
+}
+# Espera al bloqueo de cada intento de las escrituras con reintentos (gestion.sqlite),
+# más corta que busy_timeout: con 5 intentos, un escaneo no retiene el worker más de
+# dos segundos
+SQLITE_ESPERA_ESCRITURA = 250  # ms
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Compartida entre los workers de gunicorn (ver gestion.cache)
+CACHES = {
+    "default": {
+        "BACKEND": "gestion.cache.SQLiteCache",
+        "LOCATION": BASE_DIR / "cache.sqlite3",
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+            "CULL_FREQUENCY": 4,
+        },
+    },
+    # Contadores del límite de peticiones, separados para no desplazar al resto
+    "limites": {
+        "BACKEND": "gestion.cache.SQLiteCache",
+        "LOCATION": BASE_DIR / "cache_limites.sqlite3",
+        "OPTIONS": {
+            "MAX_ENTRIES": 20000,
+            "CULL_FREQUENCY": 4,
+        },
+    },
+    # Cupo diario de envío de correos (gestion.smtp_async). Aparte para que ni las
+    # expulsiones del resto de claves ni `limpiarcache` lo borren
+    "correo": {
+        "BACKEND": "gestion.cache.SQLiteCache",
+        "LOCATION": BASE_DIR / "cache_correo.sqlite3",
+    },
+}
+
+# Límite de peticiones por IP a las vistas públicas (ver gestion.middleware)
+# "nombre de URL[:método]": (peticiones, segundos)
+LIMITES_TASA = {
+    "registro:POST": (10, 600),
+    "registro": (120, 60),
+    "verificar-correo": (30, 60),
+    "confirmar-plaza": (30, 60),
+    "aceptar-plaza": (10, 60),
+    "rechazar-plaza": (10, 60),
+}
+LIMITES_TASA_CACHE = "limites"
+# Proxies inversos de confianza, de los que se toma X-Forwarded-For
+LIMITES_TASA_PROXIES = ["127.0.0.1", "::1"]
+# IPs compartidas por muchos participantes (NAT de la wifi del evento o de la
+# facultad), que no se limitan
+LIMITES_TASA_EXENTAS = [
+    ip.strip() for ip in os.getenv("LIMITES_TASA_EXENTAS", "").split(",") if ip.strip()
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -239,6 +310,8 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.1/topics/files/
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "media/"
+# Tamaño máximo del CV. Se comprueba mientras se recibe (gestion.subidas)
+CV_TAMANO_MAXIMO = 5 * 1024**2  # 5 MB
 
 # Fixtures (initial data)
 # https://docs.djangoproject.com/en/5.1/topics/db/fixtures/
@@ -262,14 +335,23 @@ MESSAGE_STORAGE = "django.contrib.messages.storage.session.SessionStorage"
 # Email
 # https://docs.djangoproject.com/en/5.1/topics/email/
 EMAIL_HOST = os.getenv("EMAIL_HOST")
-EMAIL_PORT = 465
-EMAIL_USE_SSL = True
+EMAIL_PORT = int(os.getenv("EMAIL_PORT") or 465)
+# Desactivar solo para servidores SMTP locales de prueba (`pruebacarga`)
+EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "True") != "False"
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
 SERVER_EMAIL = os.getenv("SERVER_EMAIL")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Límites del proveedor SMTP para los envíos masivos (ver gestion.smtp_async).
+# None para no limitar. Los valores por defecto son los de Google Workspace
+EMAIL_LIMITES_PROVEEDOR = {
+    "por_minuto": 60,
+    "por_conexion": 100,
+    "por_dia": 2000,
+}
+EMAIL_CUPO_CACHE = "correo"
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 # Configuración de entorno ----------------------------------------------------
@@ -286,6 +368,22 @@ FECHA_FIN_REGISTRO = datetime.fromisoformat(os.getenv("FECHA_FIN_REGISTRO")).rep
     tzinfo=ZoneInfo(TIME_ZONE)
 )
 
+# Enlaces de los correos con tokens firmados (ver gestion.tokens.firmar_token)
+TOKENS_FIRMADOS = os.getenv("TOKENS_FIRMADOS", "False") == "True"
+
+# Exigir el dígito de control en las acreditaciones (ver gestion.acreditaciones).
+# Desactivado por defecto para no rechazar acreditaciones ya impresas sin él;
+# `manage.py check --database default` avisa de las guardadas que no lo cumplen
+ACREDITACIONES_DIGITO_CONTROL = (
+    os.getenv("ACREDITACIONES_DIGITO_CONTROL", "False") == "True"
+)
+
+# Instancia de listmonk para `listacorreo --enviar` (ver gestion.listmonk)
+LISTMONK_URL = os.getenv("LISTMONK_URL")
+LISTMONK_USUARIO = os.getenv("LISTMONK_USUARIO")
+LISTMONK_TOKEN = os.getenv("LISTMONK_TOKEN")
+LISTMONK_LISTA = int(os.getenv("LISTMONK_LISTA") or 0) or None
+
 # Nombre y mail del administrador
 NOMBRE_ADMIN = os.getenv("NOMBRE_ADMIN")
 MAIL_ADMIN = os.getenv("MAIL_ADMIN")
@@ -7,8 +7,12 @@ git pull
 # Preparativos
 python3 manage.py migrate
 python3 manage.py collectstatic --noinput
+python3 manage.py limpiarcache
+python3 manage.py compilarcorreos
 
 # Recarga
 pkill gunicorn
+pkill -f "manage.py enviarcorreos"
 sleep 5
 gunicorn >> gunicorn.log &
+python3 manage.py enviarcorreos >> log/correos.log 2>&1 &